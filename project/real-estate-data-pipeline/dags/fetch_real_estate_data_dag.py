@@ -1,10 +1,30 @@
 from __future__ import annotations
 
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pendulum
 from airflow.decorators import dag, task
+from airflow.models.param import Param
+from airflow.operators.python import get_current_context
+
+# 시군구별 API 호출 태스크가 사용하는 Airflow 풀.
+# 풀의 슬롯 수가 동시에 실행되는 API 호출 수(=API 할당량에 맞춘 동시성)를 결정합니다.
+# 수집 태스크는 적응형 동시성 제한(AdaptiveConcurrency)을 쓰지 않으므로, 서버가 느려지면 풀 크기를 줄입니다.
+#   airflow pools set molit_api 8 "국토교통부 실거래가 API 동시 호출 제한"
+API_POOL = "molit_api"
+
+# 시군구별 수집 결과를 병합 단계로 넘기기 위해 Parquet 파일로 보관하는 디렉터리
+# (여러 워커 노드에서 실행한다면 모든 노드가 공유하는 경로여야 합니다)
+STAGING_DIR = os.getenv("STAGING_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "staging"))
+
+TABLE_NAME = "raw_apt_trade"
+TRADE_TYPE = "매매"
+
+# 실행할 때마다 다시 확인하는 최근 월 수 (대상 월 포함).
+# 국토부는 지연 신고 거래와 해제(cdealType) 정보를 해당 월에 몇 주~몇 달 동안 계속 반영합니다.
+REVISION_WINDOW_MONTHS = int(os.getenv("REVISION_WINDOW_MONTHS", "6"))
+
 
 @dag(
     dag_id="fetch_real_estate_data",
@@ -13,125 +33,347 @@ from airflow.decorators import dag, task
     start_date=pendulum.datetime(2024, 1, 1, tz="Asia/Seoul"),
     catchup=False,
     tags=["real_estate", "api", "final"],
+    params={
+        # 수집할 시도 이름 목록 (비어 있으면 전국)
+        "sido_names": Param([], type="array", description="예: ['서울특별시', '경기도']. 비어 있으면 전국을 수집합니다."),
+        # 다시 확인할 최근 월 수 (1이면 대상 월만 수집)
+        "revision_months": Param(REVISION_WINDOW_MONTHS, type="integer", minimum=1, maximum=24),
+    },
 )
 def fetch_real_estate_data_dag():
     """
-    매월 초, 국토교통부 API를 통해 '지난달'의 서울시 전체 아파트 매매 실거래가
+    매월 초, 국토교통부 API를 통해 '지난달'의 전국 아파트 매매 실거래가
     데이터를 수집하여 DB에 증분 적재하는 DAG입니다.
-    
+
     데이터 처리 방식:
-    1. DB에서 해당 월의 기존 데이터를 읽어옵니다.
-    2. API에서 해당 월의 신규 데이터를 모두 가져옵니다.
-    3. 두 데이터를 비교하여 중복되지 않는 '순수 신규' 데이터만 DB에 추가합니다.
+    1. 전국 법정동 코드 표에서 시군구 목록을 만듭니다.
+    2. 동적 태스크 매핑으로 (시군구, 월)마다 API 수집 태스크를 하나씩 실행합니다.
+       - 'molit_api' 풀이 동시 호출 수를 API 할당량에 맞게 제한하고, 시군구별로 재시도합니다.
+       - 수집 결과는 Parquet 파일로 보관합니다. (전체 실행 시간은 시군구 수가 아니라 풀 크기에 비례)
+    3. 대상 월만이 아니라 최근 N개월(revision_months, 기본 6)을 매번 다시 조회합니다. (개정 윈도)
+       - 늦게 신고된 거래와 해제 정보가 지난 달들에 계속 추가되기 때문입니다.
+       - (시군구, 월) 응답마다 체크섬을 계산해 원장(ingest_ledger)의 값과 비교하고,
+         바뀌지 않은 파티션은 확인 시각만 기록하고 DB에는 쓰지 않습니다.
+    4. 처음 수집하는 파티션은 거래마다 자연키 기반의 행 지문(row_fingerprint)을 계산하고,
+       DB의 UNIQUE 인덱스(INSERT ... ON CONFLICT DO NOTHING)로 '순수 신규' 데이터만 추가합니다.
+       체크섬이 바뀐 파티션은 저장된 행과 비교해 추가/갱신/삭제된 거래만 반영합니다. (sync_partition)
+       해제/정정/삭제된 기존 거래는 변경 기록(raw_deal_changes)으로 남깁니다.
+    5. 원시 테이블은 거래연월(deal_ym) 기준 월 파티션 테이블이며, 새 달의 파티션은 적재 시 자동으로 만들어집니다.
+    6. 병합이 끝나면 원장에 새로 기록된 파티션과 변경 기록만으로 피처 테이블을 증분 갱신합니다. (build_features --incremental과 같음)
+       해제된 거래는 피처 테이블에서 빠지고, 동별 평균과 갭투자 건수는 (새 값 - 기존 값)만큼 보정됩니다.
+       원시 테이블은 전국을 수집하지만 피처 테이블은 지금도 서울(SEOUL_SGG_MAP)만 만듭니다. 서울 밖 파티션은 피처 갱신에서 건너뜁니다.
+
+    병렬 실행에는 LocalExecutor 이상(메타데이터 DB는 PostgreSQL 등)이 필요합니다.
     """
 
     @task
-    def get_target_month(data_interval_start: str) -> str:
+    def get_target_months(data_interval_start: str) -> list:
         """
         Airflow가 전달한 날짜 '문자열'을 '날짜 객체'로 변환한 후,
-        '지난달'을 YYYYMM 형식의 문자열로 변환합니다.
+        '지난달'과 그 이전 (revision_months - 1)개월을 YYYYMM 형식의 문자열 목록으로 변환합니다.
         """
         execution_date = pendulum.parse(data_interval_start)
-        
-        target_month_str = execution_date.strftime("%Y%m")
-        print(f"이번 작업의 대상 월은 '{target_month_str}' 입니다.")
-        return target_month_str
+        revision_months = int(get_current_context()["params"].get("revision_months") or REVISION_WINDOW_MONTHS)
+
+        target_months = [execution_date.subtract(months=i).strftime("%Y%m") for i in range(revision_months)]
+        print(f"이번 작업의 대상 월은 '{target_months[0]}' 이며, 최근 {revision_months}개월을 다시 확인합니다: {target_months}")
+        return target_months
 
     @task
-    def process_data_for_month(target_month: str):
+    def get_region_codes() -> list:
+        """법정동 코드 표에서 수집 대상 시군구 코드(5자리) 목록을 만듭니다."""
+        import sys
+        sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+        from utils.get_region_codes import get_sigungu_codes
+
+        sido_names = get_current_context()["params"].get("sido_names") or None
+        sigungu_codes = get_sigungu_codes(sido_names)
+        print(f">> 수집 대상 시군구 {len(sigungu_codes)}개 ({', '.join(sido_names) if sido_names else '전국'})")
+        return list(sigungu_codes.values())
+
+    @task(
+        pool=API_POOL,
+        retries=3,
+        retry_delay=timedelta(minutes=1),
+        retry_exponential_backoff=True,
+        max_retry_delay=timedelta(minutes=15),
+        map_index_template="{{ partition_key }}",
+    )
+    def fetch_partition(sigungu_code: str, target_month: str) -> dict:
         """
-        특정 월의 데이터를 '비교 후 증분 적재' 방식으로 처리합니다.
-        모든 외부 라이브러리 import와 객체 생성은 이 Task 내부에서 수행됩니다.
+        (시군구, 월) 파티션 하나를 API에서 가져와 응답 체크섬을 원장과 비교합니다. DB 데이터에는 쓰지 않습니다.
+        응답이 바뀐 파티션만 Parquet 파일로 보관해 병합 단계로 넘깁니다.
+        실패하면 이 파티션만 재시도합니다.
         """
-        # --- 1. Task 내부에서 모든 의존성 import 및 초기화 ---
         import sys
+        import time
         import pandas as pd
         from dotenv import load_dotenv
-        from sqlalchemy import create_engine, text
         from PublicDataReader import TransactionPrice
+        from sqlalchemy import create_engine
 
         sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-        from utils.get_region_codes import get_seoul_sigungu_codes
-        
+        from utils.api_cache import CachedTransactionPrice
+        from utils.api_client import PRIORITY_SCHEDULED, ManagedTransactionPrice
+        from utils.dedup import NATURAL_KEYS, add_row_fingerprint
+        from utils.ingest_ledger import dataframe_checksum, ensure_ledger_table, get_partition_state
+        from utils.run_metrics import start_run
+
+        # Airflow UI에서 매핑된 태스크를 (시군구, 월)로 구분합니다.
+        get_current_context()["partition_key"] = f"{sigungu_code}/{target_month}"
+
         load_dotenv()
-        DATABASE_URL = os.getenv("DATABASE_URL")
         PUBLIC_DATA_API_KEY = os.getenv("PUBLIC_DATA_HUB")
+        DATABASE_URL = os.getenv("DATABASE_URL")
         DB_SCHEMA = os.getenv("DB_SCHEMA", "public")
+        if not PUBLIC_DATA_API_KEY:
+            raise ValueError("API 키가 .env 파일에 설정되지 않았습니다.")
+        if not DATABASE_URL:
+            raise ValueError("데이터베이스 URL이 .env 파일에 설정되지 않았습니다.")
+        engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+        # 월간 DAG는 가장 높은 우선순위로 일일 호출 한도를 사용합니다. (백필용으로는 남겨 둔 한도까지 사용)
+        # 매핑된 태스크는 각자 한 번만 호출하므로 태스크 안의 적응형 동시성 제한기는 조절할 기회가 없습니다.
+        # 태스크 간 동시 호출 수는 'molit_api' 풀이 제한하고, 백필/노트북과의 경합은 한도의 예약분(API_QUOTA_RESERVE)으로 막습니다.
+        client = ManagedTransactionPrice.from_env(
+            TransactionPrice(PUBLIC_DATA_API_KEY), engine, DB_SCHEMA, priority=PRIORITY_SCHEDULED, adaptive=False
+        )
+        api = CachedTransactionPrice.from_env(client)
+        # 이 태스크의 API 호출 지연 시간을 모아 결과로 넘기고, 병합 단계에서 실행 리포트로 합칩니다.
+        metrics = start_run("fetch_partition")
 
-        if not PUBLIC_DATA_API_KEY or not DATABASE_URL:
-            raise ValueError("API 키 또는 데이터베이스 URL이 .env 파일에 설정되지 않았습니다.")
-        
-        engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=3600)
-        api = TransactionPrice(PUBLIC_DATA_API_KEY)
+        started_at = time.monotonic()
+        original_df = api.get_data(
+            property_type="아파트",
+            trade_type=TRADE_TYPE,
+            sigungu_code=sigungu_code,
+            year_month=target_month,
+        )
+        df = pd.DataFrame(original_df) if original_df is not None else pd.DataFrame()
+        if not df.empty:
+            # 체크섬은 원장에 기록하는 값과 같도록 행 지문을 붙인 뒤 계산합니다.
+            df = add_row_fingerprint(df, NATURAL_KEYS[TRADE_TYPE])
+        checksum = dataframe_checksum(df)
+
+        ensure_ledger_table(engine, DB_SCHEMA)
+        with engine.connect() as connection:
+            state = get_partition_state(connection, DB_SCHEMA, TRADE_TYPE, sigungu_code, target_month)
+        engine.dispose()
 
-        print(f"'{target_month}' 데이터 처리 시작 (비교 후 증분 적재 방식)")
-        table_name = "raw_apt_trade"
+        result = {
+            "sigungu_code": sigungu_code,
+            "target_month": target_month,
+            "rows": len(df),
+            "checksum": checksum,
+            # 원장에 완료 기록이 있고 체크섬이 같으면 다시 쓸 필요가 없습니다.
+            "changed": state is None or state.status not in ("success", "empty") or state.checksum != checksum,
+            # 이전에 저장된 행이 있던 파티션인지 (있으면 차이만 반영)
+            # 실패 기록은 마지막으로 성공한 적재의 row_count를 유지하므로 상태와 관계없이 row_count를 봅니다.
+            "previous_rows": state.row_count if state is not None else 0,
+            "path": None,
+            "duration": time.monotonic() - started_at,
+            "api_calls": metrics.api_call_samples(),
+        }
+        if result["changed"] and not df.empty:
+            path = os.path.join(STAGING_DIR, TABLE_NAME, target_month, f"{sigungu_code}.parquet")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            df.to_parquet(path, index=False)
+            result["path"] = path
+        status = "변경" if result["changed"] else "변경 없음"
+        print(f">> [{sigungu_code} / {target_month}] {len(df)}건 수집, {status} ({result['duration']:.1f}초)")
+        return result
 
-        # --- 2. DB에서 기존 데이터 읽어오기 ---
+    @task(trigger_rule="all_done")
+    def merge_partitions(target_months: list, sigungu_codes: list, results: list):
+        """
+        (시군구, 월)별 수집 결과 중 응답이 바뀐 파티션만 DB에 반영하고 원장에 기록합니다.
+        - 처음 수집한 파티션: 신규 거래만 추가합니다.
+        - 이전에 저장된 파티션: 저장된 행과 비교해 추가/갱신/삭제된 거래만 반영합니다.
+        - 바뀌지 않은 파티션: 원장의 확인 시각(checked_at)만 갱신합니다.
+        재시도까지 실패한 파티션은 원장에 'failed'로 남겨 다음 실행이나 백필 --resume에서 다시 수집합니다.
+        """
+        import sys
+        import pandas as pd
+        from dotenv import load_dotenv
+        from sqlalchemy import create_engine
+
+        sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+        from utils.dedup import insert_new_rows, sync_partition
+        from utils.ingest_ledger import ensure_ledger_table, mark_checked, record_partition, record_partition_failure
+        from utils.run_metrics import finish_run, start_run, track_stage
+
+        load_dotenv()
+        DATABASE_URL = os.getenv("DATABASE_URL")
+        DB_SCHEMA = os.getenv("DB_SCHEMA", "public")
+        if not DATABASE_URL:
+            raise ValueError("데이터베이스 URL이 .env 파일에 설정되지 않았습니다.")
+
+        engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=3600)
+        ensure_ledger_table(engine, DB_SCHEMA)
+
+        # DAG 실행 하나의 리포트: 매핑된 수집 태스크들의 소요 시간/행 수/API 지연 시간과 병합 단계를 함께 기록합니다.
+        metrics = start_run(
+            "fetch_real_estate_data",
+            run_id=get_current_context()["run_id"],
+            months=target_months,
+            districts=len(sigungu_codes),
+        )
         try:
+            # 실패한 매핑 태스크는 결과를 남기지 않으므로, 대상 목록과 비교해 누락된 파티션을 찾습니다.
+            results_by_key = {(result["sigungu_code"], result["target_month"]): result for result in results if result}
+            failed_keys = [(code, ym) for code in sigungu_codes for ym in target_months if (code, ym) not in results_by_key]
+            changed = [result for result in results_by_key.values() if result["changed"]]
+            unchanged_keys = [key for key, result in results_by_key.items() if not result["changed"]]
+
+            # 매핑된 수집 태스크들의 소요 시간 합계와 API 호출 지연 시간을 리포트에 합칩니다.
+            metrics.record_stage(
+                "fetch_partitions",
+                sum(result["duration"] for result in results_by_key.values()),
+                rows_in=len(sigungu_codes) * len(target_months),
+                rows_out=sum(result["rows"] for result in results_by_key.values()),
+            )
+            for result in results_by_key.values():
+                for sample in result.get("api_calls", []):
+                    metrics.observe_api_call(*sample)
+
+            print(
+                f">> [병합] 시작. 수집 성공 {len(results_by_key)}개 (변경 {len(changed)}개, 변경 없음 {len(unchanged_keys)}개), "
+                f"실패 {len(failed_keys)}개 파티션"
+            )
+            with track_stage("merge_partitions", rows_in=sum(result["rows"] for result in changed)) as stage:
+                with engine.begin() as connection:
+                    mark_checked(connection, DB_SCHEMA, TRADE_TYPE, unchanged_keys)
+
+                totals = {"inserted": 0, "updated": 0, "deleted": 0}
+                # 저장된 거래의 변경 기록(raw_deal_changes) 건수 {변경 유형: 건수}
+                change_totals = {}
+                for result in changed:
+                    code, target_month = result["sigungu_code"], result["target_month"]
+                    # 파티션마다 별도 트랜잭션: 데이터 저장과 원장 기록은 함께 반영되거나 함께 취소됩니다.
+                    with engine.begin() as connection:
+                        if result["path"] is None:
+                            if result["previous_rows"]:
+                                # 저장된 거래가 있던 파티션이 통째로 빈 응답이면 API 장애일 가능성이 높으므로 지우지 않습니다.
+                                print(f"   WARN: [{code} / {target_month}] 이전 {result['previous_rows']}건이 있던 파티션의 응답이 비어 있어 반영하지 않습니다.")
+                                continue
+                            record_partition(
+                                connection, DB_SCHEMA, TRADE_TYPE, code, target_month, "empty",
+                                checksum=result["checksum"], duration_seconds=result["duration"],
+                            )
+                            continue
+                        df = pd.read_parquet(result["path"])
+                        if result["previous_rows"]:
+                            counts = sync_partition(df, TABLE_NAME, connection, DB_SCHEMA, code, target_month)
+                            print(
+                                f"   [{code} / {target_month}] 추가 {counts['inserted']}건, 갱신 {counts['updated']}건, "
+                                f"삭제 {counts['deleted']}건, 변경 기록 {counts['changes']}"
+                            )
+                            for change_type, value in counts.pop("changes").items():
+                                change_totals[change_type] = change_totals.get(change_type, 0) + value
+                        else:
+                            counts = {"inserted": insert_new_rows(df, TABLE_NAME, connection, DB_SCHEMA)}
+                        for key, value in counts.items():
+                            totals[key] += value
+                        record_partition(
+                            connection, DB_SCHEMA, TRADE_TYPE, code, target_month, "success",
+                            row_count=len(df),
+                            checksum=result["checksum"],
+                            duration_seconds=result["duration"],
+                        )
+                    os.remove(result["path"])
+                stage["rows_out"] = sum(totals.values())
+
             with engine.begin() as connection:
-                query = text(f'SELECT * FROM {DB_SCHEMA}."{table_name}" WHERE "수집월" = :month')
-                existing_df = pd.read_sql(query, connection, params={"month": target_month})
-            print(f">> [DB 읽기] 성공. '{target_month}'월의 기존 데이터 {len(existing_df)}건을 찾았습니다.")
+                for code, target_month in failed_keys:
+                    record_partition_failure(
+                        connection, DB_SCHEMA, TRADE_TYPE, code, target_month,
+                        last_error="API 수집 태스크가 재시도 후에도 실패했습니다.",
+                    )
+
+            print(f">> [병합] 완료. 추가 {totals['inserted']}건, 갱신 {totals['updated']}건, 삭제 {totals['deleted']}건을 반영했습니다.")
+            if change_totals:
+                print(f">> [병합] 저장된 거래의 변경 기록: {change_totals} (다음 피처 갱신에서 반영)")
+            if failed_keys:
+                raise RuntimeError(f"수집에 실패한 (시군구, 월) 파티션이 있습니다: {failed_keys}")
+        except Exception as e:
+            finish_run("failed", e)
+            raise
+        finish_run()
+
+    @task
+    def refresh_features():
+        """
+        이번 실행에서 원장에 기록된 (시군구, 월) 파티션만 다시 계산해 피처 테이블을 갱신합니다.
+        동별 평균, 갭투자, 가격 지수, 전세가율 모두 바뀐 자치구/달만 다시 계산합니다.
+        """
+        import sys
+        from dotenv import load_dotenv
+        from sqlalchemy import create_engine
+
+        sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+        from scripts.build_features import ensure_raw_typed_columns, run_incremental_build
+        from utils.complex_index import ensure_complex_tables
+        from utils.run_metrics import finish_run, start_run
+
+        load_dotenv()
+        DATABASE_URL = os.getenv("DATABASE_URL")
+        DB_SCHEMA = os.getenv("DB_SCHEMA", "public")
+        if not DATABASE_URL:
+            raise ValueError("데이터베이스 URL이 .env 파일에 설정되지 않았습니다.")
+
+        engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=3600)
+        ensure_raw_typed_columns(engine, DB_SCHEMA)
+        ensure_complex_tables(engine, DB_SCHEMA)
+
+        start_run("build_features", run_id=get_current_context()["run_id"], mode="incremental")
+        try:
+            run_incremental_build(engine, DB_SCHEMA)
         except Exception as e:
-            print(f">> [DB 읽기] 실패 또는 데이터 없음: {e}")
-            existing_df = pd.DataFrame()
-
-        # --- 3. API에서 신규 데이터 수집하기 ---
-        print(f">> [API 수집] 시작. '{target_month}'월의 신규 데이터를 수집합니다.")
-        seoul_codes = get_seoul_sigungu_codes()
-        api_df_list = []
-        for district, code in seoul_codes.items():
-            try:
-                original_df = api.get_data(
-                    property_type="아파트",
-                    trade_type="매매",
-                    sigungu_code=code,
-                    year_month=target_month,
-                )
-                if not original_df.empty:
-                    api_df_list.append(pd.DataFrame(original_df))
-            except Exception as e:
-                print(f"   - {district} API 호출 중 오류 발생 (건너뜁니다): {e}")
-        
-        if not api_df_list:
-            print(">> [API 수집] 신규 데이터가 없어 작업을 중단합니다.")
-            return
-        
-        api_df = pd.concat(api_df_list, ignore_index=True)
-        print(f">> [API 수집] 성공. 총 {len(api_df)}건의 데이터를 API로부터 가져왔습니다.")
-
-        # --- 4. 데이터 비교 및 신규 데이터만 필터링 ---
-        print(">> [데이터 비교] 시작. 기존 데이터와 신규 데이터를 비교합니다.")
-        if not existing_df.empty:
-            existing_df = existing_df[api_df.columns]
-        
-        combined_df = pd.concat([api_df, existing_df], ignore_index=True)
-        new_data_df = combined_df.drop_duplicates(keep=False)
-
-        # --- 5. 신규 데이터가 있을 경우에만 DB에 저장 ---
-        if new_data_df.empty:
-            print(">> [최종 저장] 신규 데이터가 없습니다. 작업을 종료합니다.")
-            return
-
-        print(f">> [최종 저장] {len(new_data_df)}건의 새로운 데이터를 DB에 저장합니다.")
+            finish_run("failed", e)
+            raise
+        finish_run()
+
+    @task
+    def export_lake():
+        """
+        원시/피처 테이블 중 지난 내보내기 이후 바뀐 (연도, 월, 시군구) 파티션만 Hive 파티션 Parquet으로 내보냅니다.
+        분석용 조회는 운영 DB 대신 이 파일을 읽습니다. LAKE_DIR이 설정되지 않았으면 건너뜁니다.
+        """
+        import sys
+        from airflow.exceptions import AirflowSkipException
+        from dotenv import load_dotenv
+        from sqlalchemy import create_engine
+
+        load_dotenv()
+        LAKE_DIR = os.getenv("LAKE_DIR")
+        if not LAKE_DIR:
+            raise AirflowSkipException("LAKE_DIR이 설정되지 않아 Parquet 내보내기를 건너뜁니다.")
+
+        sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        from export_parquet import export_lake as export_tables
+        from utils.run_metrics import finish_run, start_run
+
+        DATABASE_URL = os.getenv("DATABASE_URL")
+        DB_SCHEMA = os.getenv("DB_SCHEMA", "public")
+        if not DATABASE_URL:
+            raise ValueError("데이터베이스 URL이 .env 파일에 설정되지 않았습니다.")
+
+        engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=3600)
+        start_run("export_parquet", run_id=get_current_context()["run_id"])
         try:
-            with engine.begin() as connection:
-                new_data_df.to_sql(
-                    name=table_name,
-                    con=connection,
-                    schema=DB_SCHEMA,
-                    if_exists="append",
-                    index=False,
-                )
-            print(">> [최종 저장] 성공!")
+            export_tables(engine, DB_SCHEMA, LAKE_DIR)
         except Exception as e:
-            print(f">> [최종 저장] 실패: {e}")
-            raise e
+            finish_run("failed", e)
+            raise
+        finish_run()
 
     # --- Task 실행 순서 정의 ---
-    target_month_value = get_target_month(data_interval_start="{{ data_interval_start }}")
-    process_data_for_month(target_month=target_month_value)
+    target_months = get_target_months(data_interval_start="{{ data_interval_start }}")
+    region_codes = get_region_codes()
+    # (시군구 x 월) 조합마다 매핑 태스크가 하나씩 만들어집니다.
+    fetched = fetch_partition.expand(sigungu_code=region_codes, target_month=target_months)
+    merged = merge_partitions(target_months=target_months, sigungu_codes=region_codes, results=fetched)
+    # 병합이 실패하면(수집 실패 파티션 포함) 피처 갱신은 건너뛰고, 다음 실행의 증분 빌드가 함께 반영합니다.
+    merged >> refresh_features() >> export_lake()
 
 # Airflow가 DAG 객체를 인식할 수 있도록 변수에 할당합니다.
-fetch_real_estate_data = fetch_real_estate_data_dag()
\ No newline at end of file
+fetch_real_estate_data = fetch_real_estate_data_dag()
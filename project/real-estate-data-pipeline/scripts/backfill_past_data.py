@@ -1,5 +1,10 @@
 import os
 import sys
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 import pandas as pd
 from dotenv import load_dotenv
@@ -7,7 +12,19 @@ from PublicDataReader import TransactionPrice
 from sqlalchemy import create_engine, text
 
 
-from utils.get_region_codes import get_seoul_sigungu_codes
+from utils.get_region_codes import get_sigungu_codes
+from utils.rate_limiter import RateLimiter
+from utils.api_cache import CACHE_MODES, CachedTransactionPrice
+from utils.api_client import PRIORITY_BACKFILL, AdaptiveConcurrency, ManagedTransactionPrice, QuotaExceededError
+from utils.run_metrics import current_run, finish_run, start_run, track_stage
+from utils.dedup import NATURAL_KEYS, add_row_fingerprint, insert_new_rows
+from utils.ingest_ledger import (
+    dataframe_checksum,
+    ensure_ledger_table,
+    get_completed_partitions,
+    record_partition,
+    record_partition_failure,
+)
 
 load_dotenv(dotenv_path="../.env") 
 
@@ -44,82 +61,378 @@ except Exception as e:
     sys.exit(1)
 
 
-# PublicDataReader 인스턴스를 생성합니다.
-api = TransactionPrice(PUBLIC_DATA_API_KEY)
-print("✅ PublicDataReader 초기화 완료!")
+# PublicDataReader 인스턴스를 일일 한도/적응형 동시성 클라이언트로 감싸고, 다시 응답 캐시로 감쌉니다.
+# (캐시 히트는 일일 한도를 쓰지 않습니다. 백필은 월간 DAG보다 낮은 우선순위로 한도를 사용합니다.)
+client = ManagedTransactionPrice.from_env(TransactionPrice(PUBLIC_DATA_API_KEY), engine, DB_SCHEMA, priority=PRIORITY_BACKFILL)
+api = CachedTransactionPrice.from_env(client)
+print(f"✅ PublicDataReader 초기화 완료! (API 캐시: {api.mode}, {api.cache_dir} | 일일 한도: {client.quota.daily_limit}건)")
 
 print(">> 모든 초기 설정 완료. \n")
 
 
-def fetch_and_save_apt_trade_data(sigungu_code: str, year_month: str, district_name: str):
-    """지정된 지역과 연월의 '아파트 매매' 실거래가 데이터를 가져와 DB에 저장합니다."""
+# 거래 유형별로 데이터를 저장할 테이블 이름
+TABLE_NAME_MAP = {
+    "매매": "raw_apt_trade",
+    "전월세": "raw_apt_jeonse",
+}
+
+
+def fetch_and_save_apt_trade_data(sigungu_code: str, year_month: str, district_name: str, trade_type: str = "전월세"):
+    """지정된 지역과 연월의 아파트 실거래가 데이터를 가져와 DB에 저장합니다."""
     
-    # table_name = "raw_apt_trade"  # 매매 데이터를 저장할 테이블 이름
-    table_name = "raw_apt_jeonse" # 전월세 데이터를 저장할 테이블 이름
+    table_name = TABLE_NAME_MAP[trade_type]
     
     print(f"-> [{district_name}({sigungu_code}) / {year_month}] 데이터 수집 시도...")
+    started_at = time.monotonic()
     
     try:
         # TransactionPrice API를 사용하여 데이터 조회
         original_df = api.get_data(
             property_type="아파트",
-            trade_type="전월세", #전월세, 매매
+            trade_type=trade_type,
             sigungu_code=sigungu_code,
             year_month=year_month,
         )
 
         if original_df.empty:
+            with engine.begin() as connection:
+                record_partition(
+                    connection, DB_SCHEMA, trade_type, sigungu_code, year_month, "empty",
+                    duration_seconds=time.monotonic() - started_at,
+                )
             print(f"   INFO: 데이터 없음.")
             return
 
-        # PublicDataReader가 반환한 DataFrame을 순수 pandas DataFrame으로 변환합니다.
-        df = pd.DataFrame(original_df)
+        # PublicDataReader가 반환한 DataFrame을 순수 pandas DataFrame으로 변환하고 행 지문을 붙입니다.
+        df = add_row_fingerprint(pd.DataFrame(original_df), NATURAL_KEYS[trade_type])
         
-        with engine.connect() as connection:
-            df.to_sql(
-                name=table_name,
-                con=connection,  # engine이 아닌 connection을 전달
-                schema=DB_SCHEMA,
-                if_exists="append",
-                index=False
+        # 데이터 저장과 원장 기록을 하나의 트랜잭션으로 묶어, 둘 중 하나만 반영되는 일이 없도록 합니다.
+        # 이미 저장된 거래는 UNIQUE 인덱스에 걸려 건너뛰므로 같은 파티션을 다시 실행해도 중복되지 않습니다.
+        with engine.begin() as connection:
+            inserted = insert_new_rows(df, table_name, connection, DB_SCHEMA)  # engine이 아닌 connection을 전달
+            record_partition(
+                connection, DB_SCHEMA, trade_type, sigungu_code, year_month, "success",
+                row_count=len(df),
+                checksum=dataframe_checksum(df),
+                duration_seconds=time.monotonic() - started_at,
             )
-        print(f"   SUCCESS: {len(df)}건 저장 완료.")
+        print(f"   SUCCESS: {len(df)}건 중 신규 {inserted}건 저장 완료.")
 
+    except QuotaExceededError:
+        # 한도 초과는 파티션의 실패가 아니므로 원장에 남기지 않고 백필 전체를 멈춥니다.
+        raise
     except Exception as e:
-        # 특정 요청에서 에러가 발생하더라도 전체 스크립트가 멈추지 않도록 처리
+        # 특정 요청에서 에러가 발생하더라도 전체 스크립트가 멈추지 않도록 처리하되, 실패 사실은 원장에 남깁니다.
         print(f"   ERROR: 데이터 처리 중 오류 발생: {e}")
+        record_failure(trade_type, sigungu_code, year_month, e, time.monotonic() - started_at)
+
+
+def record_failure(trade_type: str, sigungu_code: str, year_month: str, error: Exception, duration_seconds: float):
+    """실패한 파티션을 원장에 'failed' 상태로 기록합니다. (--resume 실행 시 재시도 대상)"""
+    try:
+        with engine.begin() as connection:
+            record_partition_failure(
+                connection, DB_SCHEMA, trade_type, sigungu_code, year_month,
+                last_error=error,
+                duration_seconds=duration_seconds,
+            )
+    except Exception as ledger_error:
+        print(f"   ERROR: 원장 기록 중 오류 발생: {ledger_error}")
+
+
+def generate_year_months(start: str, end: str):
+    """'YYYYMM' 형식의 시작/종료 월 사이의 모든 월을 순서대로 반환합니다."""
+    year, month = int(start[:4]), int(start[4:])
+    end_year, end_month = int(end[:4]), int(end[4:])
+
+    year_months = []
+    while (year, month) <= (end_year, end_month):
+        year_months.append(f"{year}{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return year_months
+
+
+def fetch_partition(sigungu_code: str, year_month: str, trade_type: str, limiter: RateLimiter):
+    """
+    (자치구, 월) 파티션 하나를 API로부터 가져옵니다. DB 저장은 하지 않습니다.
+    전역 RateLimiter를 거쳐 호출하므로 워커 수와 관계없이 초당 요청 수가 제한되고,
+    API 클라이언트의 적응형 동시성 제한으로 오류/지연이 생기면 동시 호출 수가 줄어듭니다.
+
+    Returns:
+        tuple: (DataFrame, 소요 시간(초))
+    """
+    limiter.acquire()
+    started_at = time.monotonic()
+    original_df = api.get_data(
+        property_type="아파트",
+        trade_type=trade_type,
+        sigungu_code=sigungu_code,
+        year_month=year_month,
+    )
+    duration = time.monotonic() - started_at
+    if original_df is None or original_df.empty:
+        return pd.DataFrame(), duration
+    # 행 지문은 응답 단위로 계산해야 응답 내 중복 거래의 순번이 안정적으로 유지됩니다.
+    return add_row_fingerprint(pd.DataFrame(original_df), NATURAL_KEYS[trade_type]), duration
+
+
+def write_batches(write_queue: queue.Queue, trade_type: str, batch_rows: int, stats: dict, stats_lock: threading.Lock):
+    """
+    Writer 스테이지: 큐로 들어오는 (파티션, DataFrame, 소요 시간)을 batch_rows 건 이상 모아서 한 번에 저장합니다.
+    배치에 포함된 파티션들은 데이터와 같은 트랜잭션 안에서 원장에 'success'로 기록됩니다.
+    큐에서 None을 받으면 남은 데이터를 저장하고 종료합니다.
+    stats는 수집(메인) 스레드와 함께 갱신하므로 stats_lock을 잡고 갱신합니다.
+    """
+    table_name = TABLE_NAME_MAP[trade_type]
+    buffer = []
+    buffered_rows = 0
+
+    def flush():
+        nonlocal buffer, buffered_rows
+        if not buffer:
+            return
+        batch_df = pd.concat([df for _, df, _ in buffer], ignore_index=True)
+        flush_started_at = time.monotonic()
+        try:
+            with engine.begin() as connection:
+                inserted = insert_new_rows(batch_df, table_name, connection, DB_SCHEMA)
+                for (code, ym), df, duration in buffer:
+                    record_partition(
+                        connection, DB_SCHEMA, trade_type, code, ym, "success",
+                        row_count=len(df),
+                        checksum=dataframe_checksum(df),
+                        duration_seconds=duration,
+                    )
+            with stats_lock:
+                stats["rows_written"] += inserted
+                stats["batches_written"] += 1
+                stats["write_seconds"] += time.monotonic() - flush_started_at
+        except Exception as e:
+            # 배치 전체가 롤백되었으므로, 포함된 파티션을 모두 실패로 기록해 다음 --resume 때 재시도합니다.
+            print(f"   ERROR: 배치 저장 중 오류 발생 ({len(buffer)}개 파티션): {e}")
+            with stats_lock:
+                stats["partitions_failed"] += len(buffer)
+            for (code, ym), _, duration in buffer:
+                record_failure(trade_type, code, ym, e, duration)
+        buffer, buffered_rows = [], 0
+
+    while True:
+        item = write_queue.get()
+        if item is None:
+            flush()
+            break
+        buffer.append(item)
+        buffered_rows += len(item[1])
+        if buffered_rows >= batch_rows:
+            flush()
+
+
+def print_throughput(stats: dict, total_partitions: int, started_at: float, final: bool = False):
+    """현재까지의 처리량(파티션/초, 건/초)을 출력합니다. (stats는 호출하는 쪽에서 복사해 넘깁니다)"""
+    elapsed = max(time.monotonic() - started_at, 1e-9)
+    label = "[처리량 요약]" if final else "[진행]"
+    print(
+        f">> {label} 파티션 {stats['partitions_done']}/{total_partitions} "
+        f"(실패 {stats['partitions_failed']}) | 수집 {stats['rows_fetched']:,}건, 저장 {stats['rows_written']:,}건 | "
+        f"경과 {elapsed:,.1f}초 | {stats['partitions_done'] / elapsed:.2f} 파티션/초, "
+        f"{stats['rows_fetched'] / elapsed:,.1f} 건/초"
+    )
+
+
+def run_concurrent_backfill(
+    year_months: list,
+    sigungu_codes: dict,
+    trade_type: str = "전월세",
+    workers: int = 8,
+    requests_per_second: float = 10.0,
+    batch_rows: int = 50000,
+    report_every: int = 100,
+    completed: set = None,
+):
+    """
+    (자치구, 월) 파티션을 워커 풀로 동시에 수집하고, 별도의 Writer 스레드가 모아서 저장합니다.
+
+    Args:
+        year_months (list): 'YYYYMM' 문자열 리스트
+        sigungu_codes (dict): {'서울특별시 종로구': '11110', ...} 형태의 딕셔너리 (get_sigungu_codes)
+        trade_type (str): '매매' 또는 '전월세'
+        workers (int): 동시에 API를 호출할 워커 스레드 수 (적응형 동시 호출 한도의 상한)
+        requests_per_second (float): 전체 워커가 공유하는 초당 최대 요청 수 (0 이하이면 무제한)
+        batch_rows (int): Writer가 한 번에 저장할 최소 행 수
+        report_every (int): 몇 개 파티션마다 처리량을 출력할지
+        completed (set): 건너뛸 (시군구코드, 연월) 파티션 집합 (--resume 모드)
+
+    Returns:
+        dict: 처리 통계 (파티션 수, 수집/저장 건수, 경과 시간 등)
+    """
+    completed = completed or set()
+    partitions = [
+        (district, code, ym)
+        for ym in year_months
+        for district, code in sigungu_codes.items()
+        if (code, ym) not in completed
+    ]
+    limiter = RateLimiter(requests_per_second, burst=workers)
+    client.concurrency = AdaptiveConcurrency(workers)
+    # 수집 속도가 저장 속도보다 빠를 때 메모리가 무한정 늘어나지 않도록 큐 크기를 제한합니다.
+    write_queue = queue.Queue(maxsize=workers * 4)
+    stats = {
+        "partitions_done": 0,
+        "partitions_failed": 0,
+        "rows_fetched": 0,
+        "rows_written": 0,
+        "batches_written": 0,
+        "partitions_skipped": 0,
+        "write_seconds": 0.0,
+    }
+    # Writer 스레드도 partitions_failed 등을 갱신하므로 모든 갱신은 이 잠금 안에서 합니다.
+    stats_lock = threading.Lock()
+
+    print(f">> [동시 수집] 파티션 {len(partitions)}개, 워커 {workers}개, 초당 최대 {requests_per_second}건 요청")
+    started_at = time.monotonic()
+
+    writer = threading.Thread(
+        target=write_batches,
+        args=(write_queue, trade_type, batch_rows, stats, stats_lock),
+        name="backfill-writer",
+        daemon=True,
+    )
+    writer.start()
+
+    try:
+        with track_stage("fetch_partitions", rows_in=len(partitions)) as stage, ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(fetch_partition, code, ym, trade_type, limiter): (district, code, ym)
+                for district, code, ym in partitions
+            }
+            for future in as_completed(futures):
+                district, code, ym = futures[future]
+                if future.cancelled():
+                    with stats_lock:
+                        stats["partitions_skipped"] += 1
+                    continue
+                try:
+                    df, duration = future.result()
+                except QuotaExceededError as e:
+                    # 남은 파티션은 원장에 기록되지 않으므로 한도가 초기화된 뒤 --resume으로 이어서 수집합니다.
+                    if not stats["partitions_skipped"]:
+                        print(f"   WARN: {e} 남은 파티션은 취소합니다. (--resume으로 이어서 수집)")
+                        for pending in futures:
+                            pending.cancel()
+                    with stats_lock:
+                        stats["partitions_skipped"] += 1
+                    continue
+                except Exception as e:
+                    with stats_lock:
+                        stats["partitions_failed"] += 1
+                    print(f"   ERROR: [{district}({code}) / {ym}] 수집 중 오류 발생: {e}")
+                    record_failure(trade_type, code, ym, e, 0.0)
+                else:
+                    if df.empty:
+                        with engine.begin() as connection:
+                            record_partition(
+                                connection, DB_SCHEMA, trade_type, code, ym, "empty",
+                                duration_seconds=duration,
+                            )
+                    else:
+                        with stats_lock:
+                            stats["rows_fetched"] += len(df)
+                        write_queue.put(((code, ym), df, duration))
+
+                with stats_lock:
+                    stats["partitions_done"] += 1
+                    snapshot = dict(stats)
+                if snapshot["partitions_done"] % report_every == 0:
+                    print_throughput(snapshot, len(partitions), started_at)
+            stage["rows_out"] = stats["rows_fetched"]
+    finally:
+        write_queue.put(None)
+        writer.join()
+        # Writer 스레드의 저장 시간은 수집과 겹치므로 별도 단계로 기록합니다.
+        run = current_run()
+        if run is not None:
+            run.record_stage("write_batches", stats["write_seconds"], rows_in=stats["rows_fetched"], rows_out=stats["rows_written"])
+
+    stats["elapsed_seconds"] = time.monotonic() - started_at
+    print_throughput(stats, len(partitions), started_at, final=True)
+    concurrency = client.concurrency
+    print(
+        f">> [동시성] 최종 동시 호출 한도 {concurrency.limit:.1f}/{concurrency.max_limit} | "
+        f"성공 {concurrency.stats['success']}건, 실패/지연 {concurrency.stats['failure']}건, 감소 {concurrency.stats['decreases']}회"
+        + (f" | 한도 초과로 건너뛴 파티션 {stats['partitions_skipped']}개" if stats["partitions_skipped"] else "")
+    )
+    return stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="과거 아파트 실거래가 데이터 대량 적재(Backfill)")
+    parser.add_argument("--trade-type", choices=list(TABLE_NAME_MAP), default="전월세", help="수집할 거래 유형")
+    parser.add_argument("--start", default="201101", help="수집 시작 월 (YYYYMM)")
+    parser.add_argument("--end", default="202507", help="수집 종료 월 (YYYYMM)")
+    parser.add_argument("--sido", nargs="*", default=None, help="수집할 시도 이름 (예: 서울특별시 경기도). 지정하지 않으면 전국")
+    parser.add_argument("--concurrent", action="store_true", help="워커 풀을 사용한 동시 수집 모드")
+    parser.add_argument("--workers", type=int, default=8, help="동시 수집 워커 수")
+    parser.add_argument("--rps", type=float, default=10.0, help="전체 초당 최대 API 요청 수 (0 이하이면 무제한)")
+    parser.add_argument("--batch-rows", type=int, default=50000, help="Writer가 한 번에 저장할 최소 행 수")
+    parser.add_argument("--resume", action="store_true", help="원장 기준으로 완료된 파티션은 건너뛰고 실패/누락 파티션만 수집")
+    parser.add_argument("--cache-mode", choices=CACHE_MODES, default=None, help="API 응답 캐시 모드 (기본값: API_CACHE_MODE 환경 변수 또는 default)")
+    return parser.parse_args()
 
 
-# --- 테스트를 위해 함수를 한번 직접 호출해봅시다 ---
 if __name__ == "__main__":
-    
+    args = parse_args()
+    if args.cache_mode:
+        api.mode = args.cache_mode
+
     # 1. 수집할 기간과 지역 목록을 정의합니다.
-    start_year, start_month = 2011, 1
-    end_year, end_month = 2025, 7
-    
-    seoul_codes = get_seoul_sigungu_codes()
-    
+    year_months = generate_year_months(args.start, args.end)
+    # DAG의 sido_names 파라미터와 같이, 시도를 지정하지 않으면 전국 시군구를 수집합니다.
+    sigungu_codes = get_sigungu_codes(args.sido or None)
+
     print("--- 과거 데이터 대량 적재(Backfill) 시작 ---")
-    print(f"수집 기간: {start_year}-{start_month:02d} ~ {end_year}-{end_month:02d}")
-    print(f"수집 대상: 서울시 {len(seoul_codes)}개 자치구")
-    
-    # 2. 월별로 순회하는 루프를 만듭니다.
-    for year in range(start_year, end_year + 1):
-        # 시작 연도는 지정된 월부터, 그 외 연도는 1월부터 시작
-        s_month = start_month if year == start_year else 1
-        # 종료 연도는 지정된 월까지, 그 외 연도는 12월까지
-        e_month = end_month if year == end_year else 12
-
-        for month in range(s_month, e_month + 1):
-            year_month_str = f"{year}{month:02d}"
-            
-            # 3. 각 월마다 모든 지역을 순회합니다.
-            for district, code in seoul_codes.items():
-                fetch_and_save_apt_trade_data(
-                    sigungu_code=code,
-                    year_month=year_month_str,
-                    district_name=district
-                )
+    print(f"수집 기간: {year_months[0]} ~ {year_months[-1]} ({args.trade_type})")
+    print(f"수집 대상: {', '.join(args.sido) if args.sido else '전국'} 시군구 {len(sigungu_codes)}개")
+
+    ensure_ledger_table(engine, DB_SCHEMA)
+    completed = set()
+    if args.resume:
+        completed = get_completed_partitions(engine, DB_SCHEMA, args.trade_type)
+        print(f">> [재개 모드] 원장에 완료로 기록된 파티션 {len(completed)}개는 건너뜁니다.")
+
+    # 단계별 실행 시간과 시군구별 API 지연 시간을 실행 리포트(JSON)와 Prometheus 지표로 저장합니다.
+    start_run("backfill", trade_type=args.trade_type, start=args.start, end=args.end, sido=",".join(args.sido) if args.sido else "전국",
+              concurrent=args.concurrent, workers=args.workers)
+    try:
+        if args.concurrent:
+            run_concurrent_backfill(
+                year_months,
+                sigungu_codes,
+                completed=completed,
+                trade_type=args.trade_type,
+                workers=args.workers,
+                requests_per_second=args.rps,
+                batch_rows=args.batch_rows,
+            )
+        else:
+            # 2. 월별로 순회하면서 각 월마다 모든 지역을 순회합니다.
+            with track_stage("sequential_backfill"):
+                for year_month_str in year_months:
+                    for district, code in sigungu_codes.items():
+                        if (code, year_month_str) in completed:
+                            continue
+                        fetch_and_save_apt_trade_data(
+                            sigungu_code=code,
+                            year_month=year_month_str,
+                            district_name=district,
+                            trade_type=args.trade_type,
+                        )
+    except QuotaExceededError as e:
+        print(f"   WARN: {e} 수집을 멈춥니다. (--resume으로 이어서 수집)")
+    except BaseException as e:
+        finish_run("failed", e)
+        raise
+    finish_run()
     
+    print(f">> [API 캐시] 적중 {api.stats['hits']}건, 미스 {api.stats['misses']}건, 만료 {api.stats['stale']}건, 삭제 {api.stats['evicted']}건")
+    print(f">> [API 한도] 오늘 '아파트/{args.trade_type}' 호출 {client.quota.usage(f'아파트/{args.trade_type}')}/{client.quota.daily_limit}건")
     print("\n--- 모든 데이터 적재 완료 ---")
-
@@ -0,0 +1,133 @@
+import os
+import sys
+import argparse
+import json
+import platform
+import time
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import pandas as pd
+from sqlalchemy import create_engine
+
+from utils.complex_index import ensure_complex_tables
+from utils.run_metrics import start_run
+from benchmark_features import load_synthetic_raw_tables
+from build_features import (
+    BACKENDS,
+    FEATURE_TABLES,
+    GAP_ANALYSIS_MIN_YEAR,
+    compute_features,
+    compute_features_duckdb,
+    frames_identical,
+    frames_match,
+)
+
+DEFAULT_REPORT_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'benchmarks', 'backend_benchmark.json')
+
+
+def run_backend(backend, engine, schema, raw_parquet=None):
+    """
+    백엔드 하나로 전체 피처를 계산하고 단계별 실행 시간을 측정합니다.
+
+    Returns:
+        tuple: (FEATURE_TABLES 순서의 DataFrame 목록, 전체 실행 시간(초), 단계별 측정 결과 list)
+    """
+    metrics = start_run("benchmark_backends", backend=backend)
+    started_at = time.perf_counter()
+    if backend == "duckdb":
+        results = compute_features_duckdb(engine, schema, GAP_ANALYSIS_MIN_YEAR, raw_parquet)
+    else:
+        results = compute_features(engine, schema, None, GAP_ANALYSIS_MIN_YEAR)
+    return results, round(time.perf_counter() - started_at, 3), metrics.stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 데이터로 pandas/DuckDB 피처 빌드 백엔드의 성능과 결과를 비교합니다.")
+    parser.add_argument("--rows", type=int, default=100_000, help="매매 합성 데이터 건수")
+    parser.add_argument("--rent-rows", type=int, default=None, help="전월세 합성 데이터 건수 (기본값: --rows와 동일)")
+    parser.add_argument("--complexes", type=int, default=None, help="아파트 단지 수 (기본값: 건수에 비례)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS), help="비교할 백엔드 (첫 번째가 기준)")
+    parser.add_argument("--repeat", type=int, default=2, help="백엔드별 반복 횟수 (가장 빠른 실행을 기록, 첫 실행은 단지/평형 ID 등록 포함)")
+    parser.add_argument("--raw-parquet", default=None, help="duckdb 백엔드에서 DB 대신 스캔할 원시 테이블 Parquet 디렉터리")
+    parser.add_argument("--database-url", default="sqlite://", help="벤치마크용 DB (기본값: 인메모리 SQLite, PostgreSQL이면 COPY로 읽음)")
+    parser.add_argument("--skip-load", action="store_true", help="합성 데이터를 적재하지 않고 DB의 원시 테이블을 그대로 사용")
+    parser.add_argument("--output", default=DEFAULT_REPORT_PATH, help="JSON 리포트 저장 경로")
+    args = parser.parse_args()
+
+    rent_rows = args.rent_rows if args.rent_rows is not None else args.rows
+    n_complexes = args.complexes or max(max(args.rows, rent_rows) // 300, 200)
+
+    engine = create_engine(args.database_url)
+    schema = "main" if engine.dialect.name == "sqlite" else os.getenv("DB_SCHEMA", "public")
+    print(f"--- 피처 빌드 백엔드 비교 ({engine.dialect.name}, 백엔드 {args.backends}) ---")
+    if not args.skip_load:
+        load_synthetic_raw_tables(engine, schema, args.rows, rent_rows, n_complexes, 1_000_000, args.seed)
+    ensure_complex_tables(engine, schema)
+
+    runs, outputs = [], {}
+    for backend in args.backends:
+        best = None
+        for attempt in range(max(args.repeat, 1)):
+            print(f"\n>> [{backend}] {attempt + 1}/{args.repeat}회 실행")
+            results, seconds, stages = run_backend(backend, engine, schema, args.raw_parquet)
+            if best is None or seconds < best["seconds"]:
+                best = {"backend": backend, "seconds": seconds, "stages": stages}
+        outputs[backend] = results
+        runs.append(best)
+
+    # 첫 번째 백엔드의 결과를 기준으로 저장 값이 같은지 확인합니다.
+    # Parquet 원본은 DB와 행 순서가 달라 평균의 합산 순서가 바뀌므로 부동소수점 오차를 허용합니다.
+    baseline = args.backends[0]
+    compare = frames_identical if args.raw_parquet is None else frames_match
+    mismatches = {
+        backend: [name for name, a, b in zip(FEATURE_TABLES, outputs[baseline], results) if not compare(a, b)]
+        for backend, results in outputs.items() if backend != baseline
+    }
+
+    print("\n--- 백엔드별 단계 측정 결과 ---")
+    for run in runs:
+        print(f"[{run['backend']}]")
+        for stage in run["stages"]:
+            peak = f"{stage['peak_rss_mb']:>10,.1f} MB" if stage["peak_rss_mb"] is not None else f"{'-':>13}"
+            print(f"   {stage['stage']:<24} {stage['seconds']:>9.2f}초 | 최대 RSS {peak} | {stage.get('rows_out') or 0:>12,}건")
+
+    print("\n--- 전체 실행 시간 비교 ---")
+    base_seconds = runs[0]["seconds"]
+    for run in runs:
+        speedup = base_seconds / run["seconds"] if run["seconds"] else float("nan")
+        result = "기준" if run["backend"] == baseline else ("결과 일치" if not mismatches[run["backend"]] else f"결과 다름 {mismatches[run['backend']]}")
+        print(f"   {run['backend']:<8} {run['seconds']:>9.2f}초 ({speedup:.2f}배) | {result}")
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "trade_rows": None if args.skip_load else args.rows,
+            "rent_rows": None if args.skip_load else rent_rows,
+            "complexes": None if args.skip_load else n_complexes,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "raw_parquet": args.raw_parquet,
+            "dialect": engine.dialect.name,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "runs": runs,
+        "mismatches": mismatches,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✅ 리포트 저장 완료: {args.output}")
+
+    if any(mismatches.values()):
+        print("❌ 백엔드 간 결과가 다릅니다.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import argparse
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+from utils.bulk_load import bulk_load
+
+BENCH_TABLE = "bench_bulk_load"
+
+
+def make_sample_frame(rows: int) -> pd.DataFrame:
+    """raw_apt_trade와 비슷한 모양의 벤치마크용 DataFrame을 만듭니다."""
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        "sggCd": rng.choice(["11110", "11680", "11650", "11710"], size=rows),
+        "umdNm": rng.choice(["청운동", "역삼동", "서초동", "잠실동"], size=rows),
+        "aptNm": [f"아파트{i % 500}" for i in range(rows)],
+        "jibun": [f"{i % 900}-{i % 7}" for i in range(rows)],
+        "excluUseAr": rng.uniform(20, 200, size=rows).round(2),
+        "dealYear": rng.integers(2011, 2026, size=rows),
+        "dealMonth": rng.integers(1, 13, size=rows),
+        "dealDay": rng.integers(1, 29, size=rows),
+        "dealAmount": [f"{v:,}" for v in rng.integers(10000, 300000, size=rows)],
+        "floor": rng.integers(1, 40, size=rows),
+    })
+
+
+def run_case(name: str, engine, schema: str, load):
+    """테이블을 비운 뒤 load()를 실행하고 처리 속도를 측정합니다."""
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP TABLE IF EXISTS {schema}."{BENCH_TABLE}"'))
+
+    started_at = time.perf_counter()
+    rows = load()
+    elapsed = time.perf_counter() - started_at
+    print(f"   {name:<24} {rows:>10,}건 | {elapsed:>8.2f}초 | {rows / elapsed:>12,.0f} 건/초")
+    return rows / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="to_sql 기본 방식과 COPY 대량 적재의 처리 속도를 비교합니다.")
+    parser.add_argument("--rows", type=int, default=200_000, help="적재할 행 수")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="COPY 한 번에 보낼 행 수")
+    parser.add_argument("--database-url", default=None, help="대상 DB URL (기본값: DATABASE_URL_HOST 환경 변수)")
+    args = parser.parse_args()
+
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
+    database_url = args.database_url or os.getenv("DATABASE_URL_HOST")
+    if not database_url:
+        raise ValueError("--database-url 또는 DATABASE_URL_HOST 환경 변수가 필요합니다.")
+    schema = os.getenv("DB_SCHEMA", "public")
+    engine = create_engine(database_url)
+
+    df = make_sample_frame(args.rows)
+    print(f"--- 대량 적재 벤치마크 ({engine.dialect.name}, {len(df):,}건) ---")
+
+    def load_to_sql():
+        df.to_sql(BENCH_TABLE, engine, schema=schema, if_exists="append", index=False)
+        return len(df)
+
+    def load_bulk():
+        return bulk_load(df, BENCH_TABLE, engine, schema, chunk_size=args.chunk_size)
+
+    baseline = run_case("to_sql (기본)", engine, schema, load_to_sql)
+    bulk = run_case(f"bulk_load (chunk={args.chunk_size:,})", engine, schema, load_bulk)
+    print(f">> bulk_load 속도: 기본 대비 {bulk / baseline:.1f}배")
+
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP TABLE IF EXISTS {schema}."{BENCH_TABLE}"'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import os
+import sys
+import argparse
+import json
+import platform
+import resource
+import time
+import tracemalloc
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import pandas as pd
+from sqlalchemy import create_engine
+
+from utils.bulk_load import bulk_load
+from utils.complex_index import ensure_complex_tables
+from utils.feature_schema import print_memory_report
+from utils.normalize import normalize_raw
+from utils.run_metrics import read_peak_rss_mb, reset_peak_rss
+from utils.synthetic_molit import iter_synthetic_rows
+from build_features import (
+    analyze_gap_investment,
+    analyze_jeonse_ratio,
+    analyze_price_index,
+    process_rent_data,
+    process_trade_data,
+    save_to_db,
+)
+
+DEFAULT_REPORT_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'benchmarks', 'feature_benchmark.json')
+
+
+def load_synthetic_raw_tables(engine, schema, trade_rows, rent_rows, n_complexes, chunk_rows, seed):
+    """합성 매매/전월세 데이터를 (적재 시점과 같이 타입 컬럼을 붙여) raw_apt_trade, raw_apt_jeonse 테이블에 청크 단위로 적재합니다."""
+    for kind, table_name, n_rows in (("매매", "raw_apt_trade", trade_rows), ("전월세", "raw_apt_jeonse", rent_rows)):
+        if_exists = "replace"
+        for chunk in iter_synthetic_rows(kind, n_rows, chunk_rows=chunk_rows, n_complexes=n_complexes, seed=seed):
+            bulk_load(normalize_raw(chunk, kind), table_name, engine, schema, if_exists=if_exists)
+            if_exists = "append"
+        print(f">> '{table_name}' 합성 데이터 {n_rows:,}건 적재 완료.")
+
+
+# 메모리 측정 방식
+#   rss        : 단계별 프로세스 최대 RSS (리눅스 /proc, 측정 비용 거의 없음)
+#   tracemalloc: 파이썬 힙 최대 사용량 (할당 추적 비용 때문에 실행 시간이 크게 늘어납니다)
+#   off        : 시간만 측정
+MEMORY_MODES = ("rss", "tracemalloc", "off")
+
+
+def run_stage(name, func, *args, memory="rss"):
+    """
+    단계 하나를 실행하고 실행 시간(초)과 최대 메모리 사용량(MB)을 측정합니다.
+
+    Returns:
+        tuple: (함수 반환값, 측정 결과 dict)
+    """
+    if memory == "rss" and not reset_peak_rss():
+        memory = "off"
+    if memory == "tracemalloc":
+        tracemalloc.start()
+    started_at = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started_at
+    peak_mb = None
+    if memory == "tracemalloc":
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = round(peak / 1024 ** 2, 1)
+    elif memory == "rss":
+        peak_mb = read_peak_rss_mb()
+    return result, {"stage": name, "seconds": round(elapsed, 3), "peak_mb": peak_mb, "memory": memory}
+
+
+def compare_with_baseline(report, baseline_path, tolerance):
+    """이전 리포트와 단계별 실행 시간을 비교해 tolerance 이상 느려진 단계를 반환합니다."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {stage["stage"]: stage for stage in json.load(f)["stages"]}
+
+    regressions = []
+    print(f"\n--- 기준 리포트와 비교 ({baseline_path}) ---")
+    for stage in report["stages"]:
+        before = baseline.get(stage["stage"])
+        if not before or not before["seconds"]:
+            continue
+        ratio = stage["seconds"] / before["seconds"]
+        flag = "⚠️ " if ratio > 1 + tolerance else "  "
+        print(f"{flag} {stage['stage']:<24} {before['seconds']:>9.2f}초 -> {stage['seconds']:>9.2f}초 ({ratio:.2f}배)")
+        if ratio > 1 + tolerance:
+            regressions.append(stage["stage"])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 데이터로 피처 파이프라인 단계별 성능을 측정합니다.")
+    parser.add_argument("--rows", type=int, default=100_000, help="매매 합성 데이터 건수 (예: 100000, 1000000, 10000000)")
+    parser.add_argument("--rent-rows", type=int, default=None, help="전월세 합성 데이터 건수 (기본값: --rows와 동일)")
+    parser.add_argument("--complexes", type=int, default=None, help="아파트 단지 수 (기본값: 건수에 비례)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunksize", type=int, default=None, help="process_* 단계에 전달할 chunksize")
+    parser.add_argument("--database-url", default="sqlite://", help="벤치마크용 DB (기본값: 인메모리 SQLite)")
+    parser.add_argument("--memory", choices=MEMORY_MODES, default="rss", help="메모리 측정 방식")
+    parser.add_argument("--output", default=DEFAULT_REPORT_PATH, help="JSON 리포트 저장 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 이전 JSON 리포트 경로")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="기준 대비 허용하는 실행 시간 증가율")
+    args = parser.parse_args()
+
+    rent_rows = args.rent_rows if args.rent_rows is not None else args.rows
+    n_complexes = args.complexes or max(max(args.rows, rent_rows) // 300, 200)
+
+    engine = create_engine(args.database_url)
+    schema = "main" if engine.dialect.name == "sqlite" else os.getenv("DB_SCHEMA", "public")
+    print(f"--- 피처 파이프라인 벤치마크 ({engine.dialect.name}, 매매 {args.rows:,}건, 전월세 {rent_rows:,}건, 단지 {n_complexes:,}개) ---")
+
+    stages = []
+    _, measured = run_stage(
+        "load_synthetic_raw", load_synthetic_raw_tables,
+        engine, schema, args.rows, rent_rows, n_complexes, 1_000_000, args.seed,
+        memory="off",
+    )
+    stages.append({**measured, "rows": args.rows + rent_rows})
+    ensure_complex_tables(engine, schema)
+
+    df_trade, measured = run_stage("process_trade_data", process_trade_data, engine, schema, None, args.chunksize, memory=args.memory)
+    stages.append({**measured, "rows": len(df_trade)})
+
+    (df_jeonse, df_wolse), measured = run_stage("process_rent_data", process_rent_data, engine, schema, None, args.chunksize, memory=args.memory)
+    stages.append({**measured, "rows": len(df_jeonse) + len(df_wolse)})
+
+    df_gap, measured = run_stage("analyze_gap_investment", analyze_gap_investment, df_trade, df_jeonse, memory=args.memory)
+    stages.append({**measured, "rows": len(df_gap)})
+
+    df_index, measured = run_stage("analyze_price_index", analyze_price_index, df_trade, memory=args.memory)
+    stages.append({**measured, "rows": len(df_index)})
+
+    df_ratio, measured = run_stage("analyze_jeonse_ratio", analyze_jeonse_ratio, df_trade, df_jeonse, memory=args.memory)
+    stages.append({**measured, "rows": len(df_ratio)})
+
+    frames = {
+        "feature_apt_trade": df_trade,
+        "feature_apt_jeonse": df_jeonse,
+        "feature_apt_wolse": df_wolse,
+        "analytics_gap_investment": df_gap,
+        "analytics_price_index": df_index,
+        "analytics_jeonse_ratio": df_ratio,
+    }
+
+    def save_all():
+        for table_name, df in frames.items():
+            save_to_db(df, table_name, engine, schema)
+
+    _, measured = run_stage("save_to_db", save_all, memory=args.memory)
+    stages.append({**measured, "rows": sum(len(df) for df in frames.values())})
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "trade_rows": args.rows,
+            "rent_rows": rent_rows,
+            "complexes": n_complexes,
+            "seed": args.seed,
+            "chunksize": args.chunksize,
+            "dialect": engine.dialect.name,
+            "memory": args.memory,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": stages,
+        # 피처 DataFrame별 메모리 사용량 (기존 타입 대비)
+        "frames": print_memory_report(frames).to_dict(orient="records"),
+        "total_seconds": round(sum(stage["seconds"] for stage in stages if stage["stage"] != "load_synthetic_raw"), 3),
+        # 리눅스에서 ru_maxrss 단위는 KB입니다.
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+    print("\n--- 단계별 측정 결과 ---")
+    for stage in stages:
+        peak = f"{stage['peak_mb']:>10,.1f} MB" if stage["peak_mb"] is not None else f"{'-':>13}"
+        print(f"   {stage['stage']:<24} {stage['seconds']:>9.2f}초 | 최대 메모리 {peak} | {stage.get('rows', 0):>12,}건")
+    print(f">> 전체 {report['total_seconds']:.2f}초 (합성 데이터 적재 제외) | 최대 RSS {report['max_rss_mb']:,.1f} MB")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✅ 리포트 저장 완료: {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(report, args.baseline, args.tolerance)
+        if regressions:
+            print(f"❌ 기준 대비 {args.tolerance:.0%} 이상 느려진 단계: {regressions}")
+            sys.exit(1)
+        print("✅ 기준 대비 성능 저하 없음.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import argparse
+import time
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import numpy as np
+import pandas as pd
+
+from utils.interval_join import has_covering_interval
+
+APARTMENT_KEY = ['시군구명', '읍면동명', '지번', '아파트명', '전용면적(㎡)', '층']
+
+
+def make_frames(n_sales: int, n_leases: int, n_keys: int, seed: int = 42):
+    """
+    같은 단지/면적/층에 전세 계약이 몰리는 상황을 흉내 낸 매매/전세 DataFrame을 만듭니다.
+    key 분포를 치우치게(순위의 역수에 비례) 만들어 대단지에서 병합 결과가 폭증하는 경우를 재현합니다.
+    """
+    rng = np.random.default_rng(seed)
+    keys = pd.DataFrame({
+        '시군구명': rng.choice(['강남구', '서초구', '송파구'], size=n_keys),
+        '읍면동명': rng.choice(['역삼동', '서초동', '잠실동'], size=n_keys),
+        '지번': [str(i) for i in range(n_keys)],
+        '아파트명': [f'아파트{i % 50}' for i in range(n_keys)],
+        '전용면적(㎡)': rng.choice([59.97, 84.9, 114.5], size=n_keys),
+        '층': rng.integers(1, 30, size=n_keys).astype(float),
+    })
+
+    weights = 1.0 / (np.arange(n_keys) + 50)
+    weights /= weights.sum()
+
+    def pick(n):
+        idx = rng.choice(n_keys, size=n, p=weights)
+        return keys.iloc[idx].reset_index(drop=True)
+
+    sales = pick(n_sales)
+    sales['거래일자'] = pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 1200, size=n_sales), unit='D')
+
+    leases = pick(n_leases)
+    start = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 1500, size=n_leases), unit='D')
+    leases['계약시작일'] = start
+    leases['계약종료일'] = start + pd.to_timedelta(730, unit='D')
+    return sales, leases
+
+
+def merge_then_filter(sales, leases):
+    """기존 방식: key로 병합한 뒤 계약 기간 조건으로 거릅니다."""
+    sales = sales.copy()
+    sales['매매ID'] = range(len(sales))
+    merged = pd.merge(sales, leases[APARTMENT_KEY + ['계약시작일', '계약종료일']], on=APARTMENT_KEY, how='inner')
+    mask = (merged['거래일자'] >= merged['계약시작일']) & (merged['거래일자'] <= merged['계약종료일'])
+    flags = np.zeros(len(sales), dtype=bool)
+    flags[merged.loc[mask, '매매ID'].unique()] = True
+    return flags, len(merged)
+
+
+def interval_join(sales, leases):
+    """새 방식: 정렬 + 이진 탐색 구간 조인."""
+    return has_covering_interval(sales, leases, APARTMENT_KEY, '거래일자', '계약시작일', '계약종료일'), None
+
+
+def measure(func, *args):
+    """함수의 실행 시간(초)과 파이썬 힙 최대 사용량(MB)을 측정합니다."""
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started_at
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="갭투자 분석의 병합 후 필터링 방식과 구간 조인 방식을 비교합니다.")
+    parser.add_argument("--sales", type=int, default=100_000, help="매매 건수")
+    parser.add_argument("--leases", type=int, default=300_000, help="전세 계약 건수")
+    parser.add_argument("--keys", type=int, default=20_000, help="서로 다른 아파트 key 수")
+    args = parser.parse_args()
+
+    sales, leases = make_frames(args.sales, args.leases, args.keys)
+    print(f"--- 갭투자 조인 벤치마크 (매매 {len(sales):,}건, 전세 {len(leases):,}건, key {args.keys:,}개) ---")
+
+    (old_flags, merged_rows), old_time, old_peak = measure(merge_then_filter, sales, leases)
+    (new_flags, _), new_time, new_peak = measure(interval_join, sales, leases)
+
+    print(f"   병합 후 필터링: {old_time:>8.2f}초 | 최대 메모리 {old_peak:>10,.1f} MB | 중간 병합 결과 {merged_rows:,}건")
+    print(f"   구간 조인     : {new_time:>8.2f}초 | 최대 메모리 {new_peak:>10,.1f} MB")
+    print(f">> 시간 {old_time / new_time:.1f}배, 메모리 {old_peak / new_peak:.1f}배 감소 | 갭투자 {new_flags.sum():,}건")
+
+    if not np.array_equal(old_flags, new_flags):
+        raise AssertionError("두 방식의 갭투자 판정 결과가 다릅니다.")
+    print("✅ 두 방식의 결과가 일치합니다.")
+
+
+if __name__ == "__main__":
+    main()
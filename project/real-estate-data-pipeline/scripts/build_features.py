@@ -1,10 +1,64 @@
 import os
+import sys
+import argparse
+import contextlib
+import io
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, inspect, text
 from dotenv import load_dotenv
 import warnings
 
+from utils.bulk_load import bulk_load
+from utils.complex_index import ID_COLUMNS, assign_complex_ids, ensure_complex_tables
+from utils.deal_changes import (
+    CANCEL_FLAG_COLUMN,
+    cancelled_sql,
+    ensure_change_table,
+    get_pending_changes,
+    is_cancelled,
+    mark_changes_applied,
+    summarize_changes,
+)
+from utils.duckdb_backend import connect as connect_duckdb, parquet_source, query_df, read_raw_arrow
+from utils.feature_schema import apply_schema, print_memory_report, to_storage_frame
+from utils.group_stats import LEVEL_KEYS, broadcast, means_from_sums
+from utils.interval_join import has_covering_interval
+from utils.ingest_ledger import ensure_ledger_table
+from utils.jeonse_ratio import (
+    JEONSE_RATIO_TABLE,
+    JEONSE_RATIO_WINDOW_DAYS,
+    affected_months,
+    compute_jeonse_ratio,
+    lookback_months,
+    sort_jeonse_ratio,
+)
+from utils.parquet_export import queue_export
+from utils.price_index import PRICE_INDEX_BASE_YEAR, PRICE_INDEX_TABLE, compute_price_index, sort_price_index
+from utils.publish import publish_tables, rollback_tables
+from utils.raw_schema import DEAL_MONTH_COLUMN, RAW_TABLES, ensure_typed_columns
+from utils.run_metrics import finish_run, start_run, track_stage
+from utils.feature_state import (
+    RAW_TABLE_BY_TRADE_TYPE,
+    STATS_TABLE,
+    apply_stat_delta,
+    clear_last_ledger_at,
+    dong_contributions,
+    ensure_state_tables,
+    get_changed_partitions,
+    get_last_ledger_at,
+    get_max_ledger_at,
+    mark_partitions_built,
+    partition_date_filter,
+    partition_filter,
+    partitions_by_trade_type,
+    reset_stats,
+    set_last_ledger_at,
+)
+
 # 경고 메시지 무시
 warnings.filterwarnings('ignore', category=UserWarning, module='pandas')
 
@@ -19,6 +73,68 @@ SEOUL_SGG_MAP = {
     "11740": "강동구"
 }
 
+# 피처 생성에 필요한 원시 컬럼 (SELECT * 대신 이 컬럼만 읽습니다)
+# 금액/날짜/면적/층은 적재 시점에 파싱해 둔 타입 컬럼(utils.normalize)을 읽으므로 다시 파싱하지 않습니다.
+TRADE_RAW_COLUMNS = [
+    'sggCd', 'umdCd', 'umdNm', 'jibun', 'aptNm', 'area_m2', 'floor_no', 'build_year',
+    'deal_date', 'deal_amount', CANCEL_FLAG_COLUMN,
+]
+RENT_RAW_COLUMNS = [
+    'sggCd', 'umdNm', 'jibun', 'aptNm', 'area_m2', 'floor_no', 'build_year',
+    'deal_date', 'deposit_amount', 'rent_amount', 'contract_start', 'contract_end',
+]
+
+# 원시 컬럼(과 계산 컬럼) → 피처 테이블 컬럼 (피처 테이블의 컬럼 순서)
+TRADE_COLUMN_MAP = {
+    'sggCd': '시군구코드', 'umdCd': '읍면동코드', 'jibun': '지번', 'aptNm': '아파트명',
+    'area_m2': '전용면적(㎡)', 'floor_no': '층', 'build_year': '건축년도',
+    'deal_amount': '거래금액(만원)', 'deal_date': '거래일자', 'sggnm': '시군구명',
+    'umdNm': '읍면동명', 'price_per_pyeong': '평당가격(만원)', 'dong_avg_price': '동별평균평당가(만원)'
+}
+JEONSE_COLUMN_MAP = {
+    'sggCd': '시군구코드', 'umdNm': '읍면동명', 'jibun': '지번', 'aptNm': '아파트명', 'area_m2': '전용면적(㎡)', 'floor_no': '층',
+    'build_year': '건축년도', 'deposit_amount': '보증금(만원)', 'deal_date': '거래일자', 'sggnm': '시군구명', 'rent_type': '거래유형',
+    'contract_start': '계약시작일', 'contract_end': '계약종료일',
+}
+WOLSE_COLUMN_MAP = {
+    'sggCd': '시군구코드', 'umdNm': '읍면동명', 'jibun': '지번', 'aptNm': '아파트명', 'area_m2': '전용면적(㎡)', 'floor_no': '층',
+    'build_year': '건축년도', 'deposit_amount': '보증금(만원)', 'rent_amount': '월세(만원)', 'deal_date': '거래일자', 'sggnm': '시군구명',
+    'rent_type': '거래유형', 'contract_start': '계약시작일', 'contract_end': '계약종료일',
+}
+
+# 갭투자 분석 대상 최소 연도 (2021년 6월 임대차 신고제 시행 이전의 contractTerm은 신뢰도가 낮음)
+GAP_ANALYSIS_MIN_YEAR = 2022
+
+# 전체 빌드가 만드는 피처 테이블 (저장/게시 순서)
+FEATURE_TABLES = [
+    "feature_apt_trade", "feature_apt_jeonse", "feature_apt_wolse", "analytics_gap_investment", PRICE_INDEX_TABLE, JEONSE_RATIO_TABLE,
+]
+
+# 전체 빌드의 실행 백엔드
+#   pandas: pd.read_sql로 읽어 pandas로 정제/분석 (청크, 자치구별 병렬 빌드 지원)
+#   duckdb: 원시 테이블을 Arrow로 읽거나(PostgreSQL은 COPY) Parquet을 직접 스캔해, 정제와 갭투자 분석을 DuckDB SQL로 실행
+#           통계(평균, 중위값, 지수)는 pandas 경로와 같은 함수로 계산하므로 저장되는 값이 같습니다.
+BACKENDS = ("pandas", "duckdb")
+
+# 전체 빌드 결과를 저장하는 방식
+#   atomic : 버전 테이블에 적재/인덱스 생성 후 한 트랜잭션에서 이름 교체 (조회 중단 없음, 이전 버전 보관)
+#   replace: 기존 테이블을 지우고 다시 만듦 (PostgreSQL이 아닌 DB에서도 동작)
+PUBLISH_MODES = ("atomic", "replace")
+
+# 통계(stat_name)별로 채우는 피처 테이블의 평균 컬럼 {단위(gu/dong): 컬럼}
+# 동별 평균은 동의 (합계, 건수)로, 구별 평균은 동별 (합계, 건수)를 자치구로 합쳐 계산합니다.
+AVERAGE_COLUMNS = {
+    "feature_apt_trade": {"trade_pp": {"dong": "동별평균평당가(만원)"}},
+    "feature_apt_jeonse": {"jeonse_pp": {"gu": "구별평균평당전세가(만원)", "dong": "동별평균평당전세가(만원)"}},
+    "feature_apt_wolse": {
+        "wolse_deposit_pp": {"gu": "구별평균평당월세보증금(만원)", "dong": "동별평균평당월세보증금(만원)"},
+        "wolse_rent": {"gu": "구별평균월세(만원)", "dong": "동별평균월세(만원)"},
+    },
+}
+
+# 동별 통계(feature_dong_stats)의 단위별 키 컬럼
+STAT_LEVEL_KEYS = {"gu": ["sggnm"], "dong": ["sggnm", "umdnm"]}
+
 def get_db_engine():
     """데이터베이스 연결 엔진을 생성하고 반환합니다."""
     dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
@@ -33,177 +149,909 @@ def get_db_engine():
     print("✅ 데이터베이스 연결 성공!")
     return engine
 
-def process_trade_data(engine, schema):
-    """매매 데이터를 처리하고 피처를 생성합니다."""
-    print("--- [1/4] 매매 데이터 처리 시작 ---")
-    df = pd.read_sql(f'SELECT * FROM {schema}."raw_apt_trade"', engine)
-    print(f">> 매매 데이터 {len(df)}건 로딩 완료.")
+def iter_raw_table(engine, schema, table_name, columns, partitions=None, chunksize=None, sigungu_codes=None):
+    """
+    원시 테이블에서 피처 생성에 필요한 컬럼만 읽습니다.
+    partitions가 주어지면 해당 (시군구코드, 'YYYYMM' 거래연월) 파티션의 행만 읽고,
+    sigungu_codes가 주어지면 해당 자치구의 행만 읽습니다.
+    chunksize가 주어지면 서버 사이드 커서로 chunksize 행씩 나눠 읽습니다.
 
-    numeric_cols = ['dealAmount', 'excluUseAr', 'dealYear', 'dealMonth', 'dealDay', 'buildYear', 'floor']
-    for col in numeric_cols:
-        if col == 'dealAmount':
-             df[col] = pd.to_numeric(df[col].str.replace(',', '').str.strip(), errors='coerce')
-        else:
-             df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    df.dropna(subset=['dealAmount', 'excluUseAr'], inplace=True)
-    df = df[df['floor'] > 0].copy()
-    df['deal_datetime'] = pd.to_datetime(df['dealYear'].astype(str) + '-' + df['dealMonth'].astype(str) + '-' + df['dealDay'].astype(str), errors='coerce')
-    df['price_per_pyeong'] = df['dealAmount'] / (df['excluUseAr'] / 3.3058)
+    Yields:
+        pd.DataFrame: 원시 데이터 청크 (chunksize가 없으면 전체 1개)
+    """
+    column_list = ", ".join(f'"{col}"' for col in columns)
+    query = f'SELECT {column_list} FROM {schema}."{table_name}"'
+    conditions, params = [], {}
+    if partitions is not None:
+        # 거래연월(deal_ym)은 원시 테이블의 파티션 키이므로, 해당 월 파티션만 읽습니다.
+        where, params = partition_filter(partitions, "sggCd", f'"{DEAL_MONTH_COLUMN}"')
+        conditions.append(where)
+    if sigungu_codes is not None:
+        conditions.append('"sggCd" IN :sigungu_codes')
+        params["sigungu_codes"] = list(sigungu_codes)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query = text(query)
+    if sigungu_codes is not None:
+        query = query.bindparams(bindparam("sigungu_codes", expanding=True))
+
+    if chunksize is None:
+        yield pd.read_sql(query, engine, params=params)
+        return
+
+    # stream_results=True: 결과 전체를 클라이언트로 가져오지 않고 서버 사이드 커서로 조금씩 받아옵니다.
+    with engine.connect().execution_options(stream_results=True) as connection:
+        yield from pd.read_sql(query, connection, params=params, chunksize=chunksize)
+
+def ensure_raw_typed_columns(engine, schema):
+    """원시 테이블에 타입 컬럼이 없으면(적재 코드 업그레이드 직후) 추가하고 이미 적재된 행을 채웁니다."""
+    with engine.begin() as connection:
+        for table_name in RAW_TABLES:
+            if inspect(connection).has_table(table_name, schema=schema):
+                ensure_typed_columns(connection, table_name, schema)
+
+def summarize_contributions(contributions):
+    """청크별 (합계, 건수)를 동별로 합칩니다."""
+    combined = pd.concat(contributions, ignore_index=True)
+    return combined.groupby(["stat_name", "sggnm", "umdnm"], as_index=False)[["value_sum", "value_count"]].sum()
+
+def fill_group_averages(df, table_name, stats):
+    """
+    동별 (합계, 건수)로 단위(구/동)별 평균을 계산해 피처 테이블의 평균 컬럼을 채웁니다.
+    단위마다 통계 전체를 한 번에 계산하고, 행에는 한 번의 인덱스 정렬로 모든 평균 컬럼을 채웁니다.
+    """
+    if df.empty:
+        return df
+    table_stats = AVERAGE_COLUMNS[table_name]
+    stats = stats[stats['stat_name'].isin(list(table_stats))]
+    for level in ("gu", "dong"):
+        columns = {stat_name: levels[level] for stat_name, levels in table_stats.items() if level in levels}
+        if not columns:
+            continue
+        means = means_from_sums(stats, ['stat_name'] + STAT_LEVEL_KEYS[level]).unstack('stat_name')
+        broadcast(df, LEVEL_KEYS[level], means, columns)
+    return df
+
+def average_column_names(table_name):
+    """피처 테이블의 구별/동별 평균 컬럼 (AVERAGE_COLUMNS 순서, 테이블의 마지막 컬럼들)"""
+    return [column for levels in AVERAGE_COLUMNS[table_name].values() for column in levels.values()]
+
+def transform_trade_chunk(df):
+    """원시 매매 데이터 청크를 정제해 피처 테이블 형태로 만듭니다. 해제된 거래는 제외하고, 동별 평균 컬럼은 비워 둡니다."""
+    df.dropna(subset=['deal_amount', 'area_m2'], inplace=True)
+    df = df[(df['floor_no'] > 0) & ~is_cancelled(df[CANCEL_FLAG_COLUMN])].copy()
+    df['price_per_pyeong'] = df['deal_amount'] / (df['area_m2'] / 3.3058)
     df['sggnm'] = df['sggCd'].map(SEOUL_SGG_MAP)
     df.dropna(subset=['sggnm'], inplace=True)
+    df['dong_avg_price'] = np.nan
+
+    df.rename(columns=TRADE_COLUMN_MAP, inplace=True)
+    df_final = df[list(TRADE_COLUMN_MAP.values())].copy()
+    return apply_schema(df_final, "feature_apt_trade")
+
+def process_trade_data(engine, schema, partitions=None, chunksize=None, sigungu_codes=None):
+    """
+    매매 데이터를 처리하고 피처를 생성합니다. partitions(또는 sigungu_codes)가 주어지면 해당 범위만 처리합니다.
+    chunksize가 주어지면 청크 단위로 읽어 정제하고, 동별 평균은 청크별 (합계, 건수)를 합쳐 계산합니다.
+    """
+    with track_stage("process_trade_data") as stage:
+        print("--- [1/6] 매매 데이터 처리 시작 ---")
+        chunks, contributions, loaded = [], [], 0
+        for raw_chunk in iter_raw_table(engine, schema, "raw_apt_trade", TRADE_RAW_COLUMNS, partitions, chunksize, sigungu_codes):
+            loaded += len(raw_chunk)
+            chunk = transform_trade_chunk(raw_chunk)
+            chunks.append(chunk)
+            contributions.append(dong_contributions(df_trade=chunk))
+        print(f">> 매매 데이터 {loaded}건 로딩 완료. ({len(chunks)}개 청크)")
+
+        # 청크마다 카테고리 구성이 달라 병합하면 object로 바뀌므로 스키마를 다시 적용합니다.
+        df_final = apply_schema(pd.concat(chunks, ignore_index=True), "feature_apt_trade")
+        df_final = fill_group_averages(df_final, "feature_apt_trade", summarize_contributions(contributions))
+        df_final = apply_schema(assign_complex_ids(engine, schema, df_final), "feature_apt_trade")
+
+        print("--- 매매 데이터 처리 완료 ---")
+        stage["rows_in"], stage["rows_out"] = loaded, len(df_final)
+        return df_final
+
+def transform_rent_chunk(df):
+    """
+    원시 전월세 데이터 청크를 정제해 (전세, 월세) 피처 테이블 형태로 만듭니다.
+    구별/동별 평균 컬럼은 비워 둡니다.
+    """
+    df.dropna(subset=['deposit_amount', 'area_m2'], inplace=True)
     
-    dong_avg_price = df.groupby(['sggnm', 'umdNm'])['price_per_pyeong'].transform('mean')
-    df['dong_avg_price'] = dong_avg_price
-
-    column_rename_map = {
-        'sggCd': '시군구코드', 'umdCd': '읍면동코드', 'jibun': '지번', 'aptNm': '아파트명',
-        'excluUseAr': '전용면적(㎡)', 'floor': '층', 'buildYear': '건축년도',
-        'dealAmount': '거래금액(만원)', 'deal_datetime': '거래일자', 'sggnm': '시군구명',
-        'umdNm': '읍면동명', 'price_per_pyeong': '평당가격(만원)', 'dong_avg_price': '동별평균평당가(만원)'
-    }
-    df.rename(columns=column_rename_map, inplace=True)
-    df_final = df[list(column_rename_map.values())].copy()
-    df_final['거래일자'] = pd.to_datetime(df_final['거래일자']).dt.date
-
-    print("--- 매매 데이터 처리 완료 ---")
-    return df_final
-
-def process_rent_data(engine, schema):
-    """전월세 데이터를 처리하여 '전세'와 '월세' 테이블을 각각 생성합니다."""
-    print("--- [2/4] 전월세 데이터 처리 시작 ---")
-    df = pd.read_sql(f'SELECT * FROM {schema}."raw_apt_jeonse"', engine)
-    print(f">> 전월세 데이터 {len(df)}건 로딩 완료.")
-
-    numeric_cols = ['deposit', 'monthlyRent', 'excluUseAr', 'buildYear', 'dealYear', 'dealMonth', 'dealDay', 'floor']
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    df.dropna(subset=['deposit', 'excluUseAr'], inplace=True)
-    
-    df['rent_type'] = np.where(df['monthlyRent'].fillna(0) == 0, '전세', '월세')
-    df['deal_datetime'] = pd.to_datetime(df['dealYear'].astype(str) + '-' + df['dealMonth'].astype(str) + '-' + df['dealDay'].astype(str), errors='coerce')
+    df['rent_type'] = np.where(df['rent_amount'].fillna(0) == 0, '전세', '월세')
     df['sggnm'] = df['sggCd'].map(SEOUL_SGG_MAP)
     df.dropna(subset=['sggnm'], inplace=True)
 
-    term = df['contractTerm'].str.split('~', expand=True)
-    df['contract_start_date'] = pd.to_datetime('20' + term[0].str.replace('.', '-', regex=False), errors='coerce')
-    df['contract_end_date'] = pd.to_datetime('20' + term[1].str.replace('.', '-', regex=False), errors='coerce')
-    
-    # '진짜 전세' 그룹 정의 (평균 계산용)
-    true_jeonse_mask = (df['rent_type'] == '전세') & (df['deposit'] > 0) & (df['excluUseAr'] > 0)
-    df_true_jeonse = df[true_jeonse_mask].copy()
-    df_true_jeonse['price_per_pyeong'] = df_true_jeonse['deposit'] / (df_true_jeonse['excluUseAr'] * 3.3058)
-
-    # '월세' 그룹 정의 (평균 계산용)
-    wolse_mask = (df['rent_type'] == '월세') & (df['excluUseAr'] > 0)
-    df_wolse = df[wolse_mask].copy()
-    df_wolse['deposit_per_pyeong'] = df_wolse['deposit'] / (df_wolse['excluUseAr'] * 3.3058)
-
-    # 각 동네별 평균 '지도' 생성
-    jeonse_avg_map = df_true_jeonse.groupby(['sggnm', 'umdNm'])['price_per_pyeong'].mean()
-    wolse_deposit_avg_map = df_wolse.groupby(['sggnm', 'umdNm'])['deposit_per_pyeong'].mean()
-    wolse_rent_avg_map = df_wolse.groupby(['sggnm', 'umdNm'])['monthlyRent'].mean()
-
-    # .map()을 이용해 전체 데이터프레임에 평균값 적용
-    df['sggnm_avg_pp_jeonse'] = df.set_index(['sggnm', 'umdNm']).index.map(jeonse_avg_map)
-    df['umdNm_avg_pp_jeonse'] = df.set_index(['sggnm', 'umdNm']).index.map(jeonse_avg_map)
-    df['sggnm_avg_pp_wolse_deposit'] = df.set_index(['sggnm', 'umdNm']).index.map(wolse_deposit_avg_map)
-    df['umdNm_avg_pp_wolse_deposit'] = df.set_index(['sggnm', 'umdNm']).index.map(wolse_deposit_avg_map)
-    df['sggnm_avg_monthly_rent'] = df.set_index(['sggnm', 'umdNm']).index.map(wolse_rent_avg_map)
-    df['umdNm_avg_monthly_rent'] = df.set_index(['sggnm', 'umdNm']).index.map(wolse_rent_avg_map)
-
     # 전세/월세 데이터 분리
     df_jeonse_final = df[df['rent_type'] == '전세'].copy()
     df_wolse_final = df[df['rent_type'] == '월세'].copy()
     
     # 전세 테이블 컬럼 정리
-    jeonse_rename_map = {
-        'sggCd': '시군구코드', 'umdNm': '읍면동명', 'jibun': '지번', 'aptNm': '아파트명', 'excluUseAr': '전용면적(㎡)', 'floor': '층', 
-        'buildYear': '건축년도', 'deposit': '보증금(만원)', 'deal_datetime': '거래일자', 'sggnm': '시군구명', 'rent_type': '거래유형', 
-        'contract_start_date': '계약시작일', 'contract_end_date': '계약종료일', 'sggnm_avg_pp_jeonse': '구별평균평당전세가(만원)', 
-        'umdNm_avg_pp_jeonse': '동별평균평당전세가(만원)'
-    }
-    df_jeonse_final = df_jeonse_final[list(jeonse_rename_map.keys())].rename(columns=jeonse_rename_map)
+    df_jeonse_final = df_jeonse_final[list(JEONSE_COLUMN_MAP.keys())].rename(columns=JEONSE_COLUMN_MAP)
+    for col in average_column_names("feature_apt_jeonse"):
+        df_jeonse_final[col] = np.nan
 
     # 월세 테이블 컬럼 정리
-    wolse_rename_map = {
-        'sggCd': '시군구코드', 'umdNm': '읍면동명', 'jibun': '지번', 'aptNm': '아파트명', 'excluUseAr': '전용면적(㎡)', 'floor': '층', 
-        'buildYear': '건축년도', 'deposit': '보증금(만원)', 'monthlyRent': '월세(만원)', 'deal_datetime': '거래일자', 'sggnm': '시군구명', 
-        'rent_type': '거래유형', 'contract_start_date': '계약시작일', 'contract_end_date': '계약종료일', 
-        'sggnm_avg_pp_wolse_deposit': '구별평균평당월세보증금(만원)', 'umdNm_avg_pp_wolse_deposit': '동별평균평당월세보증금(만원)', 
-        'sggnm_avg_monthly_rent': '구별평균월세(만원)', 'umdNm_avg_monthly_rent': '동별평균월세(만원)'
-    }
-    df_wolse_final = df_wolse_final[list(wolse_rename_map.keys())].rename(columns=wolse_rename_map)
+    df_wolse_final = df_wolse_final[list(WOLSE_COLUMN_MAP.keys())].rename(columns=WOLSE_COLUMN_MAP)
+    for col in average_column_names("feature_apt_wolse"):
+        df_wolse_final[col] = np.nan
+
+    return apply_schema(df_jeonse_final, "feature_apt_jeonse"), apply_schema(df_wolse_final, "feature_apt_wolse")
+
+def process_rent_data(engine, schema, partitions=None, chunksize=None, sigungu_codes=None):
+    """
+    전월세 데이터를 처리하여 '전세'와 '월세' 테이블을 각각 생성합니다.
+    partitions(또는 sigungu_codes)가 주어지면 해당 범위만 처리합니다.
+    chunksize가 주어지면 청크 단위로 읽어 정제하고, 동별 평균은 청크별 (합계, 건수)를 합쳐 계산합니다.
+    """
+    with track_stage("process_rent_data") as stage:
+        print("--- [2/6] 전월세 데이터 처리 시작 ---")
+        jeonse_chunks, wolse_chunks, contributions, loaded = [], [], [], 0
+        for raw_chunk in iter_raw_table(engine, schema, "raw_apt_jeonse", RENT_RAW_COLUMNS, partitions, chunksize, sigungu_codes):
+            loaded += len(raw_chunk)
+            jeonse_chunk, wolse_chunk = transform_rent_chunk(raw_chunk)
+            jeonse_chunks.append(jeonse_chunk)
+            wolse_chunks.append(wolse_chunk)
+            contributions.append(dong_contributions(df_jeonse=jeonse_chunk, df_wolse=wolse_chunk))
+        print(f">> 전월세 데이터 {loaded}건 로딩 완료. ({len(jeonse_chunks)}개 청크)")
 
-    # 날짜 컬럼 타입 변환
-    for col in ['거래일자', '계약시작일', '계약종료일']:
-        df_jeonse_final[col] = pd.to_datetime(df_jeonse_final[col]).dt.date
-        df_wolse_final[col] = pd.to_datetime(df_wolse_final[col]).dt.date
+        stats = summarize_contributions(contributions)
+        df_jeonse_final = apply_schema(pd.concat(jeonse_chunks, ignore_index=True), "feature_apt_jeonse")
+        df_wolse_final = apply_schema(pd.concat(wolse_chunks, ignore_index=True), "feature_apt_wolse")
+        df_jeonse_final = fill_group_averages(df_jeonse_final, "feature_apt_jeonse", stats)
+        df_wolse_final = fill_group_averages(df_wolse_final, "feature_apt_wolse", stats)
+        df_jeonse_final = apply_schema(assign_complex_ids(engine, schema, df_jeonse_final), "feature_apt_jeonse")
+        df_wolse_final = apply_schema(assign_complex_ids(engine, schema, df_wolse_final), "feature_apt_wolse")
 
-    print("--- 전월세 데이터 처리 완료 ---")
-    return df_jeonse_final, df_wolse_final
+        print("--- 전월세 데이터 처리 완료 ---")
+        stage["rows_in"], stage["rows_out"] = loaded, len(df_jeonse_final) + len(df_wolse_final)
+        return df_jeonse_final, df_wolse_final
 
-def analyze_gap_investment(df_trade, df_jeonse):
-    """갭투자 데이터를 분석합니다."""
-    print("--- [3/4] 갭투자 분석 시작 ---")
+def analyze_gap_investment(df_trade, df_jeonse, min_year=GAP_ANALYSIS_MIN_YEAR):
+    """
+    갭투자 데이터를 분석합니다.
+    매매일이 같은 평형(unit_type_id), 같은 층의 전세 계약 기간 안에 있으면 갭투자로 봅니다.
+    min_year 이후의 매매만 분석합니다.
+    """
+    with track_stage("analyze_gap_investment", rows_in=len(df_trade) + len(df_jeonse)) as stage:
+        print("--- [3/6] 갭투자 분석 시작 ---")
+        sales_df, jeonse_df = prepare_gap_frames(df_trade, df_jeonse, min_year)
+        counts = count_gap_deals(sales_df, jeonse_df)
+        summary_df = summarize_gap_counts(counts)
+
+        print(f">> 갭투자 분석 완료. 총 {len(summary_df)}개 동별 데이터 생성. (매매: {len(sales_df)}건, 갭투자: {int(counts['갭투자건수'].sum())}건)")
+        print("--- 갭투자 분석 완료 ---")
+        stage["rows_out"] = len(summary_df)
+        return summary_df
+
+def prepare_gap_frames(df_trade, df_jeonse, min_year=GAP_ANALYSIS_MIN_YEAR):
+    """갭투자 판정용으로 날짜 컬럼을 datetime으로 바꾸고, min_year 이후 매매에 거래년도를 붙입니다."""
     sales_df = df_trade.copy()
     jeonse_df = df_jeonse.copy()
 
     sales_df['거래일자'] = pd.to_datetime(sales_df['거래일자'])
     jeonse_df['계약시작일'] = pd.to_datetime(jeonse_df['계약시작일'])
     jeonse_df['계약종료일'] = pd.to_datetime(jeonse_df['계약종료일'])
-    
-    sales_df = sales_df[sales_df['거래일자'].dt.year >= 2022].copy()
+
+    sales_df = sales_df[sales_df['거래일자'].dt.year >= min_year].copy()
     jeonse_df.dropna(subset=['계약시작일', '계약종료일'], inplace=True)
     sales_df['거래년도'] = sales_df['거래일자'].dt.year
+    return sales_df, jeonse_df
 
-    sales_df['전용면적(㎡)'] = sales_df['전용면적(㎡)'].round(2)
-    jeonse_df['전용면적(㎡)'] = jeonse_df['전용면적(㎡)'].round(2)
-    
-    apartment_key = ['시군구명', '읍면동명', '지번', '아파트명', '전용면적(㎡)', '층']
-    sales_df['매매ID'] = range(len(sales_df))
-    total_sales = sales_df.groupby(['거래년도', '시군구명', '읍면동명']).size().rename('총매매건수')
-    
-    merged_df = pd.merge(sales_df, jeonse_df[apartment_key + ['계약시작일', '계약종료일']], on=apartment_key, how='inner')
-    
-    gap_mask = (merged_df['거래일자'] >= merged_df['계약시작일']) & (merged_df['거래일자'] <= merged_df['계약종료일'])
-    
-    unique_gap_deals = merged_df[gap_mask].drop_duplicates(subset=['매매ID'])
-    gap_counts = unique_gap_deals.groupby(['거래년도', '시군구명', '읍면동명']).size().rename('갭투자건수')
-    summary_df = pd.concat([total_sales, gap_counts], axis=1).fillna(0).astype(int)
-    
+def count_gap_deals(sales_df, jeonse_df):
+    """
+    (거래년도, 시군구명, 읍면동명)별 총매매건수와 갭투자건수를 셉니다. (거래년도 컬럼과 datetime 날짜 컬럼이 준비된 매매/전세)
+    건수는 더하고 뺄 수 있으므로, 증분 빌드는 바뀐 슬라이스의 건수만큼 기존 테이블을 보정합니다.
+    """
+    # 평형 ID가 (단지, 전용면적)을 나타내므로, 문자열 6개 컬럼 대신 정수 2개 컬럼으로 연결합니다.
+    apartment_key = ['unit_type_id', '층']
+    # observed=True: 카테고리 컬럼으로 묶을 때 거래가 없는 (연도, 구, 동) 조합을 만들지 않습니다.
+    total_sales = sales_df.groupby(['거래년도', '시군구명', '읍면동명'], observed=True).size().rename('총매매건수')
+
+    # 전세 계약 구간이 매매일을 포함하는 매매만 표시합니다. (병합 후 필터링 대신 구간 조인)
+    gap_mask = has_covering_interval(sales_df, jeonse_df, apartment_key, '거래일자', '계약시작일', '계약종료일')
+    gap_counts = sales_df[gap_mask].groupby(['거래년도', '시군구명', '읍면동명'], observed=True).size().rename('갭투자건수')
+    return pd.concat([total_sales, gap_counts], axis=1).fillna(0).astype(int)
+
+def summarize_gap_counts(counts):
+    """(거래년도, 시군구명, 읍면동명)별 총매매건수/갭투자건수에 갭투자비율(%)을 붙여 갭투자 테이블을 만듭니다."""
+    summary_df = counts.fillna(0).astype(int)
     summary_df['갭투자비율(%)'] = 0.0
     non_zero_mask = summary_df['총매매건수'] > 0
     summary_df.loc[non_zero_mask, '갭투자비율(%)'] = ((summary_df.loc[non_zero_mask, '갭투자건수'] / summary_df.loc[non_zero_mask, '총매매건수']) * 100).round(2)
+    return apply_schema(summary_df.reset_index(), "analytics_gap_investment")
 
-    print(f">> 갭투자 분석 완료. 총 {len(summary_df)}개 동별 데이터 생성. (병합: {len(merged_df)}건, 갭투자: {len(unique_gap_deals)}건)")
-    print("--- 갭투자 분석 완료 ---")
-    return summary_df.reset_index()
+def analyze_price_index(df_trade, base_year=PRICE_INDEX_BASE_YEAR):
+    """매매 피처로 자치구/동별 월간 가격 지수(거래건수, 중위 평당가, 면적 보정 지수)를 계산합니다."""
+    with track_stage("analyze_price_index", rows_in=len(df_trade)) as stage:
+        print("--- [4/6] 월간 가격 지수 계산 시작 ---")
+        index_df = compute_price_index(df_trade, base_year)
+        print(f">> 가격 지수 {len(index_df)}건 생성. (기준 연도: {base_year})")
+        print("--- 월간 가격 지수 계산 완료 ---")
+        stage["rows_out"] = len(index_df)
+        return index_df
+
+def analyze_jeonse_ratio(df_trade, df_jeonse, window_days=JEONSE_RATIO_WINDOW_DAYS):
+    """매매마다 같은 평형의 최근 전세 계약을 짝지어 단지/면적대별 월간 전세가율을 계산합니다."""
+    with track_stage("analyze_jeonse_ratio", rows_in=len(df_trade) + len(df_jeonse)) as stage:
+        print("--- [5/6] 전세가율 계산 시작 ---")
+        ratio_df = compute_jeonse_ratio(df_trade, df_jeonse, window_days)
+        print(f">> 전세가율 {len(ratio_df)}건 생성. (매매일 이전 {window_days}일 안의 전세 계약 기준)")
+        print("--- 전세가율 계산 완료 ---")
+        stage["rows_out"] = len(ratio_df)
+        return ratio_df
 
 def save_to_db(df, table_name, engine, schema):
     """데이터프레임을 데이터베이스 테이블에 저장합니다."""
-    print(f">> '{table_name}' 테이블 저장 중... ({len(df)}건)")
-    df.to_sql(table_name, engine, schema=schema, if_exists='replace', index=False)
-    print(f"✅ '{table_name}' 테이블 저장 완료.")
+    with track_stage(f"save_to_db/{table_name}", rows_in=len(df)) as stage:
+        print(f">> '{table_name}' 테이블 저장 중... ({len(df)}건)")
+        # 하나의 트랜잭션 안에서 테이블을 교체하고 COPY로 적재합니다. (컬럼 타입은 메모리 최적화 이전과 같게 저장)
+        bulk_load(to_storage_frame(df), table_name, engine, schema, if_exists='replace')
+        stage["rows_out"] = len(df)
+        print(f"✅ '{table_name}' 테이블 저장 완료.")
+
+# 증분 빌드 시 피처 테이블의 슬라이스(시군구코드, 거래연월)를 찾는 SQL 식
+# 피처 테이블의 (시군구코드, 거래연월) 슬라이스는 거래일자의 반열린 날짜 범위로 찾습니다. (sgg_date 인덱스 사용)
+FEATURE_DATE_COLUMN = "거래일자"
+
+def read_feature_slice(connection, schema, table_name, partitions):
+    """피처 테이블에서 (시군구코드, 거래연월) 파티션에 해당하는 기존 행을 읽습니다."""
+    where, params = partition_date_filter(partitions, "시군구코드", FEATURE_DATE_COLUMN)
+    return pd.read_sql(text(f'SELECT * FROM {schema}."{table_name}" WHERE {where}'), connection, params=params)
+
+def replace_feature_slice(connection, schema, table_name, partitions, new_df):
+    """피처 테이블의 해당 파티션 행을 지우고 새로 계산한 행으로 교체합니다."""
+    where, params = partition_date_filter(partitions, "시군구코드", FEATURE_DATE_COLUMN)
+    connection.execute(text(f'DELETE FROM {schema}."{table_name}" WHERE {where}'), params)
+    if not new_df.empty:
+        bulk_load(to_storage_frame(new_df), table_name, connection, schema)
+    print(f">> '{table_name}' 슬라이스 {len(partitions)}개 교체 완료. ({len(new_df)}건)")
+
+def touched_dongs(stat_names, df):
+    """슬라이스에 등장한 동을 0 증분으로 표시해, 평균 갱신 대상에 빠짐없이 포함되게 합니다."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=["stat_name", "sggnm", "umdnm", "value_sum", "value_count"])
+    dongs = df[['시군구명', '읍면동명']].drop_duplicates().astype(str).rename(columns={'시군구명': 'sggnm', '읍면동명': 'umdnm'})
+    return pd.concat([dongs.assign(stat_name=name, value_sum=0.0, value_count=0) for name in stat_names], ignore_index=True)
+
+def refresh_group_averages(connection, schema, updated_at):
+    """
+    이번 실행에서 누적 통계가 바뀐 동(동별 평균)과 그 동이 속한 자치구(구별 평균)만 피처 테이블의 평균 컬럼을 다시 채웁니다.
+    구별 평균은 자치구에 속한 모든 동의 (합계, 건수)를 합쳐 계산합니다.
+    """
+    for table_name, stats in AVERAGE_COLUMNS.items():
+        for stat_name, levels in stats.items():
+            params = {"stat_name": stat_name, "updated_at": updated_at}
+            if "dong" in levels:
+                connection.execute(text(f"""
+                    UPDATE {schema}."{table_name}" AS f
+                    SET "{levels['dong']}" = s.value_sum / NULLIF(s.value_count, 0)
+                    FROM {schema}."{STATS_TABLE}" AS s
+                    WHERE s.stat_name = :stat_name AND s.updated_at = :updated_at
+                      AND f."시군구명" = s.sggnm AND f."읍면동명" = s.umdnm
+                """), params)
+            if "gu" in levels:
+                connection.execute(text(f"""
+                    UPDATE {schema}."{table_name}" AS f
+                    SET "{levels['gu']}" = g.value_sum / NULLIF(g.value_count, 0)
+                    FROM (
+                        SELECT sggnm, SUM(value_sum) AS value_sum, SUM(value_count) AS value_count
+                        FROM {schema}."{STATS_TABLE}"
+                        WHERE stat_name = :stat_name AND sggnm IN (
+                            SELECT sggnm FROM {schema}."{STATS_TABLE}" WHERE stat_name = :stat_name AND updated_at = :updated_at
+                        )
+                        GROUP BY sggnm
+                    ) AS g
+                    WHERE f."시군구명" = g.sggnm
+                """), params)
+
+def refresh_gap_investment(connection, schema, district_names, gap_min_year=GAP_ANALYSIS_MIN_YEAR):
+    """영향을 받은 자치구의 갭투자 분석만 다시 계산해 교체합니다. (갭투자 판정은 자치구 경계를 넘지 않음)"""
+    def district_query(sql):
+        return text(sql).bindparams(bindparam("names", expanding=True))
+
+    params = {"names": district_names}
+    trade_df = pd.read_sql(district_query(f'SELECT * FROM {schema}."feature_apt_trade" WHERE "시군구명" IN :names'), connection, params=params)
+    jeonse_df = pd.read_sql(district_query(f'SELECT * FROM {schema}."feature_apt_jeonse" WHERE "시군구명" IN :names'), connection, params=params)
+    gap_df = analyze_gap_investment(trade_df, jeonse_df, gap_min_year)
+
+    connection.execute(district_query(f'DELETE FROM {schema}."analytics_gap_investment" WHERE "시군구명" IN :names'), params)
+    if not gap_df.empty:
+        bulk_load(to_storage_frame(gap_df), "analytics_gap_investment", connection, schema)
+
+def refresh_gap_counts(connection, schema, old_trade, new_trade, gap_min_year=GAP_ANALYSIS_MIN_YEAR):
+    """
+    전월세는 그대로이고 매매 슬라이스만 바뀐 경우(신규 거래, 해제/정정), 갭투자 분석을 다시 계산하지 않고
+    (새 슬라이스 건수 - 기존 슬라이스 건수)만큼 기존 행의 총매매건수/갭투자건수를 보정합니다.
+    자치구 전체 매매 대신 바뀐 슬라이스와 그 자치구의 전세 계약만 읽습니다.
+    """
+    frames = [df for df in (old_trade, new_trade) if df is not None and not df.empty]
+    district_names = sorted({str(name) for df in frames for name in df['시군구명'].dropna().unique()})
+    if not district_names:
+        return
 
-def main():
+    def district_query(sql):
+        return text(sql).bindparams(bindparam("names", expanding=True))
+
+    params = {"names": district_names}
+    jeonse_df = pd.read_sql(district_query(
+        f'SELECT "unit_type_id", "층", "계약시작일", "계약종료일" FROM {schema}."feature_apt_jeonse" WHERE "시군구명" IN :names'
+    ), connection, params=params)
+
+    key = ['거래년도', '시군구명', '읍면동명']
+
+    def keyed(counts):
+        # 카테고리/정수 타입이 달라도 같은 키로 더하고 뺄 수 있게 맞춥니다.
+        return counts.astype({'거래년도': int, '시군구명': str, '읍면동명': str}).set_index(key)
+
+    def slice_counts(df):
+        if df is None or df.empty:
+            return None
+        sales_df, jeonse_slice = prepare_gap_frames(df, jeonse_df, gap_min_year)
+        return keyed(count_gap_deals(sales_df, jeonse_slice).reset_index())
+
+    counts = keyed(pd.read_sql(district_query(
+        f'SELECT "거래년도", "시군구명", "읍면동명", "총매매건수", "갭투자건수" '
+        f'FROM {schema}."analytics_gap_investment" WHERE "시군구명" IN :names'
+    ), connection, params=params))
+    added, removed = slice_counts(new_trade), slice_counts(old_trade)
+    if added is not None:
+        counts = counts.add(added, fill_value=0)
+    if removed is not None:
+        counts = counts.sub(removed, fill_value=0)
+    # 해제로 거래가 모두 빠진 동은 행을 지웁니다. (전체 빌드에는 거래가 없는 동이 나오지 않음)
+    counts = counts[counts['총매매건수'] > 0].sort_index()
+
+    gap_df = summarize_gap_counts(counts) if not counts.empty else pd.DataFrame()
+    connection.execute(district_query(f'DELETE FROM {schema}."analytics_gap_investment" WHERE "시군구명" IN :names'), params)
+    if not gap_df.empty:
+        bulk_load(to_storage_frame(gap_df), "analytics_gap_investment", connection, schema)
+    print(f">> 'analytics_gap_investment' 건수 보정 완료. (자치구 {len(district_names)}개, {len(gap_df)}건)")
+
+def refresh_price_index(connection, schema, trade_parts, base_year=PRICE_INDEX_BASE_YEAR):
+    """
+    바뀐 (자치구, 거래연월)의 가격 지수 행만 다시 계산해 교체합니다.
+    면적 보정 지수는 기준 연도 거래를 기준으로 하므로, 기준 연도 거래가 바뀐 자치구는 전체 기간을 다시 계산합니다.
+    """
+    parts = [(code, year_month) for code, year_month in trade_parts if code in SEOUL_SGG_MAP]
+    rebased = sorted({SEOUL_SGG_MAP[code] for code, year_month in parts if int(year_month) // 100 == base_year})
+    monthly = [(code, year_month) for code, year_month in parts if SEOUL_SGG_MAP[code] not in rebased]
+
+    def district_query(sql):
+        return text(sql).bindparams(bindparam("names", expanding=True))
+
+    frames = []
+    if rebased:
+        trade_df = pd.read_sql(district_query(f'SELECT * FROM {schema}."feature_apt_trade" WHERE "시군구명" IN :names'), connection, params={"names": rebased})
+        connection.execute(district_query(f'DELETE FROM {schema}."{PRICE_INDEX_TABLE}" WHERE "시군구명" IN :names'), {"names": rebased})
+        frames.append(compute_price_index(trade_df, base_year))
+    if monthly:
+        # 바뀐 달의 거래와 기준 연도 거래만 읽습니다.
+        names = sorted({SEOUL_SGG_MAP[code] for code, _ in monthly})
+        where, params = partition_date_filter(monthly, "시군구코드", FEATURE_DATE_COLUMN)
+        trade_df = pd.read_sql(district_query(
+            f'SELECT * FROM {schema}."feature_apt_trade" WHERE "시군구명" IN :names '
+            f'AND (("{FEATURE_DATE_COLUMN}" >= :base_start AND "{FEATURE_DATE_COLUMN}" < :base_end) OR {where})'
+        ), connection, params={
+            **params, "names": names, "base_start": date(base_year, 1, 1), "base_end": date(base_year + 1, 1, 1),
+        })
+        changed = [(SEOUL_SGG_MAP[code], int(year_month)) for code, year_month in monthly]
+        where, params = partition_filter(changed, "시군구명", '"거래연월"')
+        connection.execute(text(f'DELETE FROM {schema}."{PRICE_INDEX_TABLE}" WHERE {where}'), params)
+        index_df = compute_price_index(trade_df, base_year)
+        keys = pd.MultiIndex.from_arrays([index_df["시군구명"].astype(str), index_df["거래연월"].astype(int)])
+        frames.append(index_df[keys.isin(changed)])
+
+    index_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if not index_df.empty:
+        bulk_load(to_storage_frame(index_df), PRICE_INDEX_TABLE, connection, schema)
+    print(f">> '{PRICE_INDEX_TABLE}' 교체 완료. (전체 재계산 자치구 {len(rebased)}개, 월 단위 갱신 {len(monthly)}개, {len(index_df)}건)")
+
+def feature_tables_ready(engine, schema):
+    """
+    증분 빌드로 갱신할 수 있는 피처 테이블이 모두 있는지 확인합니다.
+    새로 추가된 테이블이 없거나, 매매/전세/월세 테이블에 단지/평형 ID 컬럼이 없으면(ID 도입 이전 테이블) False입니다.
+    """
+    inspector = inspect(engine)
+    if not all(inspector.has_table(table_name, schema=schema) for table_name in FEATURE_TABLES):
+        return False
+    for table_name in AVERAGE_COLUMNS:
+        columns = {column["name"] for column in inspector.get_columns(table_name, schema=schema)}
+        if not set(ID_COLUMNS) <= columns:
+            return False
+    return True
+
+def refresh_jeonse_ratio(connection, schema, trade_parts, rent_parts, window_days=JEONSE_RATIO_WINDOW_DAYS):
+    """
+    전세가율이 달라질 수 있는 (자치구, 매매 거래연월)만 다시 계산해 교체합니다.
+    매매가 바뀐 달, 그리고 전세 계약이 바뀐 달부터 window_days일 뒤까지의 매매 달이 대상입니다.
+    """
+    months = {(code, int(year_month)) for code, year_month in trade_parts if code in SEOUL_SGG_MAP}
+    months |= {
+        (code, month) for code, year_month in rent_parts if code in SEOUL_SGG_MAP
+        for month in affected_months(year_month, window_days)
+    }
+    months = sorted(months)
+    if not months:
+        return
+    # 대상 달의 매매와, 그 매매들의 기간(window_days일)에 들어가는 전세 계약만 읽습니다.
+    jeonse_months = sorted({(code, month) for code, year_month in months for month in lookback_months(year_month, window_days)})
+    where, params = partition_date_filter(months, "시군구코드", FEATURE_DATE_COLUMN)
+    trade_df = pd.read_sql(text(f'SELECT * FROM {schema}."feature_apt_trade" WHERE {where}'), connection, params=params)
+    where, params = partition_date_filter(jeonse_months, "시군구코드", FEATURE_DATE_COLUMN)
+    jeonse_df = pd.read_sql(text(f'SELECT * FROM {schema}."feature_apt_jeonse" WHERE {where}'), connection, params=params)
+
+    where, params = partition_filter([(SEOUL_SGG_MAP[code], month) for code, month in months], "시군구명", '"거래연월"')
+    connection.execute(text(f'DELETE FROM {schema}."{JEONSE_RATIO_TABLE}" WHERE {where}'), params)
+    ratio_df = compute_jeonse_ratio(trade_df, jeonse_df, window_days)
+    if not ratio_df.empty:
+        bulk_load(to_storage_frame(ratio_df), JEONSE_RATIO_TABLE, connection, schema)
+    print(f">> '{JEONSE_RATIO_TABLE}' 교체 완료. ((자치구, 거래연월) {len(months)}개, {len(ratio_df)}건)")
+
+def get_last_change_id(connection, schema):
+    """아직 반영하지 않은 거래 변경 기록(해제/정정/삭제)과 그중 마지막 change_id를 반환합니다."""
+    pending = get_pending_changes(connection, schema)
+    return pending, (int(pending["change_id"].max()) if not pending.empty else None)
+
+def change_partitions(pending):
+    """변경 기록을 ingest_ledger와 같은 형식의 {거래유형: [(시군구코드, 거래연월)]}로 바꿉니다."""
+    changed = {trade_type: [] for trade_type in RAW_TABLE_BY_TRADE_TYPE}
+    for trade_type, table_name in RAW_TABLE_BY_TRADE_TYPE.items():
+        rows = pending.loc[pending["table_name"] == table_name, ["sgg_code", "deal_ym"]].drop_duplicates()
+        changed[trade_type] = [(str(code), str(year_month)) for code, year_month in rows.itertuples(index=False)]
+    return changed
+
+def seed_incremental_state(engine, schema, last_ledger_at, df_trade, df_jeonse, df_wolse, last_change_id=None, changed=None):
+    """
+    전체 빌드 결과로 동별 누적 통계와 빌드 기록을 초기화하고,
+    빌드 전에 읽은 원장 행(changed)과 거래 변경 기록을 반영 완료로 표시합니다.
+    모든 피처 파티션이 바뀌었으므로 다음 레이크 내보내기는 전체 파티션의 지문을 비교합니다.
+    """
+    ensure_state_tables(engine, schema)
+    with engine.begin() as connection:
+        reset_stats(connection, schema, dong_contributions(df_trade, df_jeonse, df_wolse), datetime.now())
+        set_last_ledger_at(connection, schema, last_ledger_at)
+        if changed is not None:
+            mark_partitions_built(connection, schema, changed)
+        mark_changes_applied(connection, schema, last_change_id, datetime.now())
+        queue_export(connection, schema, FEATURE_TABLES, None, datetime.now())
+    print(">> 증분 빌드용 동별 누적 통계를 초기화했습니다.")
+
+def compute_features(engine, schema, chunksize=None, gap_min_year=GAP_ANALYSIS_MIN_YEAR, sigungu_codes=None):
+    """
+    원시 테이블을 읽어 (매매, 전세, 월세, 갭투자, 가격 지수, 전세가율) 피처 DataFrame을 만듭니다. (FEATURE_TABLES 순서)
+    sigungu_codes가 주어지면 해당 자치구만 계산합니다.
+    """
+    feature_trade_df = process_trade_data(engine, schema, chunksize=chunksize, sigungu_codes=sigungu_codes)
+    feature_jeonse_df, feature_wolse_df = process_rent_data(engine, schema, chunksize=chunksize, sigungu_codes=sigungu_codes)
+    analytics_gap_df = analyze_gap_investment(feature_trade_df, feature_jeonse_df, gap_min_year)
+    price_index_df = analyze_price_index(feature_trade_df)
+    jeonse_ratio_df = analyze_jeonse_ratio(feature_trade_df, feature_jeonse_df)
+    return feature_trade_df, feature_jeonse_df, feature_wolse_df, analytics_gap_df, price_index_df, jeonse_ratio_df
+
+# 병렬 빌드 워커 프로세스마다 하나씩 만드는 DB 엔진 (엔진은 프로세스 간에 공유할 수 없습니다)
+_worker_engine = None
+
+def _init_worker(database_url):
+    global _worker_engine
+    _worker_engine = create_engine(database_url)
+
+def build_district_features(task):
+    """
+    병렬 빌드 워커: 자치구 하나의 피처를 계산합니다.
+    동별 평균과 갭투자 판정은 모두 자치구 안에서 끝나므로, 자치구 단위로 나눠 계산해도 결과가 같습니다.
+    """
+    sigungu_code, schema, chunksize, gap_min_year = task
+    # 워커마다 단계별 로그가 섞이지 않도록, 자치구별 요약만 부모 프로세스에서 출력합니다.
+    with contextlib.redirect_stdout(io.StringIO()):
+        return sigungu_code, compute_features(_worker_engine, schema, chunksize, gap_min_year, sigungu_codes=[sigungu_code])
+
+def concat_results(frames):
+    """자치구별 결과를 합칩니다. 빈 DataFrame은 dtype이 달라질 수 있어 제외합니다."""
+    non_empty = [df for df in frames if not df.empty]
+    if not non_empty:
+        return frames[0]
+    return pd.concat(non_empty, ignore_index=True)
+
+def compute_features_parallel(engine, schema, chunksize=None, gap_min_year=GAP_ANALYSIS_MIN_YEAR, workers=None):
+    """자치구(sggCd)별로 나눠 프로세스 풀에서 피처를 계산하고 합칩니다."""
+    print(f"--- [1-5/6] 자치구별 병렬 피처 계산 시작 (워커 {workers or os.cpu_count()}개) ---")
+    tasks = [(code, schema, chunksize, gap_min_year) for code in SEOUL_SGG_MAP]
+    results = []
+    # 최대 RSS는 부모 프로세스 기준입니다. (워커 프로세스의 메모리는 포함하지 않음)
+    with track_stage("compute_features_parallel") as stage, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine.url,)) as executor:
+        for code, frames in executor.map(build_district_features, tasks):
+            print(f">> {SEOUL_SGG_MAP[code]}({code}) 완료: 매매 {len(frames[0])}건, 전세 {len(frames[1])}건, 월세 {len(frames[2])}건")
+            results.append(frames)
+        stage["rows_out"] = sum(len(df) for frames in results for df in frames)
+
+    feature_trade_df, feature_jeonse_df, feature_wolse_df, analytics_gap_df, price_index_df, jeonse_ratio_df = (
+        apply_schema(concat_results(list(frames)), table_name) for table_name, frames in zip(FEATURE_TABLES, zip(*results))
+    )
+    # 직렬 빌드의 groupby 결과와 같은 순서로 정렬합니다.
+    analytics_gap_df = analytics_gap_df.sort_values(['거래년도', '시군구명', '읍면동명'], ignore_index=True)
+    price_index_df = sort_price_index(price_index_df)
+    jeonse_ratio_df = sort_jeonse_ratio(jeonse_ratio_df)
+    print("--- 자치구별 병렬 피처 계산 완료 ---")
+    return feature_trade_df, feature_jeonse_df, feature_wolse_df, analytics_gap_df, price_index_df, jeonse_ratio_df
+
+def sgg_name_sql(column):
+    """시군구코드 → 시군구명 SQL 식 (SEOUL_SGG_MAP). 조인하지 않으므로 원시 행 순서가 그대로 유지됩니다."""
+    cases = " ".join(f"WHEN '{code}' THEN '{name}'" for code, name in SEOUL_SGG_MAP.items())
+    return f'CASE "{column}" {cases} END'
+
+def duckdb_feature_sql(source, column_map, expressions, where, table_name):
+    """
+    원시 테이블을 피처 테이블 형태로 바꾸는 DuckDB SELECT 문을 만듭니다. (pandas의 transform_*_chunk와 같은 규칙)
+
+    Args:
+        column_map (dict): {원시 컬럼: 피처 컬럼} (TRADE_COLUMN_MAP 등)
+        expressions (dict): 원시 테이블에 없는 계산 컬럼의 SQL 식 {원시 컬럼 이름: 식}
+        where (str): 행 필터 조건 (원시 테이블 별칭: r)
+    """
+    selects = [f'{expressions.get(raw, chr(34) + raw + chr(34))} AS "{column}"' for raw, column in column_map.items()]
+    selects += [f'CAST(NULL AS DOUBLE) AS "{column}"' for column in average_column_names(table_name) if column not in column_map.values()]
+    return f"SELECT {', '.join(selects)} FROM {source} AS r WHERE {where}"
+
+def process_features_duckdb(connection, engine, schema, raw_parquet=None):
+    """
+    DuckDB로 원시 매매/전월세 데이터를 정제해 (매매, 전세, 월세) 피처 DataFrame을 만듭니다.
+    raw_parquet가 주어지면 DB 대신 내보낸 Parquet 파일을 스캔합니다.
+    동별/구별 평균과 단지/평형 ID는 pandas 경로와 같은 함수로 채웁니다.
+    """
+    with track_stage("load_raw_arrow") as stage:
+        print("--- [1-2/6] 원시 데이터 읽기 시작 (DuckDB) ---")
+        sources = {}
+        for table_name, columns in (("raw_apt_trade", TRADE_RAW_COLUMNS), ("raw_apt_jeonse", RENT_RAW_COLUMNS)):
+            if raw_parquet:
+                column_list = ", ".join(f'"{column}"' for column in columns)
+                sources[table_name] = f"(SELECT {column_list} FROM {parquet_source(raw_parquet, table_name)})"
+            else:
+                connection.register(table_name, read_raw_arrow(engine, schema, table_name, columns))
+                sources[table_name] = table_name
+        loaded = {table_name: connection.execute(f"SELECT COUNT(*) FROM {source}").fetchone()[0] for table_name, source in sources.items()}
+        print(f">> 매매 {loaded['raw_apt_trade']}건, 전월세 {loaded['raw_apt_jeonse']}건 로딩 완료. ({'Parquet' if raw_parquet else 'Arrow'})")
+        stage["rows_out"] = sum(loaded.values())
+
+    with track_stage("transform_duckdb", rows_in=stage["rows_out"]) as transform_stage:
+        sgg_name = sgg_name_sql("sggCd")
+        trade_sql = duckdb_feature_sql(
+            sources["raw_apt_trade"], TRADE_COLUMN_MAP,
+            {"sggnm": sgg_name, "price_per_pyeong": '"deal_amount" / ("area_m2" / 3.3058)', "dong_avg_price": "CAST(NULL AS DOUBLE)"},
+            f'"deal_amount" IS NOT NULL AND "area_m2" IS NOT NULL AND "floor_no" > 0 AND NOT {cancelled_sql("r")} AND {sgg_name} IS NOT NULL',
+            "feature_apt_trade",
+        )
+        rent_where = f'"deposit_amount" IS NOT NULL AND "area_m2" IS NOT NULL AND {sgg_name} IS NOT NULL'
+        is_jeonse = 'COALESCE("rent_amount", 0) = 0'
+        jeonse_sql = duckdb_feature_sql(
+            sources["raw_apt_jeonse"], JEONSE_COLUMN_MAP, {"sggnm": sgg_name, "rent_type": "'전세'"},
+            f"{rent_where} AND {is_jeonse}", "feature_apt_jeonse",
+        )
+        wolse_sql = duckdb_feature_sql(
+            sources["raw_apt_jeonse"], WOLSE_COLUMN_MAP, {"sggnm": sgg_name, "rent_type": "'월세'"},
+            f"{rent_where} AND NOT ({is_jeonse})", "feature_apt_wolse",
+        )
+        df_trade = apply_schema(query_df(connection, trade_sql), "feature_apt_trade")
+        df_jeonse = apply_schema(query_df(connection, jeonse_sql), "feature_apt_jeonse")
+        df_wolse = apply_schema(query_df(connection, wolse_sql), "feature_apt_wolse")
+
+        df_trade = fill_group_averages(df_trade, "feature_apt_trade", summarize_contributions([dong_contributions(df_trade=df_trade)]))
+        rent_stats = summarize_contributions([dong_contributions(df_jeonse=df_jeonse, df_wolse=df_wolse)])
+        df_jeonse = fill_group_averages(df_jeonse, "feature_apt_jeonse", rent_stats)
+        df_wolse = fill_group_averages(df_wolse, "feature_apt_wolse", rent_stats)
+        df_trade = apply_schema(assign_complex_ids(engine, schema, df_trade), "feature_apt_trade")
+        df_jeonse = apply_schema(assign_complex_ids(engine, schema, df_jeonse), "feature_apt_jeonse")
+        df_wolse = apply_schema(assign_complex_ids(engine, schema, df_wolse), "feature_apt_wolse")
+        print(f">> 매매 {len(df_trade)}건, 전세 {len(df_jeonse)}건, 월세 {len(df_wolse)}건 정제 완료.")
+        transform_stage["rows_out"] = len(df_trade) + len(df_jeonse) + len(df_wolse)
+    return df_trade, df_jeonse, df_wolse
+
+def analyze_gap_investment_duckdb(connection, df_trade, df_jeonse, min_year=GAP_ANALYSIS_MIN_YEAR):
+    """
+    DuckDB로 갭투자 데이터를 분석합니다. (analyze_gap_investment와 같은 결과)
+    매매마다 같은 평형, 같은 층의 전세 계약 구간이 매매일을 포함하는지 EXISTS 조인으로 확인합니다.
+    """
+    with track_stage("analyze_gap_investment", rows_in=len(df_trade) + len(df_jeonse)) as stage:
+        print("--- [3/6] 갭투자 분석 시작 (DuckDB) ---")
+        connection.register("gap_sales", df_trade[['거래일자', '시군구명', '읍면동명', 'unit_type_id', '층']])
+        connection.register("gap_jeonse", df_jeonse[['unit_type_id', '층', '계약시작일', '계약종료일']])
+        counts = query_df(connection, """
+            WITH sales AS (
+                SELECT
+                    CAST(year(s."거래일자") AS INTEGER) AS "거래년도",
+                    CAST(s."시군구명" AS VARCHAR) AS "시군구명",
+                    CAST(s."읍면동명" AS VARCHAR) AS "읍면동명",
+                    EXISTS (
+                        SELECT 1 FROM gap_jeonse AS j
+                        WHERE j.unit_type_id = s.unit_type_id AND j."층" IS NOT DISTINCT FROM s."층"
+                          AND j."계약시작일" <= s."거래일자" AND j."계약종료일" >= s."거래일자"
+                    ) AS is_gap
+                FROM gap_sales AS s
+                -- pandas groupby와 같이 읍면동명이 없는 매매는 집계하지 않습니다.
+                WHERE year(s."거래일자") >= ? AND s."읍면동명" IS NOT NULL
+            )
+            SELECT "거래년도", "시군구명", "읍면동명", COUNT(*) AS "총매매건수", COUNT(*) FILTER (WHERE is_gap) AS "갭투자건수"
+            FROM sales GROUP BY ALL
+        """, [min_year])
+        connection.unregister("gap_sales")
+        connection.unregister("gap_jeonse")
+
+        summary_df = summarize_gap_counts(counts.set_index(['거래년도', '시군구명', '읍면동명']))
+        # pandas 경로의 groupby 결과와 같은 순서로 정렬합니다.
+        summary_df = summary_df.sort_values(['거래년도', '시군구명', '읍면동명'], ignore_index=True)
+        print(f">> 갭투자 분석 완료. 총 {len(summary_df)}개 동별 데이터 생성. (매매: {int(counts['총매매건수'].sum())}건, 갭투자: {int(counts['갭투자건수'].sum())}건)")
+        print("--- 갭투자 분석 완료 ---")
+        stage["rows_out"] = len(summary_df)
+        return summary_df
+
+def compute_features_duckdb(engine, schema, gap_min_year=GAP_ANALYSIS_MIN_YEAR, raw_parquet=None):
+    """DuckDB 백엔드로 피처 DataFrame을 만듭니다. (compute_features와 같은 FEATURE_TABLES 순서)"""
+    connection = connect_duckdb()
+    try:
+        feature_trade_df, feature_jeonse_df, feature_wolse_df = process_features_duckdb(connection, engine, schema, raw_parquet)
+        analytics_gap_df = analyze_gap_investment_duckdb(connection, feature_trade_df, feature_jeonse_df, gap_min_year)
+    finally:
+        connection.close()
+    price_index_df = analyze_price_index(feature_trade_df)
+    jeonse_ratio_df = analyze_jeonse_ratio(feature_trade_df, feature_jeonse_df)
+    return feature_trade_df, feature_jeonse_df, feature_wolse_df, analytics_gap_df, price_index_df, jeonse_ratio_df
+
+def frames_match(left, right):
+    """두 DataFrame이 행 순서와 관계없이 같은지 비교합니다."""
+    if list(left.columns) != list(right.columns) or len(left) != len(right):
+        return False
+    columns = list(left.columns)
+    left = left.sort_values(columns, ignore_index=True)
+    right = right.sort_values(columns, ignore_index=True)
+    try:
+        pd.testing.assert_frame_equal(left, right, check_dtype=False)
+    except AssertionError:
+        return False
+    return True
+
+def verify_parallel_output(serial_results, parallel_results):
+    """직렬 빌드와 병렬 빌드의 결과 테이블이 같은지 확인합니다."""
+    mismatched = [name for name, a, b in zip(FEATURE_TABLES, serial_results, parallel_results) if not frames_match(a, b)]
+    if mismatched:
+        raise AssertionError(f"병렬 빌드 결과가 직렬 빌드와 다릅니다: {mismatched}")
+    print("✅ 병렬 빌드 결과가 직렬 빌드 결과와 일치합니다.")
+
+def frames_identical(left, right):
+    """두 DataFrame의 저장 값(to_storage_frame)이 행 순서와 관계없이 완전히 같은지 비교합니다. (오차 허용 없음)"""
+    left, right = to_storage_frame(left), to_storage_frame(right)
+    if list(left.columns) != list(right.columns) or len(left) != len(right):
+        return False
+    columns = list(left.columns)
+    left = left.sort_values(columns, ignore_index=True)
+    right = right.sort_values(columns, ignore_index=True)
+    try:
+        pd.testing.assert_frame_equal(left, right, check_dtype=False, check_exact=True)
+    except AssertionError:
+        return False
+    return True
+
+def verify_backend_output(pandas_results, backend_results, backend, exact=True):
+    """
+    pandas 빌드와 다른 백엔드의 결과 테이블이 저장 값 기준으로 같은지 확인합니다.
+    exact가 False이면 부동소수점 오차를 허용합니다. (Parquet 원본은 DB와 행 순서가 달라 평균의 합산 순서가 바뀝니다)
+    """
+    compare = frames_identical if exact else frames_match
+    mismatched = [name for name, a, b in zip(FEATURE_TABLES, pandas_results, backend_results) if not compare(a, b)]
+    if mismatched:
+        raise AssertionError(f"{backend} 빌드 결과가 pandas 빌드와 다릅니다: {mismatched}")
+    print(f"✅ {backend} 빌드 결과가 pandas 빌드 결과와 일치합니다.")
+
+def publish_features(frames, engine, schema, keep_versions=2):
+    """피처 테이블을 버전 테이블에 적재한 뒤 한 트랜잭션에서 교체합니다. (조회 중단 없음)"""
+    with track_stage("publish_tables", rows_in=sum(len(df) for df in frames.values())) as stage:
+        publish_tables({table_name: to_storage_frame(df) for table_name, df in frames.items()}, engine, schema, keep_versions)
+        stage["rows_out"] = stage["rows_in"]
+
+def run_full_build(engine, schema, chunksize=None, gap_min_year=GAP_ANALYSIS_MIN_YEAR, workers=1, verify=False, memory_report=False,
+                   publish="atomic", keep_versions=2, backend="pandas", raw_parquet=None):
+    """
+    원시 테이블 전체를 읽어 모든 피처 테이블을 새로 만듭니다.
+    workers가 1보다 크면 자치구별로 나눠 병렬로 계산하고, verify가 True이면 직렬 결과와 비교한 뒤 저장합니다.
+    backend가 'duckdb'이면 DuckDB로 계산하고(raw_parquet가 있으면 Parquet 스캔), verify가 True이면 pandas 결과와 비교합니다.
+    memory_report가 True이면 피처 DataFrame별 메모리 절감량을 출력합니다.
+    publish가 'atomic'이면(PostgreSQL) 무중단으로 게시하고 이전 버전을 keep_versions개 보관합니다.
+    """
+    ensure_ledger_table(engine, schema)
+    ensure_state_tables(engine, schema)
+    with engine.begin() as connection:
+        ensure_change_table(connection, schema)
+        last_ledger_at = get_max_ledger_at(connection, schema)
+        # 원시 테이블을 읽기 전에 커밋된 적재만 이번 빌드에 반영된 것으로 기록합니다.
+        changed = get_changed_partitions(connection, schema)
+        _, last_change_id = get_last_change_id(connection, schema)
+
+    if backend == "duckdb":
+        if workers > 1 or chunksize:
+            print(">> DuckDB 백엔드는 자체적으로 멀티스레드로 실행하므로 --workers/--chunksize를 사용하지 않습니다.")
+        results = compute_features_duckdb(engine, schema, gap_min_year, raw_parquet)
+        if verify:
+            verify_backend_output(compute_features(engine, schema, None, gap_min_year), results, backend, exact=raw_parquet is None)
+    elif workers > 1:
+        results = compute_features_parallel(engine, schema, chunksize, gap_min_year, workers)
+        if verify:
+            verify_parallel_output(compute_features(engine, schema, chunksize, gap_min_year), results)
+    else:
+        results = compute_features(engine, schema, chunksize, gap_min_year)
+    feature_trade_df, feature_jeonse_df, feature_wolse_df = results[:3]
+    frames = dict(zip(FEATURE_TABLES, results))
+    if memory_report:
+        print_memory_report(frames)
+
+    print("\n--- [6/6] 최종 데이터베이스 저장 시작 ---")
+    if publish == "atomic" and engine.dialect.name == "postgresql":
+        publish_features(frames, engine, schema, keep_versions)
+    else:
+        for table_name, df in frames.items():
+            save_to_db(df, table_name, engine, schema)
+
+    seed_incremental_state(engine, schema, last_ledger_at, feature_trade_df, feature_jeonse_df, feature_wolse_df, last_change_id, changed)
+
+def run_incremental_build(engine, schema, chunksize=None, gap_min_year=GAP_ANALYSIS_MIN_YEAR, workers=1):
+    """
+    아직 반영하지 않은 ingest_ledger 행(built_at이 updated_at과 다른 행)의 파티션과, 거래 변경 기록(raw_deal_changes: 해제/정정/삭제)이 남은
+    (시군구코드, 거래연월) 파티션만 다시 계산합니다. 피처 테이블은 서울만 다루므로 서울 밖 파티션은 반영 완료로만 표시합니다.
+
+    1. 바뀐 파티션의 원시 데이터만 읽어 피처를 만들고, 피처 테이블의 같은 슬라이스를 교체합니다.
+    2. 동별 평균은 누적 합계/건수 테이블에 (새 슬라이스 - 기존 슬라이스)만큼 반영해 갱신합니다.
+    3. 바뀐 (자치구, 거래연월)의 가격 지수/전세가율만 다시 계산합니다. (중위값은 증분으로 보정할 수 없음)
+       갭투자 분석은 매매만 바뀌었으면 건수 차이만 보정하고, 전월세가 바뀌었으면 영향을 받은 자치구를 다시 계산합니다.
+    빌드 기록이 없거나 피처 테이블이 없거나 이전 형식이면 전체 빌드를 수행합니다.
+    """
+    ensure_ledger_table(engine, schema)
+    ensure_state_tables(engine, schema)
+    with engine.begin() as connection:
+        ensure_change_table(connection, schema)
+        since = get_last_ledger_at(connection, schema)
+        last_ledger_at = get_max_ledger_at(connection, schema)
+        changed = get_changed_partitions(connection, schema)
+        pending, last_change_id = get_last_change_id(connection, schema)
+
+    if since is None:
+        print(">> 이전 빌드 기록이 없어 전체 빌드를 수행합니다.")
+        return run_full_build(engine, schema, chunksize=chunksize, gap_min_year=gap_min_year, workers=workers)
+    if not feature_tables_ready(engine, schema):
+        print(">> 피처 테이블이 없거나 이전 형식이어서 전체 빌드를 수행합니다.")
+        return run_full_build(engine, schema, chunksize=chunksize, gap_min_year=gap_min_year, workers=workers)
+
+    # 재수집으로 ingest_ledger가 갱신되지 않았더라도 변경 기록이 남은 파티션은 다시 계산합니다.
+    changed_ledger, changed_deals = partitions_by_trade_type(changed), change_partitions(pending)
+    trade_parts = sorted(set(changed_ledger["매매"]) | set(changed_deals["매매"]))
+    rent_parts = sorted(set(changed_ledger["전월세"]) | set(changed_deals["전월세"]))
+    if not trade_parts and not rent_parts:
+        print(">> 마지막 빌드 이후 새로 적재된 파티션이 없습니다.")
+        return
+    # 피처 테이블은 서울(SEOUL_SGG_MAP)만 다룹니다. 전국 수집분은 원시 테이블에만 남기고, 반영 완료로만 표시합니다.
+    outside = len(trade_parts) + len(rent_parts)
+    trade_parts = [(code, year_month) for code, year_month in trade_parts if code in SEOUL_SGG_MAP]
+    rent_parts = [(code, year_month) for code, year_month in rent_parts if code in SEOUL_SGG_MAP]
+    outside -= len(trade_parts) + len(rent_parts)
+    if outside:
+        print(f">> 서울 밖 파티션 {outside}개는 피처 대상이 아니어서 건너뜁니다.")
+    if not trade_parts and not rent_parts:
+        with engine.begin() as connection:
+            set_last_ledger_at(connection, schema, last_ledger_at)
+            mark_partitions_built(connection, schema, changed)
+            mark_changes_applied(connection, schema, last_change_id, datetime.now())
+        print(">> 다시 계산할 서울 파티션이 없습니다.")
+        return
+    print(f">> 변경된 파티션: 매매 {len(trade_parts)}개, 전월세 {len(rent_parts)}개")
+    if not pending.empty:
+        print(f">> 반영할 거래 변경 기록: {summarize_changes(pending)}")
+
+    new_trade = process_trade_data(engine, schema, trade_parts, chunksize) if trade_parts else None
+    new_jeonse, new_wolse = process_rent_data(engine, schema, rent_parts, chunksize) if rent_parts else (None, None)
+
+    run_at = datetime.now()
+    with track_stage("apply_incremental") as stage, engine.begin() as connection:
+        old_trade = read_feature_slice(connection, schema, "feature_apt_trade", trade_parts) if trade_parts else None
+        old_jeonse = read_feature_slice(connection, schema, "feature_apt_jeonse", rent_parts) if rent_parts else None
+        old_wolse = read_feature_slice(connection, schema, "feature_apt_wolse", rent_parts) if rent_parts else None
+
+        added = pd.concat([
+            dong_contributions(new_trade, new_jeonse, new_wolse),
+            touched_dongs(["trade_pp"], new_trade),
+            touched_dongs(["jeonse_pp"], new_jeonse),
+            touched_dongs(["wolse_deposit_pp", "wolse_rent"], new_wolse),
+        ], ignore_index=True)
+        removed = dong_contributions(old_trade, old_jeonse, old_wolse)
+        apply_stat_delta(connection, schema, added, removed, run_at)
+
+        if trade_parts:
+            replace_feature_slice(connection, schema, "feature_apt_trade", trade_parts, new_trade)
+        if rent_parts:
+            replace_feature_slice(connection, schema, "feature_apt_jeonse", rent_parts, new_jeonse)
+            replace_feature_slice(connection, schema, "feature_apt_wolse", rent_parts, new_wolse)
+        refresh_group_averages(connection, schema, run_at)
+
+        if rent_parts:
+            refresh_gap_investment(connection, schema, sorted({SEOUL_SGG_MAP[code] for code, _ in trade_parts + rent_parts}), gap_min_year)
+        else:
+            refresh_gap_counts(connection, schema, old_trade, new_trade, gap_min_year)
+        if trade_parts:
+            refresh_price_index(connection, schema, trade_parts)
+        refresh_jeonse_ratio(connection, schema, trade_parts, rent_parts)
+
+        set_last_ledger_at(connection, schema, last_ledger_at)
+        mark_partitions_built(connection, schema, changed)
+        mark_changes_applied(connection, schema, last_change_id, run_at)
+        # 동/구별 평균이 자치구의 모든 행에서 바뀔 수 있으므로 자치구 단위로 레이크 내보내기 후보를 남깁니다.
+        queue_export(connection, schema, FEATURE_TABLES, [code for code, _ in trade_parts + rent_parts], run_at)
+        stage["rows_out"] = sum(len(df) for df in (new_trade, new_jeonse, new_wolse) if df is not None)
+
+def main(incremental=False, chunksize=None, gap_min_year=GAP_ANALYSIS_MIN_YEAR, workers=1, verify=False, memory_report=False,
+         publish="atomic", keep_versions=2, rollback=False, backend="pandas", raw_parquet=None):
     """메인 실행 함수"""
     print("--- 데이터 피처 엔지니어링 스크립트 시작 ---")
     engine = get_db_engine()
     schema = os.getenv("DB_SCHEMA", "public")
 
-    feature_trade_df = process_trade_data(engine, schema)
-    feature_jeonse_df, feature_wolse_df = process_rent_data(engine, schema)
-    analytics_gap_df = analyze_gap_investment(feature_trade_df, feature_jeonse_df)
+    if rollback:
+        # 마지막 게시를 되돌립니다. 누적 통계는 되돌린 버전과 맞지 않으므로, 다음 증분 빌드가 전체 빌드를 하도록 기록을 지웁니다.
+        rollback_tables(engine, schema, FEATURE_TABLES)
+        ensure_state_tables(engine, schema)
+        with engine.begin() as connection:
+            clear_last_ledger_at(connection, schema)
+            queue_export(connection, schema, FEATURE_TABLES, None, datetime.now())
+        print(">> 빌드 기록을 지웠습니다. 다음 --incremental 실행은 전체 빌드를 수행합니다.")
+        return
+
+    ensure_raw_typed_columns(engine, schema)
+    # 병렬 빌드 워커들이 동시에 만들지 않도록, 단지/평형 식별 테이블은 미리 만들어 둡니다.
+    ensure_complex_tables(engine, schema)
 
-    print("\n--- [4/4] 최종 데이터베이스 저장 시작 ---")
-    save_to_db(feature_trade_df, "feature_apt_trade", engine, schema)
-    save_to_db(feature_jeonse_df, "feature_apt_jeonse", engine, schema)
-    save_to_db(feature_wolse_df, "feature_apt_wolse", engine, schema)
-    save_to_db(analytics_gap_df, "analytics_gap_investment", engine, schema)
+    # 단계별 실행 시간/행 수/최대 RSS를 모아 실행 리포트(JSON)와 Prometheus 지표로 저장합니다.
+    start_run("build_features", mode="incremental" if incremental else "full", workers=workers, chunksize=chunksize, backend=backend)
+    try:
+        if incremental:
+            if backend != "pandas":
+                print(f">> 증분 빌드는 바뀐 파티션만 읽으므로 pandas 백엔드로 실행합니다. (--backend {backend} 무시)")
+            run_incremental_build(engine, schema, chunksize=chunksize, gap_min_year=gap_min_year, workers=workers)
+        else:
+            run_full_build(
+                engine, schema, chunksize=chunksize, gap_min_year=gap_min_year, workers=workers,
+                verify=verify, memory_report=memory_report, publish=publish, keep_versions=keep_versions,
+                backend=backend, raw_parquet=raw_parquet,
+            )
+    except Exception as e:
+        finish_run("failed", e)
+        raise
+    finish_run()
 
     print("\n🎉 --- 모든 작업이 성공적으로 완료되었습니다. --- 🎉")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="원시 실거래가 데이터로 피처 테이블을 생성합니다.")
+    parser.add_argument("--incremental", action="store_true", help="지난 빌드 이후 새로 적재된 파티션만 다시 계산")
+    parser.add_argument("--chunksize", type=int, default=None, help="원시 테이블을 서버 사이드 커서로 N행씩 나눠 읽어 메모리 사용량을 제한")
+    parser.add_argument("--gap-min-year", type=int, default=GAP_ANALYSIS_MIN_YEAR, help="갭투자 분석 대상 최소 매매 연도")
+    parser.add_argument("--workers", type=int, default=1, help="전체 빌드를 자치구별로 나눠 계산할 프로세스 수 (1이면 직렬)")
+    parser.add_argument("--verify-parallel", "--verify", dest="verify_parallel", action="store_true",
+                        help="병렬/DuckDB 빌드 결과를 직렬 pandas 빌드 결과와 비교한 뒤 저장")
+    parser.add_argument("--memory-report", action="store_true", help="피처 DataFrame별 메모리 사용량(기존 타입 대비)을 출력")
+    parser.add_argument("--publish", choices=PUBLISH_MODES, default="atomic", help="전체 빌드 결과 저장 방식 (atomic: 무중단 교체)")
+    parser.add_argument("--keep-versions", type=int, default=2, help="atomic 게시 시 보관할 이전 버전 수")
+    parser.add_argument("--rollback", action="store_true", help="피처 테이블을 직전에 게시한 버전으로 되돌림")
+    parser.add_argument("--backend", choices=BACKENDS, default="pandas", help="전체 빌드 실행 백엔드 (duckdb: Arrow/Parquet + DuckDB SQL)")
+    parser.add_argument("--raw-parquet", default=None, help="duckdb 백엔드에서 DB 대신 스캔할 원시 테이블 Parquet 디렉터리")
+    args = parser.parse_args()
+    main(
+        incremental=args.incremental,
+        chunksize=args.chunksize,
+        gap_min_year=args.gap_min_year,
+        workers=args.workers,
+        verify=args.verify_parallel,
+        memory_report=args.memory_report,
+        publish=args.publish,
+        keep_versions=args.keep_versions,
+        rollback=args.rollback,
+        backend=args.backend,
+        raw_parquet=args.raw_parquet,
+    )
@@ -0,0 +1,78 @@
+import os
+import sys
+import argparse
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.parquet_export import DEFAULT_LAKE_DIR, ensure_export_state_table, export_table
+from utils.raw_schema import DEAL_MONTH_COLUMN
+from utils.run_metrics import finish_run, start_run, track_stage
+from build_features import SEOUL_SGG_MAP, get_db_engine
+
+
+def sgg_code_sql(column):
+    """시군구명 → 시군구코드 SQL 식 (SEOUL_SGG_MAP). 시군구코드 컬럼이 없는 분석 테이블의 파티션 키로 사용합니다."""
+    cases = " ".join(f"WHEN '{name}' THEN '{code}'" for code, name in SEOUL_SGG_MAP.items())
+    return f'CASE "{column}" {cases} END'
+
+
+# 내보내는 테이블 {테이블: ((기간 종류, 기간 컬럼), 시군구코드 SQL 식, 파일 안 정렬 컬럼)}
+# 정렬 컬럼은 분석 쿼리에서 자주 거르는 컬럼 순서로 두어, 행 그룹 min/max 통계로 건너뛸 수 있게 합니다.
+LAKE_TABLES = {
+    "raw_apt_trade": (("ym", f'"{DEAL_MONTH_COLUMN}"'), '"sggCd"', ["umdNm", "aptNm", "deal_date"]),
+    "raw_apt_jeonse": (("ym", f'"{DEAL_MONTH_COLUMN}"'), '"sggCd"', ["umdNm", "aptNm", "deal_date"]),
+    "feature_apt_trade": (("date", '"거래일자"'), '"시군구코드"', ["읍면동명", "complex_id", "거래일자"]),
+    "feature_apt_jeonse": (("date", '"거래일자"'), '"시군구코드"', ["읍면동명", "complex_id", "거래일자"]),
+    "feature_apt_wolse": (("date", '"거래일자"'), '"시군구코드"', ["읍면동명", "complex_id", "거래일자"]),
+    "analytics_gap_investment": (("year", '"거래년도"'), sgg_code_sql("시군구명"), ["읍면동명"]),
+    "analytics_price_index": (("ym", '"거래연월"'), sgg_code_sql("시군구명"), ["단위", "읍면동명"]),
+    "analytics_jeonse_ratio": (("ym", '"거래연월"'), sgg_code_sql("시군구명"), ["complex_id", "면적대"]),
+}
+
+
+def export_lake(engine, schema, lake_dir=DEFAULT_LAKE_DIR, tables=None, full=False):
+    """
+    원시/피처 테이블을 Hive 파티션 Parquet으로 내보냅니다. 지난 내보내기 이후 바뀐 파티션만 다시 씁니다.
+    바뀌었을 수 있는 후보 파티션(원시: ingest_ledger, 피처: 피처 빌드 기록)만 비교하므로, 레이크 파일을 직접 지웠다면 full로 실행하세요.
+    DB에 없는 테이블은 건너뜁니다.
+    """
+    from sqlalchemy import inspect
+
+    ensure_export_state_table(engine, schema)
+    for table_name in tables or list(LAKE_TABLES):
+        if not inspect(engine).has_table(table_name, schema=schema):
+            print(f"   INFO: '{table_name}' 테이블이 없어 건너뜁니다.")
+            continue
+        period, sgg_sql, sort_columns = LAKE_TABLES[table_name]
+        with track_stage(f"export_{table_name}") as stage:
+            result = export_table(engine, schema, table_name, period, sgg_sql, sort_columns, lake_dir, full)
+            stage["rows_out"] = result["written_rows"]
+        print(
+            f">> '{table_name}' 내보내기 완료. 파티션 {result['written']}개 작성 ({result['written_rows']}건), "
+            f"{result['removed']}개 삭제, {result['skipped']}개 변경 없음."
+            + ("" if result["candidates"] is None else f" (후보 {result['candidates']}개)")
+        )
+
+
+def main(lake_dir=DEFAULT_LAKE_DIR, tables=None, full=False):
+    """메인 실행 함수"""
+    print(f"--- Parquet 내보내기 시작 ({os.path.abspath(lake_dir)}) ---")
+    engine = get_db_engine()
+    schema = os.getenv("DB_SCHEMA", "public")
+
+    start_run("export_parquet", full=full)
+    try:
+        export_lake(engine, schema, lake_dir, tables, full)
+    except Exception as e:
+        finish_run("failed", e)
+        raise
+    finish_run()
+    print("\n🎉 --- Parquet 내보내기가 완료되었습니다. --- 🎉")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="원시/피처 테이블을 (연도, 월, 시군구) Hive 파티션 Parquet으로 내보냅니다.")
+    parser.add_argument("--output-dir", default=DEFAULT_LAKE_DIR, help="내보낼 디렉터리 (기본값: LAKE_DIR 또는 data/lake)")
+    parser.add_argument("--tables", nargs="+", choices=list(LAKE_TABLES), default=None, help="내보낼 테이블 (기본값: 전체)")
+    parser.add_argument("--full", action="store_true", help="후보가 아닌 파티션까지 모든 파티션을 다시 씀")
+    args = parser.parse_args()
+    main(lake_dir=args.output_dir, tables=args.tables, full=args.full)
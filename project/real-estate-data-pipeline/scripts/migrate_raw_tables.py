@@ -0,0 +1,101 @@
+import os
+import sys
+import argparse
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, inspect, text
+
+from utils.dedup import backfill_fingerprints, ensure_fingerprint_index
+from utils.raw_schema import (
+    DEAL_MONTH_COLUMN,
+    DEAL_MONTH_SQL,
+    RAW_TABLES,
+    ensure_month_partitions,
+    ensure_raw_indexes,
+    ensure_typed_columns,
+    is_partitioned,
+)
+
+
+def migrate_table(connection, table_name: str, schema: str, drop_legacy: bool = False):
+    """
+    to_sql로 만들어진 기존(파티션 없는) 원시 테이블을 거래연월(deal_ym) 기준 월 파티션 테이블로 전환합니다.
+    기존 테이블은 '<테이블>_legacy'로 이름을 바꿔 보관하고, 같은 컬럼 구조의 파티션 테이블에 데이터를 옮깁니다.
+    """
+    if not inspect(connection).has_table(table_name, schema=schema):
+        print(f"   INFO: '{table_name}' 테이블이 없습니다. 첫 적재 때 파티션 테이블로 생성됩니다.")
+        return
+    if is_partitioned(connection, table_name, schema):
+        print(f"   INFO: '{table_name}' 테이블은 이미 파티션 테이블입니다.")
+        return
+
+    legacy_name = f"{table_name}_legacy"
+    qualified_name = f'{schema}."{table_name}"'
+    legacy_qualified_name = f'{schema}."{legacy_name}"'
+
+    # 1. 기존 테이블에 거래연월 컬럼을 채웁니다.
+    columns = {column["name"] for column in inspect(connection).get_columns(table_name, schema=schema)}
+    if DEAL_MONTH_COLUMN not in columns:
+        connection.execute(text(f'ALTER TABLE {qualified_name} ADD COLUMN "{DEAL_MONTH_COLUMN}" INTEGER'))
+    connection.execute(text(f'UPDATE {qualified_name} SET "{DEAL_MONTH_COLUMN}" = {DEAL_MONTH_SQL} WHERE "{DEAL_MONTH_COLUMN}" IS NULL'))
+    unknown = connection.execute(text(f'SELECT COUNT(*) FROM {qualified_name} WHERE "{DEAL_MONTH_COLUMN}" IS NULL')).scalar()
+    if unknown:
+        print(f"   WARN: 거래연월을 알 수 없는 {unknown}건은 옮기지 않고 '{legacy_name}'에 남겨 둡니다.")
+
+    # 2. 기존 테이블을 보관하고 같은 컬럼 구조의 파티션 테이블을 만듭니다.
+    connection.execute(text(f'ALTER TABLE {qualified_name} RENAME TO "{legacy_name}"'))
+    connection.execute(text(
+        f'CREATE TABLE {qualified_name} (LIKE {legacy_qualified_name} INCLUDING DEFAULTS) '
+        f'PARTITION BY RANGE ("{DEAL_MONTH_COLUMN}")'
+    ))
+    connection.execute(text(f'ALTER TABLE {qualified_name} ALTER COLUMN "{DEAL_MONTH_COLUMN}" SET NOT NULL'))
+
+    # 3. 월 파티션을 만들고 데이터를 옮긴 뒤 인덱스를 만듭니다. (적재 후 인덱스 생성이 더 빠릅니다)
+    year_months = [
+        row[0] for row in connection.execute(text(
+            f'SELECT DISTINCT "{DEAL_MONTH_COLUMN}" FROM {legacy_qualified_name} WHERE "{DEAL_MONTH_COLUMN}" IS NOT NULL'
+        ))
+    ]
+    ensure_month_partitions(connection, table_name, schema, year_months)
+    moved = connection.execute(text(
+        f'INSERT INTO {qualified_name} SELECT * FROM {legacy_qualified_name} WHERE "{DEAL_MONTH_COLUMN}" IS NOT NULL'
+    )).rowcount
+    ensure_raw_indexes(connection, table_name, schema)
+    ensure_fingerprint_index(connection, table_name, schema)
+    print(f"   SUCCESS: '{table_name}' {moved:,}건을 {len(year_months)}개 월 파티션으로 옮겼습니다.")
+
+    if drop_legacy and not unknown:
+        connection.execute(text(f"DROP TABLE {legacy_qualified_name}"))
+        print(f"   INFO: '{legacy_name}' 테이블을 삭제했습니다.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="원시 테이블을 거래연월 기준 월 파티션 테이블로 전환하고 타입 컬럼과 행 지문을 채웁니다.")
+    parser.add_argument("--tables", nargs="+", default=list(RAW_TABLES), choices=RAW_TABLES, help="전환할 원시 테이블")
+    parser.add_argument("--drop-legacy", action="store_true", help="전환이 끝난 기존 테이블(_legacy)을 삭제")
+    args = parser.parse_args()
+
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
+    database_url = os.getenv("DATABASE_URL_HOST")
+    if not database_url:
+        raise ValueError("DATABASE_URL_HOST 환경 변수가 설정되지 않았습니다.")
+    schema = os.getenv("DB_SCHEMA", "public")
+    engine = create_engine(database_url)
+
+    print("--- 원시 테이블 파티션 전환 시작 ---")
+    for table_name in args.tables:
+        print(f">> [{table_name}]")
+        # 테이블마다 하나의 트랜잭션으로 처리해, 실패하면 전환 전 상태로 돌아갑니다.
+        with engine.begin() as connection:
+            migrate_table(connection, table_name, schema, drop_legacy=args.drop_legacy)
+            # 첫 적재 때 기존 행을 채우지 않도록, 적재가 없는 시간에 타입 컬럼을 미리 추가해 둘 수 있습니다.
+            if inspect(connection).has_table(table_name, schema=schema):
+                ensure_typed_columns(connection, table_name, schema)
+                # 행 지문 도입 전에 적재된 행은 지문이 비어 있어 중복 판정에서 빠지므로 채워 둡니다. (채우기 전에는 적재 거부)
+                ensure_fingerprint_index(connection, table_name, schema)
+                backfill_fingerprints(connection, table_name, schema)
+    print("\n--- 파티션 전환 완료 ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# scripts/의 스크립트처럼 프로젝트 루트(utils)와 scripts 디렉터리를 import 경로에 추가합니다.
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.abspath(ROOT))
+sys.path.insert(0, os.path.abspath(os.path.join(ROOT, 'scripts')))
@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from utils.api_client import PRIORITY_BACKFILL, ApiQuota, ManagedTransactionPrice, QuotaExceededError
+from utils.dedup import FINGERPRINT_COLUMN, NATURAL_KEYS, add_row_fingerprint
+from utils.group_stats import broadcast, means_from_sums
+from utils.ingest_ledger import dataframe_checksum
+from utils.interval_join import has_covering_interval, recent_window_sum
+from utils.normalize import normalize_raw
+
+
+def trade_rows(**overrides):
+    """자연키(NATURAL_KEYS['매매'])를 모두 갖는 매매 응답 한 건"""
+    row = {
+        "sggCd": "11110", "umdNm": "청운동", "jibun": "1", "aptNm": "청운아파트", "excluUseAr": "84.97",
+        "floor": "3", "dealYear": "2024", "dealMonth": "7", "dealDay": "15", "dealAmount": "120,000",
+    }
+    row.update(overrides)
+    return row
+
+
+def random_keyed_frame(rng, n, with_missing=True):
+    """(단지, 면적대) 키를 갖는 무작위 DataFrame. 결측 키도 섞습니다."""
+    df = pd.DataFrame({
+        "complex_id": rng.integers(0, 6, n).astype(float),
+        "면적대": rng.choice(["소형", "중형", "대형"], n),
+    })
+    if with_missing:
+        df.loc[rng.random(n) < 0.1, "complex_id"] = np.nan
+    return df
+
+
+def random_dates(rng, n, missing=0.05):
+    dates = pd.Series(pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 400, n), unit="D"))
+    return dates.mask(rng.random(n) < missing)
+
+
+class PagedApi:
+    """응답 행 수만 정해 둔 TransactionPrice 대역"""
+
+    def __init__(self, n_rows):
+        self.n_rows = n_rows
+
+    def get_data(self, **kwargs):
+        return pd.DataFrame({"sggCd": ["11110"] * self.n_rows})
+
+
+# --- API 호출 한도 ---
+
+def test_quota_counts_every_page_of_a_paged_response(tmp_path):
+    quota = ApiQuota(create_engine(f"sqlite:///{tmp_path / 'quota.sqlite'}"), "main", daily_limit=10, reserve_ratio=0.5)
+    client = ManagedTransactionPrice(PagedApi(2500), quota=quota, priority=PRIORITY_BACKFILL, page_size=1000)
+    client.get_data("아파트", "매매", sigungu_code="11110", year_month="202407")
+    assert quota.usage("아파트/매매") == 3
+    ManagedTransactionPrice(PagedApi(0), quota=quota, page_size=1000).get_data("아파트", "매매")
+    assert quota.usage("아파트/매매") == 4
+    # 추가 페이지로 우선순위별 한도(5건)를 넘은 뒤에는 다음 호출을 보내지 않습니다.
+    client.get_data("아파트", "매매")
+    assert quota.usage("아파트/매매") == 7
+    with pytest.raises(QuotaExceededError):
+        client.get_data("아파트", "매매")
+    assert quota.usage("아파트/매매") == 7
+
+
+# --- 행 지문 ---
+
+def test_fingerprint_ignores_formatting_of_key_values():
+    df = pd.DataFrame([trade_rows(), trade_rows(excluUseAr=" 84.970 ", dealAmount="120000", floor=3.0)])
+    fingerprints = add_row_fingerprint(df, NATURAL_KEYS["매매"])[FINGERPRINT_COLUMN]
+    # 같은 거래가 두 번 나오므로 두 번째 행은 등장 순번으로 구분됩니다.
+    single = add_row_fingerprint(df.head(1), NATURAL_KEYS["매매"])[FINGERPRINT_COLUMN].iloc[0]
+    assert fingerprints.iloc[0] == single
+    assert fingerprints.iloc[0] != fingerprints.iloc[1]
+
+
+def test_fingerprint_is_stable_across_row_order_and_state_columns():
+    df = pd.DataFrame([trade_rows(), trade_rows(dealDay="16"), trade_rows(floor="12")])
+    df["cdealType"] = ""
+    before = add_row_fingerprint(df, NATURAL_KEYS["매매"])
+    # 해제여부 같은 상태값은 자연키가 아니므로 바뀌어도 같은 지문입니다.
+    changed = df.iloc[::-1].assign(cdealType="O")
+    after = add_row_fingerprint(changed, NATURAL_KEYS["매매"])
+    assert set(before[FINGERPRINT_COLUMN]) == set(after[FINGERPRINT_COLUMN])
+    assert before[FINGERPRINT_COLUMN].is_unique
+
+
+def test_fingerprint_treats_missing_key_columns_as_empty():
+    df = pd.DataFrame([trade_rows()])
+    without = add_row_fingerprint(df.drop(columns=["jibun"]), NATURAL_KEYS["매매"])
+    empty = add_row_fingerprint(df.assign(jibun=None), NATURAL_KEYS["매매"])
+    assert without[FINGERPRINT_COLUMN].iloc[0] == empty[FINGERPRINT_COLUMN].iloc[0]
+    assert add_row_fingerprint(df.head(0), NATURAL_KEYS["매매"])[FINGERPRINT_COLUMN].empty
+
+
+# --- 응답 체크섬 ---
+
+def test_checksum_ignores_row_and_column_order():
+    df = pd.DataFrame([trade_rows(), trade_rows(dealDay="16"), trade_rows(floor="12")])
+    shuffled = df.iloc[[2, 0, 1]][list(reversed(df.columns))]
+    assert dataframe_checksum(df) == dataframe_checksum(shuffled)
+    assert dataframe_checksum(df) != dataframe_checksum(df.assign(dealAmount="120,001"))
+    assert dataframe_checksum(df.head(0)) == dataframe_checksum(pd.DataFrame())
+
+
+# --- 구간 조인 ---
+
+@pytest.mark.parametrize("seed", range(5))
+def test_has_covering_interval_matches_merge(seed):
+    rng = np.random.default_rng(seed)
+    points = random_keyed_frame(rng, 300).assign(거래일자=random_dates(rng, 300))
+    intervals = random_keyed_frame(rng, 200)
+    intervals["시작일"] = random_dates(rng, 200)
+    intervals["종료일"] = intervals["시작일"] + pd.to_timedelta(rng.integers(0, 120, 200), unit="D")
+    key = ["complex_id", "면적대"]
+
+    merged = points.reset_index().merge(intervals, on=key)
+    covered = merged[(merged["시작일"] <= merged["거래일자"]) & (merged["거래일자"] <= merged["종료일"])]
+    expected = points.index.isin(covered["index"])
+
+    result = has_covering_interval(points, intervals, key, "거래일자", "시작일", "종료일")
+    np.testing.assert_array_equal(result, expected)
+    # 카테고리 키도 같은 결과입니다.
+    categorical = has_covering_interval(
+        points.astype({"면적대": "category"}), intervals.astype({"면적대": "category"}), key, "거래일자", "시작일", "종료일"
+    )
+    np.testing.assert_array_equal(categorical, expected)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_recent_window_sum_matches_merge(seed):
+    rng = np.random.default_rng(seed)
+    points = random_keyed_frame(rng, 300).assign(거래일자=random_dates(rng, 300))
+    events = random_keyed_frame(rng, 400).assign(계약일자=random_dates(rng, 400), 보증금=rng.integers(1, 1000, 400).astype(float))
+    events.loc[rng.random(400) < 0.1, "보증금"] = np.nan
+    key, window_days = ["complex_id", "면적대"], 90
+
+    merged = points.reset_index().merge(events.dropna(subset=["보증금"]), on=key)
+    in_window = merged[
+        (merged["계약일자"] <= merged["거래일자"])
+        & (merged["계약일자"] >= merged["거래일자"] - pd.Timedelta(days=window_days))
+    ]
+    grouped = in_window.groupby("index")["보증금"]
+    expected_sum = grouped.sum().reindex(points.index, fill_value=0.0).to_numpy()
+    expected_count = grouped.count().reindex(points.index, fill_value=0).to_numpy()
+
+    totals, counts = recent_window_sum(points, events, key, "거래일자", "계약일자", "보증금", window_days)
+    np.testing.assert_allclose(totals, expected_sum)
+    np.testing.assert_array_equal(counts, expected_count)
+
+
+# --- 원시 응답 정규화 ---
+
+def test_normalize_raw_trade_from_korean_columns():
+    df = pd.DataFrame({
+        "법정동시군구코드": ["11110", "11110", "11110"], "전용면적": ["84.97", " 59.9 ", "x"],
+        "층": ["-1", "12", ""], "건축년도": ["2001", "1999", None], "거래금액": ["120,000", "85,500", "1.5"],
+        "계약년도": ["2024", "2024", "2024"], "계약월": ["2", "7", "7"], "계약일": ["30", "15", "1"],
+    })
+    result = normalize_raw(df, "매매")
+    assert "sggCd" in result.columns and "법정동시군구코드" not in result.columns
+    assert result["deal_amount"].tolist()[:2] == [120000, 85500] and pd.isna(result["deal_amount"].iloc[2])
+    assert result["floor_no"].iloc[0] == -1 and pd.isna(result["floor_no"].iloc[2])
+    np.testing.assert_allclose(result["area_m2"].iloc[:2], [84.97, 59.9])
+    assert pd.isna(result["area_m2"].iloc[2])
+    # 2월 30일처럼 존재하지 않는 날짜는 결측입니다.
+    assert pd.isna(result["deal_date"].iloc[0]) and result["deal_date"].iloc[1] == pd.Timestamp("2024-07-15")
+
+
+def test_normalize_raw_rent_contract_term_and_missing_fields():
+    df = pd.DataFrame({"deposit": ["30,000", "5,000"], "monthlyRent": ["0", "120"], "contractTerm": ["24.03~26.03", ""]})
+    result = normalize_raw(df, "전월세")
+    assert result["deposit_amount"].tolist() == [30000, 5000]
+    assert result["contract_start"].iloc[0] == pd.Timestamp("2024-03-01")
+    assert result["contract_end"].iloc[0] == pd.Timestamp("2026-03-01")
+    assert pd.isna(result["contract_start"].iloc[1])
+    # 응답에 없는 필드로 계산하는 컬럼은 결측입니다.
+    assert result["deal_date"].isna().all() and result["area_m2"].isna().all()
+    with pytest.raises(ValueError):
+        normalize_raw(df, "분양권")
+
+
+# --- 합계/건수 평균 ---
+
+def test_means_from_sums_equals_mean_of_all_rows():
+    rng = np.random.default_rng(0)
+    rows = pd.DataFrame({"sggnm": rng.choice(["종로구", "중구"], 500), "umdnm": rng.choice(["가", "나", "다"], 500),
+                         "value": rng.random(500) * 100})
+    # 청크별 동 단위 (합계, 건수)를 합쳐 자치구 평균을 구해도 전체 행의 평균과 같습니다.
+    chunks = [
+        chunk.groupby(["sggnm", "umdnm"], as_index=False)["value"].agg(value_sum="sum", value_count="count")
+        for chunk in (rows.iloc[start:start + 70] for start in range(0, len(rows), 70))
+    ]
+    means = means_from_sums(pd.concat(chunks, ignore_index=True), ["sggnm"])
+    pd.testing.assert_series_equal(means.sort_index(), rows.groupby("sggnm")["value"].mean(), check_names=False)
+
+    zero = pd.DataFrame({"sggnm": ["종로구"], "value_sum": [0.0], "value_count": [0]})
+    assert means_from_sums(zero, ["sggnm"]).isna().all()
+
+
+def test_broadcast_fills_group_statistics_per_row():
+    stats = pd.DataFrame(
+        {"mean": [1.0, 2.0]}, index=pd.MultiIndex.from_tuples([("종로구", "가"), ("중구", "나")], names=["sggnm", "umdnm"])
+    )
+    df = pd.DataFrame({"시군구명": ["중구", "종로구", "중구", "용산구"], "읍면동명": ["나", "가", "나", "다"]})
+    result = broadcast(df, ["시군구명", "읍면동명"], stats, {"mean": "평균", "median": "중위값"})
+    np.testing.assert_array_equal(result["평균"].to_numpy(), [2.0, 1.0, 2.0, np.nan])
+    # 통계에 없는 컬럼은 결측으로 채웁니다.
+    assert result["중위값"].isna().all()
+    assert broadcast(df.head(0), ["시군구명", "읍면동명"], stats, {"mean": "평균"}).empty
@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+import build_features as bf
+from utils.bulk_load import bulk_load
+from utils.complex_index import ensure_complex_tables
+from utils.feature_state import STATS_TABLE, get_changed_partitions
+from utils.ingest_ledger import record_partition
+from utils.normalize import normalize_raw
+from utils.raw_schema import DEAL_MONTH_COLUMN, add_deal_month
+from utils.synthetic_molit import iter_synthetic_rows
+
+SCHEMA = "main"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """합성 원시 데이터(적재 시점과 같이 타입 컬럼과 거래연월을 붙임)로 전체 빌드를 마친 SQLite DB"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'features.sqlite'}")
+    for kind, table_name in (("매매", "raw_apt_trade"), ("전월세", "raw_apt_jeonse")):
+        for chunk in iter_synthetic_rows(kind, 1500, n_complexes=30, seed=1):
+            bulk_load(add_deal_month(normalize_raw(chunk, kind)), table_name, engine, SCHEMA, if_exists="replace")
+    ensure_complex_tables(engine, SCHEMA)
+    bf.run_full_build(engine, SCHEMA, publish="replace")
+    return engine
+
+
+def largest_partition(connection, table_name):
+    """행이 가장 많은 (시군구코드, 'YYYYMM') 파티션"""
+    code, year_month = connection.execute(text(
+        f'SELECT "sggCd", "{DEAL_MONTH_COLUMN}" FROM "{table_name}" GROUP BY 1, 2 ORDER BY COUNT(*) DESC, 1, 2 LIMIT 1'
+    )).one()
+    return str(code), str(year_month)
+
+
+def reload_partitions(engine):
+    """
+    매매/전월세 파티션 하나씩의 원시 거래 일부를 지우고 일부 매매 금액을 바꾼 뒤, 원장에 다시 적재한 것으로 기록합니다.
+    (재수집으로 바뀐 파티션)
+    """
+    with engine.begin() as connection:
+        trade_part, rent_part = largest_partition(connection, "raw_apt_trade"), largest_partition(connection, "raw_apt_jeonse")
+        where = f'"sggCd" = :code AND "{DEAL_MONTH_COLUMN}" = :ym'
+        trade_params = {"code": trade_part[0], "ym": int(trade_part[1])}
+        connection.execute(text(f"DELETE FROM raw_apt_trade WHERE {where} AND rowid % 3 = 0"), trade_params)
+        connection.execute(text(f"UPDATE raw_apt_trade SET deal_amount = deal_amount * 2 WHERE {where} AND rowid % 3 = 1"), trade_params)
+        connection.execute(text(f"DELETE FROM raw_apt_jeonse WHERE {where} AND rowid % 2 = 0"),
+                           {"code": rent_part[0], "ym": int(rent_part[1])})
+        record_partition(connection, SCHEMA, "매매", *trade_part, "success", row_count=0)
+        record_partition(connection, SCHEMA, "전월세", *rent_part, "success", row_count=0)
+
+
+def read_tables(engine):
+    """모든 피처/분석 테이블과 동별 누적 통계를 정렬해 읽습니다."""
+    frames = {}
+    with engine.connect() as connection:
+        for table_name in bf.FEATURE_TABLES + [STATS_TABLE]:
+            df = pd.read_sql(text(f'SELECT * FROM "{table_name}"'), connection)
+            if table_name == STATS_TABLE:
+                df = df[df["value_count"] > 0].drop(columns="updated_at")
+            frames[table_name] = df.sort_values(list(df.columns)).reset_index(drop=True)
+    return frames
+
+
+def test_incremental_build_matches_full_build(engine):
+    reload_partitions(engine)
+    bf.run_incremental_build(engine, SCHEMA)
+
+    with engine.connect() as connection:
+        # 반영한 원장 행은 built_at이 기록되어 다음 증분 빌드의 대상이 아닙니다.
+        assert get_changed_partitions(connection, SCHEMA).empty
+    incremental = read_tables(engine)
+
+    # 같은 원시 데이터로 전체 빌드를 다시 해서(compute_features 결과와 동별 누적 통계를 저장) 모든 테이블을 비교합니다.
+    bf.run_full_build(engine, SCHEMA, publish="replace")
+    full = read_tables(engine)
+    for table_name, expected in full.items():
+        pd.testing.assert_frame_equal(incremental[table_name], expected[incremental[table_name].columns], check_dtype=False,
+                                      rtol=1e-6, obj=table_name)
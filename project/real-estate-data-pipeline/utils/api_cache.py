@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'api_cache')
+
+# (거래월 기준 경과 개월 수 상한, 캐시 유효 시간(초)). 위에서부터 처음 맞는 규칙을 사용합니다.
+# 최근 거래월은 지연 신고/해제가 계속 반영되므로 짧게, 1년이 지난 거래월은 바뀌지 않으므로 만료 없이 보관합니다.
+DEFAULT_TTL_RULES = [
+    (2, 24 * 3600),
+    (12, 7 * 24 * 3600),
+    (None, None),
+]
+
+# 빈 응답은 API 장애/일시적 오류일 수 있으므로, 거래월과 관계없이 가장 짧은 유효 시간만 재사용합니다.
+EMPTY_RESPONSE_TTL = DEFAULT_TTL_RULES[0][1]
+
+# 캐시 동작 모드
+#   default : 캐시에 유효한 응답이 있으면 사용하고, 없으면 API를 호출해 저장합니다.
+#   replay  : 캐시에서만 읽습니다. 없으면 CacheMissError를 발생시킵니다. (오프라인 개발/테스트용)
+#   refresh : 항상 API를 호출하고 캐시를 갱신합니다.
+#   off     : 캐시를 사용하지 않습니다.
+CACHE_MODES = ("default", "replay", "refresh", "off")
+
+
+class CacheMissError(LookupError):
+    """replay 모드에서 캐시에 없는 요청을 했을 때 발생합니다."""
+
+
+def months_since(year_month: str, now: datetime = None) -> int:
+    """'YYYYMM' 거래월이 현재로부터 몇 개월 전인지 반환합니다."""
+    now = now or datetime.now()
+    return (now.year - int(year_month[:4])) * 12 + (now.month - int(year_month[4:6]))
+
+
+class CachedTransactionPrice:
+    """
+    PublicDataReader `TransactionPrice`를 감싸, 응답을 요청 파라미터 기준으로 디스크(Parquet)에 캐시합니다.
+    `get_data`의 시그니처는 원래 객체와 같으므로 기존 코드에서 api 객체만 바꿔 끼우면 됩니다.
+
+    Args:
+        api: PublicDataReader.TransactionPrice 인스턴스 (replay 모드에서는 None 가능)
+        cache_dir (str): 캐시 디렉터리
+        mode (str): CACHE_MODES 중 하나
+        max_bytes (int): 캐시 전체 크기 상한. 넘으면 가장 오래 사용하지 않은 파일부터 지웁니다. (None이면 무제한)
+        ttl_rules (list): (경과 개월 수 상한, 유효 시간(초)) 규칙 목록
+    """
+
+    def __init__(self, api, cache_dir: str = DEFAULT_CACHE_DIR, mode: str = "default", max_bytes: int = None, ttl_rules: list = None):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"지원하지 않는 캐시 모드입니다: {mode} (가능한 값: {CACHE_MODES})")
+        self.api = api
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.ttl_rules = ttl_rules or DEFAULT_TTL_RULES
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "evicted": 0}
+        self._lock = threading.Lock()
+        # 백필의 수집 스레드들이 함께 갱신하는 카운터용 잠금 (evict()의 _lock과 분리)
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, api):
+        """API_CACHE_DIR, API_CACHE_MODE, API_CACHE_MAX_MB 환경 변수로 캐시를 구성합니다."""
+        max_mb = os.getenv("API_CACHE_MAX_MB")
+        return cls(
+            api,
+            cache_dir=os.getenv("API_CACHE_DIR", DEFAULT_CACHE_DIR),
+            mode=os.getenv("API_CACHE_MODE", "default"),
+            max_bytes=int(float(max_mb) * 1024 ** 2) if max_mb else None,
+        )
+
+    def cache_path(self, **params) -> str:
+        """요청 파라미터로 캐시 파일 경로를 만듭니다. (같은 파라미터는 항상 같은 경로)"""
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(
+            self.cache_dir,
+            str(params.get("property_type")),
+            str(params.get("trade_type")),
+            str(params.get("sigungu_code")),
+            f"{params.get('year_month')}-{digest}.parquet",
+        )
+
+    def ttl_seconds(self, year_month: str):
+        """거래월의 경과 개월 수에 맞는 캐시 유효 시간(초)을 반환합니다. None이면 만료되지 않습니다."""
+        age = months_since(year_month)
+        for max_age, ttl in self.ttl_rules:
+            if max_age is None or age <= max_age:
+                return ttl
+        return None
+
+    def is_fresh(self, path: str, year_month: str) -> bool:
+        """캐시 파일이 존재하고 아직 유효한지 확인합니다. 빈 응답은 EMPTY_RESPONSE_TTL까지만 유효합니다."""
+        try:
+            age = time.time() - os.path.getmtime(path)
+            ttl = self.ttl_seconds(year_month)
+            if pq.ParquetFile(path).metadata.num_rows == 0:
+                ttl = EMPTY_RESPONSE_TTL if ttl is None else min(ttl, EMPTY_RESPONSE_TTL)
+        except FileNotFoundError:
+            # 없는 파일이거나, 확인하는 사이에 evict()가 지운 파일
+            return False
+        return ttl is None or age <= ttl
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get_data(self, property_type: str, trade_type: str, sigungu_code: str, year_month: str, **kwargs) -> pd.DataFrame:
+        """TransactionPrice.get_data와 같은 인자로 호출합니다."""
+        if self.mode == "off":
+            return self.api.get_data(property_type=property_type, trade_type=trade_type, sigungu_code=sigungu_code, year_month=year_month, **kwargs)
+
+        params = dict(property_type=property_type, trade_type=trade_type, sigungu_code=sigungu_code, year_month=year_month, **kwargs)
+        path = self.cache_path(**params)
+
+        if self.mode == "replay":
+            df = self._read(path)
+            if df is None:
+                self._count("misses")
+                raise CacheMissError(f"캐시에 없는 요청입니다: {params}")
+            return df
+
+        if self.mode == "default" and self.is_fresh(path, year_month):
+            df = self._read(path)
+            if df is not None:
+                return df
+        if os.path.exists(path):
+            self._count("stale")
+        else:
+            self._count("misses")
+
+        df = self.api.get_data(**params)
+        df = pd.DataFrame(df) if df is not None else pd.DataFrame()
+        self._write(path, df)
+        return df
+
+    def _read(self, path: str):
+        """캐시 파일을 읽습니다. 없거나 다른 스레드의 evict()가 먼저 지웠으면 None(캐시 미스)을 반환합니다."""
+        try:
+            # 읽은 시각을 접근 시각(atime)으로 남겨 LRU 삭제 순서에 반영합니다. (mtime은 유효 시간 계산에 쓰므로 유지)
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+            df = pd.read_parquet(path)
+        except FileNotFoundError:
+            return None
+        self._count("hits")
+        return df
+
+    def _write(self, path: str, df: pd.DataFrame):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 여러 워커가 동시에 쓰더라도 깨진 파일이 보이지 않도록 임시 파일에 쓴 뒤 교체합니다.
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        if self.max_bytes is not None:
+            self.evict()
+
+    def evict(self):
+        """캐시 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 파일부터 지웁니다."""
+        with self._lock:
+            entries = []
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if name.endswith(".parquet"):
+                        file_path = os.path.join(root, name)
+                        stat = os.stat(file_path)
+                        entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, file_path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, file_path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    continue
+                total -= size
+                self._count("evicted")
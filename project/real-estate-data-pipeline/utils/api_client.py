@@ -0,0 +1,290 @@
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from sqlalchemy import text
+
+from utils.run_metrics import observe_api_call
+
+QUOTA_TABLE = "api_quota"
+
+# 공공데이터포털의 일일 호출 한도는 한국 시간 자정에 초기화됩니다.
+KST = timezone(timedelta(hours=9))
+
+# 호출 우선순위 (숫자가 작을수록 먼저 처리)
+#   scheduled  : 월간 DAG. 일일 한도 전체를 사용할 수 있습니다.
+#   interactive: 노트북/분석 스크립트 (국토부API/util.py)
+#   backfill   : 과거 데이터 대량 적재
+# scheduled가 아닌 호출은 한도 중 reserve_ratio 만큼을 남겨 두어, 백필이 한도를 다 써도 DAG는 실행될 수 있습니다.
+PRIORITY_SCHEDULED = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BACKFILL = 2
+
+
+class QuotaExceededError(RuntimeError):
+    """오늘 사용할 수 있는 API 호출 한도를 모두 사용했을 때 발생합니다."""
+
+
+class ApiQuota:
+    """
+    API별 일일 호출 수를 DB의 한 행에 기록해, 여러 프로세스(DAG 태스크, 백필, 노트북)가 같은 한도를 나눠 씁니다.
+    호출 전에 consume()으로 1건을 예약하며, 증가와 한도 확인은 한 문장(UPSERT)으로 처리되어 동시에 호출해도 한도를 넘지 않습니다.
+
+    Args:
+        engine: SQLAlchemy 엔진
+        schema (str): 카운터 테이블 스키마
+        daily_limit (int): API별 일일 호출 한도
+        reserve_ratio (float): scheduled 우선순위만 사용할 수 있도록 남겨 둘 한도 비율
+    """
+
+    def __init__(self, engine, schema: str, daily_limit: int, reserve_ratio: float = 0.2):
+        self.engine = engine
+        self.schema = schema
+        self.daily_limit = daily_limit
+        self.reserve_ratio = reserve_ratio
+        self._table_ready = False
+
+    def ensure_table(self):
+        """호출 수 카운터 테이블을 생성합니다. 이미 존재하면 아무 작업도 하지 않습니다."""
+        if self._table_ready:
+            return
+        with self.engine.begin() as connection:
+            # 여러 프로세스가 처음 호출할 때 동시에 CREATE TABLE이 실행되지 않도록 트랜잭션 잠금을 잡습니다. (PostgreSQL)
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": QUOTA_TABLE})
+            connection.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {self.schema}."{QUOTA_TABLE}" (
+                    quota_day   DATE         NOT NULL,
+                    api_name    VARCHAR(64)  NOT NULL,
+                    used        INTEGER      NOT NULL DEFAULT 0,
+                    updated_at  TIMESTAMP    NOT NULL,
+                    PRIMARY KEY (quota_day, api_name)
+                )
+            """))
+        self._table_ready = True
+
+    def allowed(self, priority: int) -> int:
+        """우선순위별로 오늘 사용할 수 있는 최대 호출 수를 반환합니다."""
+        if priority <= PRIORITY_SCHEDULED:
+            return self.daily_limit
+        return int(self.daily_limit * (1 - self.reserve_ratio))
+
+    def _increment(self, api_name: str, count: int, allowed: int = None):
+        """오늘의 호출 수를 count만큼 늘리고 누적 호출 수를 반환합니다. allowed를 넘게 되면 늘리지 않고 None을 반환합니다."""
+        self.ensure_table()
+        limit_clause = f"WHERE {QUOTA_TABLE}.used + :count <= :allowed" if allowed is not None else ""
+        with self.engine.begin() as connection:
+            return connection.execute(text(f"""
+                INSERT INTO {self.schema}."{QUOTA_TABLE}" (quota_day, api_name, used, updated_at)
+                VALUES (:quota_day, :api_name, :count, :updated_at)
+                ON CONFLICT (quota_day, api_name) DO UPDATE SET
+                    used = {QUOTA_TABLE}.used + :count,
+                    updated_at = EXCLUDED.updated_at
+                {limit_clause}
+                RETURNING used
+            """), {
+                "quota_day": datetime.now(KST).date(),
+                "api_name": api_name,
+                "count": count,
+                "updated_at": datetime.now(),
+                "allowed": allowed,
+            }).scalar()
+
+    def consume(self, api_name: str, priority: int = PRIORITY_BACKFILL) -> int:
+        """
+        오늘의 호출 수를 1 늘립니다. 우선순위별 한도를 넘으면 QuotaExceededError를 발생시킵니다.
+
+        Returns:
+            int: 이번 호출을 포함한 오늘의 누적 호출 수
+        """
+        allowed = self.allowed(priority)
+        if allowed <= 0:
+            raise QuotaExceededError(f"[{api_name}] 우선순위 {priority}에 허용된 호출 한도가 없습니다.")
+        used = self._increment(api_name, 1, allowed)
+        if used is None:
+            raise QuotaExceededError(f"[{api_name}] 오늘의 호출 한도({allowed}건, 우선순위 {priority})를 모두 사용했습니다.")
+        return used
+
+    def charge(self, api_name: str, count: int) -> int:
+        """
+        이미 보낸 호출 count건을 한도와 관계없이 기록합니다. (페이지를 나눠 받은 응답의 추가 페이지)
+        한도를 넘게 되어도 실제로 사용한 호출이므로 그대로 기록하고, 이후의 consume()이 한도 초과로 거절됩니다.
+
+        Returns:
+            int: 오늘의 누적 호출 수
+        """
+        return self._increment(api_name, count)
+
+    def usage(self, api_name: str) -> int:
+        """오늘의 누적 호출 수를 반환합니다."""
+        self.ensure_table()
+        with self.engine.connect() as connection:
+            used = connection.execute(text(f"""
+                SELECT used FROM {self.schema}."{QUOTA_TABLE}" WHERE quota_day = :quota_day AND api_name = :api_name
+            """), {"quota_day": datetime.now(KST).date(), "api_name": api_name}).scalar()
+        return used or 0
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD(가산 증가, 승산 감소) 방식으로 동시 호출 수를 조절하는 제한기입니다.
+    - 호출이 성공하면 동시 호출 한도를 조금씩(한도가 n이면 n번 성공마다 1) 늘립니다.
+    - 오류가 나거나 응답이 slow_seconds보다 느리면 한도를 decrease_factor 배로 줄입니다.
+      같은 시점에 보낸 호출들이 한꺼번에 실패해도 한 번만 줄이도록, 줄인 뒤 cooldown 동안은 다시 줄이지 않습니다.
+    빈 자리를 기다리는 호출은 우선순위(숫자가 작을수록 먼저), 같은 우선순위는 먼저 온 순서로 자리를 얻습니다.
+
+    Args:
+        max_limit (int): 동시 호출 한도의 상한 (워커 수)
+        min_limit (int): 동시 호출 한도의 하한
+        initial_limit (int): 시작 한도 (기본값: min_limit과 max_limit의 중간)
+        decrease_factor (float): 실패 시 한도에 곱할 비율
+        slow_seconds (float): 이보다 오래 걸린 호출은 실패와 같이 취급합니다. (None이면 사용하지 않음)
+        cooldown (float): 한도를 줄인 뒤 다시 줄이지 않는 시간(초)
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial_limit: int = None,
+        decrease_factor: float = 0.5,
+        slow_seconds: float = 30.0,
+        cooldown: float = 5.0,
+    ):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(initial_limit or max(self.min_limit, (self.min_limit + self.max_limit) // 2))
+        self.decrease_factor = decrease_factor
+        self.slow_seconds = slow_seconds
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.stats = {"success": 0, "failure": 0, "decreases": 0}
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._last_decrease = float("-inf")
+        self._condition = threading.Condition()
+
+    def acquire(self, priority: int = PRIORITY_BACKFILL):
+        """동시 호출 자리가 날 때까지 대기합니다."""
+        with self._condition:
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, entry)
+            while self._waiters[0] != entry or self.in_flight >= int(self.limit):
+                self._condition.wait()
+            heapq.heappop(self._waiters)
+            self.in_flight += 1
+            # 한도에 여유가 남아 있으면 다음 대기자도 바로 진행할 수 있도록 깨웁니다.
+            self._condition.notify_all()
+
+    def release(self, success: bool, duration: float = None):
+        """호출 결과를 반영해 한도를 조절하고 자리를 반납합니다."""
+        if success and self.slow_seconds is not None and duration is not None and duration > self.slow_seconds:
+            success = False
+        with self._condition:
+            self.in_flight -= 1
+            if success:
+                self.stats["success"] += 1
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            else:
+                self.stats["failure"] += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+                    self.stats["decreases"] += 1
+            self._condition.notify_all()
+
+
+class ManagedTransactionPrice:
+    """
+    PublicDataReader `TransactionPrice`를 감싸, 모든 API 호출이 일일 한도(ApiQuota)와
+    적응형 동시성 제한(AdaptiveConcurrency)을 거치도록 합니다. `get_data`의 시그니처는 원래 객체와 같습니다.
+    캐시 히트는 한도를 쓰지 않도록 CachedTransactionPrice의 안쪽에 둡니다.
+
+    TransactionPrice.get_data는 한 번의 호출 안에서 응답을 page_size 행씩 여러 페이지로 나눠 요청하므로,
+    첫 페이지는 호출 전에 예약(consume)하고 나머지 페이지는 받은 행 수로 계산해 호출 후에 기록(charge)합니다.
+
+        api = CachedTransactionPrice.from_env(ManagedTransactionPrice.from_env(TransactionPrice(key), engine, schema))
+
+    Args:
+        api: PublicDataReader.TransactionPrice 인스턴스
+        quota (ApiQuota): 일일 호출 한도 카운터 (None이면 한도를 세지 않음)
+        concurrency (AdaptiveConcurrency): 동시 호출 제한기 (None이면 제한하지 않음)
+        priority (int): 이 클라이언트로 보내는 호출의 우선순위
+        page_size (int): TransactionPrice가 한 페이지에 요청하는 행 수 (numOfRows)
+    """
+
+    def __init__(
+        self,
+        api,
+        quota: ApiQuota = None,
+        concurrency: AdaptiveConcurrency = None,
+        priority: int = PRIORITY_BACKFILL,
+        page_size: int = 1000,
+    ):
+        self.api = api
+        self.quota = quota
+        self.concurrency = concurrency
+        self.priority = priority
+        self.page_size = page_size
+
+    @classmethod
+    def from_env(
+        cls,
+        api,
+        engine=None,
+        schema: str = "public",
+        priority: int = PRIORITY_BACKFILL,
+        max_concurrency: int = None,
+        adaptive: bool = True,
+    ):
+        """
+        API_DAILY_QUOTA(기본값 10000), API_QUOTA_RESERVE(기본값 0.2), API_MAX_CONCURRENCY(기본값 8),
+        API_PAGE_SIZE(기본값 1000) 환경 변수로 클라이언트를 구성합니다. engine이 없으면 일일 한도는 세지 않습니다.
+        AdaptiveConcurrency는 한 프로세스 안의 호출만 조절하므로, 호출마다 프로세스가 새로 뜨는 곳(Airflow 태스크)에서는
+        adaptive=False로 제한기를 만들지 않고 프로세스 밖의 제한(Airflow 풀)에 맡깁니다.
+        """
+        quota = None
+        if engine is not None:
+            quota = ApiQuota(
+                engine,
+                schema,
+                daily_limit=int(os.getenv("API_DAILY_QUOTA", "10000")),
+                reserve_ratio=float(os.getenv("API_QUOTA_RESERVE", "0.2")),
+            )
+        concurrency = None
+        if adaptive:
+            concurrency = AdaptiveConcurrency(max_concurrency or int(os.getenv("API_MAX_CONCURRENCY", "8")))
+        page_size = int(os.getenv("API_PAGE_SIZE", "1000"))
+        return cls(api, quota=quota, concurrency=concurrency, priority=priority, page_size=page_size)
+
+    def get_data(self, property_type: str, trade_type: str, **kwargs) -> pd.DataFrame:
+        """TransactionPrice.get_data와 같은 인자로 호출합니다."""
+        # 공공데이터포털의 호출 한도는 API(부동산 유형 x 거래 유형)별로 따로 주어집니다.
+        api_name = f"{property_type}/{trade_type}"
+        if self.quota is not None:
+            self.quota.consume(api_name, self.priority)
+        if self.concurrency is not None:
+            self.concurrency.acquire(self.priority)
+
+        started_at = time.monotonic()
+        success = False
+        try:
+            df = self.api.get_data(property_type=property_type, trade_type=trade_type, **kwargs)
+            success = True
+            # 첫 페이지는 위에서 예약했으므로 나머지 페이지만 기록합니다.
+            extra_pages = math.ceil(len(df) / self.page_size) - 1 if df is not None else 0
+            if self.quota is not None and extra_pages > 0:
+                self.quota.charge(api_name, extra_pages)
+            return df
+        finally:
+            duration = time.monotonic() - started_at
+            if self.concurrency is not None:
+                self.concurrency.release(success, duration)
+            # 진행 중인 실행이 있으면 시군구별 API 지연 시간 히스토그램에 기록합니다.
+            observe_api_call(api_name, kwargs.get("sigungu_code"), duration, success)
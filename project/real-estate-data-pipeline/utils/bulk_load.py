@@ -0,0 +1,90 @@
+import csv
+import io
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# COPY 한 번에 흘려보낼 기본 행 수
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def copy_rows(connection, qualified_name: str, columns: list, rows):
+    """
+    행(tuple) 목록을 CSV로 직렬화한 뒤 PostgreSQL `COPY ... FROM STDIN`으로 한 번에 흘려보냅니다.
+    SQLAlchemy Connection 아래의 DBAPI(psycopg2) 연결을 그대로 사용하므로 호출한 쪽의 트랜잭션 안에서 실행됩니다.
+    """
+    dbapi_conn = connection.connection
+    with dbapi_conn.cursor() as cursor:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(rows)
+        buffer.seek(0)
+
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        cursor.copy_expert(f"COPY {qualified_name} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def copy_insert(table, conn, keys, data_iter):
+    """pandas `to_sql(method=...)`에 전달하는 COPY 기반 삽입 함수입니다."""
+    qualified_name = f'{table.schema}."{table.name}"' if table.schema else f'"{table.name}"'
+    copy_rows(conn, qualified_name, keys, data_iter)
+
+
+def append_rows(connection, df: pd.DataFrame, qualified_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    이미 존재하는 테이블(임시 테이블 포함)에 DataFrame의 행을 추가합니다.
+    `to_sql`과 달리 테이블 존재 여부를 확인하거나 생성하지 않습니다.
+    """
+    columns = list(df.columns)
+    values = df.astype(object).where(df.notna(), None)
+    if connection.dialect.name == "postgresql":
+        for start in range(0, len(values), chunk_size):
+            copy_rows(connection, qualified_name, columns, values.iloc[start:start + chunk_size].itertuples(index=False, name=None))
+        return len(df)
+
+    placeholders = ", ".join(f":p{i}" for i in range(len(columns)))
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    query = text(f"INSERT INTO {qualified_name} ({column_list}) VALUES ({placeholders})")
+    for start in range(0, len(values), chunk_size):
+        chunk = values.iloc[start:start + chunk_size]
+        connection.execute(query, [
+            {f"p{i}": value for i, value in enumerate(row)}
+            for row in chunk.itertuples(index=False, name=None)
+        ])
+    return len(df)
+
+
+def bulk_load(df: pd.DataFrame, table_name: str, connectable, schema: str, if_exists: str = "append", chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    DataFrame을 테이블에 대량 적재합니다.
+
+    PostgreSQL이면 chunk_size 행씩 COPY FROM STDIN으로 적재하고, 그 외 DB(SQLite 등)는
+    pandas 기본 INSERT로 대체합니다. 테이블 생성/교체(if_exists)는 pandas `to_sql`의 동작을 그대로 따릅니다.
+
+    Args:
+        df (pd.DataFrame): 적재할 데이터
+        table_name (str): 대상 테이블 이름
+        connectable: SQLAlchemy Engine 또는 Connection. Engine이면 하나의 트랜잭션을 열어 적재합니다.
+        schema (str): 대상 스키마
+        if_exists (str): 'append' | 'replace' | 'fail'
+        chunk_size (int): COPY 한 번에 보낼 행 수
+
+    Returns:
+        int: 적재한 행 수
+    """
+    if isinstance(connectable, Engine):
+        with connectable.begin() as connection:
+            return bulk_load(df, table_name, connection, schema, if_exists=if_exists, chunk_size=chunk_size)
+
+    is_postgres = connectable.dialect.name == "postgresql"
+    df.to_sql(
+        name=table_name,
+        con=connectable,
+        schema=schema,
+        if_exists=if_exists,
+        index=False,
+        chunksize=chunk_size,
+        method=copy_insert if is_postgres else None,
+    )
+    return len(df)
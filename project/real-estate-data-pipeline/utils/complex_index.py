@@ -0,0 +1,138 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from utils.bulk_load import append_rows
+from utils.feature_schema import as_float64
+
+# 아파트 단지 / (단지, 전용면적) 평형 식별 테이블
+# 한 번 부여한 ID는 바뀌지 않으며, 처음 보는 단지/평형에만 새 ID를 부여합니다.
+COMPLEX_TABLE = "dim_apt_complex"
+UNIT_TYPE_TABLE = "dim_apt_unit_type"
+
+# 단지를 구분하는 자연키: 시군구코드 + 읍면동명 + 지번 + 표기를 정규화한 아파트명
+COMPLEX_KEY = ["sgg_code", "umd_name", "jibun", "name_key"]
+# 평형을 구분하는 자연키: 단지 + 전용면적(소수점 둘째 자리)
+UNIT_TYPE_KEY = ["complex_id", "area_m2"]
+
+# 피처 DataFrame에 추가하는 정수 키 컬럼
+ID_COLUMNS = ["complex_id", "unit_type_id"]
+
+# 아파트명 비교 시 무시하는 문자 (공백, 괄호, 구두점)
+NAME_IGNORED_PATTERN = r"[\s()\[\]{}<>·.,\-_'\"]"
+
+
+def ensure_complex_tables(engine, schema: str):
+    """단지/평형 식별 테이블을 생성합니다. 이미 존재하면 아무 작업도 하지 않습니다."""
+    with engine.begin() as connection:
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {schema}."{COMPLEX_TABLE}" (
+                complex_id BIGINT       PRIMARY KEY,
+                sgg_code   VARCHAR(10)  NOT NULL,
+                umd_name   VARCHAR(64)  NOT NULL,
+                jibun      VARCHAR(64)  NOT NULL,
+                name_key   VARCHAR(128) NOT NULL,
+                apt_name   VARCHAR(128),
+                created_at TIMESTAMP    NOT NULL,
+                UNIQUE (sgg_code, umd_name, jibun, name_key)
+            )
+        """))
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {schema}."{UNIT_TYPE_TABLE}" (
+                unit_type_id BIGINT           PRIMARY KEY,
+                complex_id   BIGINT           NOT NULL,
+                area_m2      DOUBLE PRECISION NOT NULL,
+                created_at   TIMESTAMP        NOT NULL,
+                UNIQUE (complex_id, area_m2)
+            )
+        """))
+
+
+def complex_name_key(names: pd.Series) -> pd.Series:
+    """
+    아파트명의 표기 차이를 없앤 비교용 이름을 만듭니다.
+    전각/반각, 대소문자, 공백/괄호/구두점, '아파트' 접미사가 달라도 같은 단지로 봅니다. (예: '래미안(대치)' = '래미안 대치아파트')
+    """
+    key = names.astype(str).str.normalize("NFKC").str.lower().str.replace(NAME_IGNORED_PATTERN, "", regex=True)
+    return key.str.replace(r"아파트$", "", regex=True).where(names.notna(), "")
+
+
+def complex_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """피처 DataFrame(시군구코드, 읍면동명, 지번, 아파트명)의 행마다 단지 자연키를 만듭니다."""
+    def text_column(column):
+        return df[column].astype(object).where(df[column].notna(), "").astype(str).str.strip()
+
+    return pd.DataFrame({
+        "sgg_code": text_column("시군구코드"),
+        "umd_name": text_column("읍면동명"),
+        "jibun": text_column("지번"),
+        "name_key": complex_name_key(df["아파트명"].astype(object)),
+        "apt_name": df["아파트명"].astype(object),
+    }, index=df.index)
+
+
+def _resolve_ids(connection, schema: str, table_name: str, id_column: str, key_columns: list, keys: pd.DataFrame, existing_sql, params: dict) -> np.ndarray:
+    """
+    keys의 행마다 식별 테이블의 ID를 찾고, 없는 키는 (현재 최대 ID + 1)부터 새로 부여해 저장합니다.
+
+    Args:
+        key_columns (list): 자연키 컬럼
+        keys (pd.DataFrame): 자연키 컬럼(과 저장할 추가 컬럼)
+        existing_sql: 이번에 필요한 범위의 기존 (ID, 자연키)를 읽는 SELECT 문
+
+    Returns:
+        np.ndarray: keys 행 순서와 같은 int64 ID 배열
+    """
+    known = pd.read_sql(existing_sql, connection, params=params)
+    known_index = pd.MultiIndex.from_frame(known[key_columns])
+    unique = keys.drop_duplicates(key_columns)
+    new = unique[known_index.get_indexer(pd.MultiIndex.from_frame(unique[key_columns])) < 0]
+    if not new.empty:
+        start = connection.execute(text(f'SELECT COALESCE(MAX({id_column}), 0) FROM {schema}."{table_name}"')).scalar()
+        new = new.assign(**{id_column: np.arange(start + 1, start + 1 + len(new), dtype=np.int64)})
+        # SQLite 드라이버는 pandas Timestamp를 받지 않으므로 datetime 객체로 넣습니다.
+        new["created_at"] = pd.Series(datetime.now(), index=new.index, dtype=object)
+        append_rows(connection, new, f'{schema}."{table_name}"')
+        known = pd.concat([known, new[known.columns]], ignore_index=True)
+        known_index = pd.MultiIndex.from_frame(known[key_columns])
+
+    positions = known_index.get_indexer(pd.MultiIndex.from_frame(keys[key_columns]))
+    return known[id_column].to_numpy(dtype=np.int64)[positions]
+
+
+def assign_complex_ids(engine, schema: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    피처 DataFrame에 단지 ID(complex_id)와 평형 ID(unit_type_id) 컬럼을 채웁니다.
+    매매/전세/월세가 같은 식별 테이블을 사용하므로 같은 단지, 같은 평형은 테이블이 달라도 ID가 같습니다.
+
+    자치구별 병렬 빌드의 워커들이 동시에 새 ID를 부여할 수 있으므로, PostgreSQL에서는 식별 테이블을 잠근 뒤 부여합니다.
+    """
+    if df.empty:
+        for column in ID_COLUMNS:
+            df[column] = pd.Series(dtype="int32")
+        return df
+
+    keys = complex_keys(df)
+    codes = sorted(keys["sgg_code"].unique())
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text(f'LOCK TABLE {schema}."{COMPLEX_TABLE}", {schema}."{UNIT_TYPE_TABLE}" IN SHARE ROW EXCLUSIVE MODE'))
+        params = {"codes": codes}
+        df["complex_id"] = _resolve_ids(
+            connection, schema, COMPLEX_TABLE, "complex_id", COMPLEX_KEY, keys,
+            text(f'SELECT complex_id, {", ".join(COMPLEX_KEY)}, apt_name FROM {schema}."{COMPLEX_TABLE}" WHERE sgg_code IN :codes')
+            .bindparams(bindparam("codes", expanding=True)), params,
+        )
+        # 전용면적은 float32로 보관하므로, 원래 값으로 되돌린 뒤 반올림합니다.
+        units = pd.DataFrame({"complex_id": df["complex_id"], "area_m2": as_float64(df["전용면적(㎡)"]).round(2)}, index=df.index)
+        df["unit_type_id"] = _resolve_ids(
+            connection, schema, UNIT_TYPE_TABLE, "unit_type_id", UNIT_TYPE_KEY, units,
+            text(f"""
+                SELECT u.unit_type_id, u.complex_id, u.area_m2 FROM {schema}."{UNIT_TYPE_TABLE}" AS u
+                JOIN {schema}."{COMPLEX_TABLE}" AS c ON c.complex_id = u.complex_id
+                WHERE c.sgg_code IN :codes
+            """).bindparams(bindparam("codes", expanding=True)), params,
+        )
+    return df
@@ -0,0 +1,129 @@
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import text
+
+# 이미 저장된 거래의 상태 변경 기록 (해제, 해제 취소, 정정, 삭제)
+# sync_partition이 원시 테이블을 갱신하기 전에 남기고, 증분 피처 빌드가 반영한 뒤 applied_at을 채웁니다.
+CHANGE_TABLE = "raw_deal_changes"
+
+# 해제여부(cdealType: 해제된 거래는 'O')와 해제사유발생일(cdealDay) 컬럼
+CANCEL_FLAG_COLUMN = "cdealType"
+CANCEL_DATE_COLUMN = "cdealDay"
+
+# 변경 유형
+#   cancelled: 해제여부가 새로 표시됨
+#   restored : 해제여부 표시가 사라짐
+#   amended  : 해제여부는 그대로이고 다른 값(등기일자, 해제사유발생일 등)이 바뀜
+#   deleted  : 저장된 거래가 API 응답에서 사라짐
+CHANGE_TYPES = ("cancelled", "restored", "amended", "deleted")
+
+
+def ensure_change_table(connection, schema: str):
+    """거래 변경 기록 테이블을 생성합니다. 이미 존재하면 아무 작업도 하지 않습니다."""
+    # 자동 증가 키: SQLite는 INTEGER PRIMARY KEY만 자동으로 번호를 매깁니다.
+    id_type = "BIGSERIAL" if connection.dialect.name == "postgresql" else "INTEGER"
+    connection.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {schema}."{CHANGE_TABLE}" (
+            change_id          {id_type}   PRIMARY KEY,
+            table_name         VARCHAR(64) NOT NULL,
+            row_fingerprint    VARCHAR(32) NOT NULL,
+            sgg_code           VARCHAR(10) NOT NULL,
+            deal_ym            INTEGER     NOT NULL,
+            change_type        VARCHAR(16) NOT NULL,
+            cancel_flag_before VARCHAR(8),
+            cancel_flag_after  VARCHAR(8),
+            cancel_date_before VARCHAR(16),
+            cancel_date_after  VARCHAR(16),
+            detected_at        TIMESTAMP   NOT NULL,
+            applied_at         TIMESTAMP
+        )
+    """))
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(f"""
+            CREATE INDEX IF NOT EXISTS "{CHANGE_TABLE}_pending_idx" ON {schema}."{CHANGE_TABLE}" (change_id) WHERE applied_at IS NULL
+        """))
+
+
+def is_cancelled(series: pd.Series) -> pd.Series:
+    """해제여부 값이 있으면(공백 제외) 해제된 거래입니다."""
+    return series.fillna("").astype(str).str.strip() != ""
+
+
+def cancelled_sql(alias: str) -> str:
+    """해제된 거래인지 판정하는 SQL 식 (is_cancelled와 같은 규칙)"""
+    return f"COALESCE(TRIM({alias}.\"{CANCEL_FLAG_COLUMN}\"), '') <> ''"
+
+
+def record_deal_changes(connection, schema: str, table_name: str, stage_name: str, columns: list, join_condition: str,
+                        partition_condition: str, params: dict, value_columns: list) -> dict:
+    """
+    (sync_partition 트랜잭션 안에서) 원시 테이블 파티션과 새 응답(스테이징 테이블)을 비교해,
+    저장된 거래 중 상태가 바뀌거나 사라진 거래의 변경 기록을 남깁니다. 원시 테이블을 갱신하기 전에 호출해야 합니다.
+
+    Args:
+        columns (list): 스테이징 테이블 컬럼
+        join_condition (str): 원시 테이블(t)과 스테이징 테이블(s)의 행 지문 조인 조건
+        partition_condition (str): 원시 테이블(t)의 파티션 조건
+        value_columns (list): 값 비교 컬럼 (행 지문/거래연월 제외)
+
+    Returns:
+        dict: {변경 유형: 건수}
+    """
+    status = ""
+    if CANCEL_FLAG_COLUMN in columns:
+        status = (
+            f"WHEN {cancelled_sql('s')} AND NOT {cancelled_sql('t')} THEN 'cancelled' "
+            f"WHEN {cancelled_sql('t')} AND NOT {cancelled_sql('s')} THEN 'restored' "
+        )
+    changed = "false"
+    if value_columns:
+        target_values = ", ".join(f't."{column}"' for column in value_columns)
+        stage_values = ", ".join(f's."{column}"' for column in value_columns)
+        changed = f"ROW({target_values}) IS DISTINCT FROM ROW({stage_values})"
+
+    def column_or_null(alias, column):
+        return f'{alias}."{column}"' if column in columns else "CAST(NULL AS VARCHAR)"
+
+    rows = connection.execute(text(f"""
+        INSERT INTO {schema}."{CHANGE_TABLE}" (
+            table_name, row_fingerprint, sgg_code, deal_ym, change_type,
+            cancel_flag_before, cancel_flag_after, cancel_date_before, cancel_date_after, detected_at
+        )
+        SELECT
+            :table_name, t."row_fingerprint", t."sggCd", t."deal_ym",
+            CASE WHEN s."row_fingerprint" IS NULL THEN 'deleted' {status}ELSE 'amended' END,
+            {column_or_null('t', CANCEL_FLAG_COLUMN)}, {column_or_null('s', CANCEL_FLAG_COLUMN)},
+            {column_or_null('t', CANCEL_DATE_COLUMN)}, {column_or_null('s', CANCEL_DATE_COLUMN)},
+            :detected_at
+        FROM {schema}."{table_name}" AS t
+        LEFT JOIN {stage_name} AS s ON {join_condition}
+        WHERE {partition_condition} AND (s."row_fingerprint" IS NULL OR {changed})
+        RETURNING change_type
+    """), {**params, "table_name": table_name, "detected_at": datetime.now()}).scalars().all()
+    return {change_type: rows.count(change_type) for change_type in CHANGE_TYPES if change_type in rows}
+
+
+def get_pending_changes(connection, schema: str) -> pd.DataFrame:
+    """아직 피처 테이블에 반영하지 않은 변경 기록을 반환합니다."""
+    return pd.read_sql(text(f"""
+        SELECT change_id, table_name, sgg_code, deal_ym, change_type FROM {schema}."{CHANGE_TABLE}"
+        WHERE applied_at IS NULL ORDER BY change_id
+    """), connection)
+
+
+def mark_changes_applied(connection, schema: str, last_change_id, applied_at: datetime) -> int:
+    """last_change_id까지의 변경 기록을 반영 완료로 표시합니다. (빌드 도중 새로 들어온 기록은 다음 빌드가 반영)"""
+    if last_change_id is None:
+        return 0
+    return connection.execute(text(f"""
+        UPDATE {schema}."{CHANGE_TABLE}" SET applied_at = :applied_at
+        WHERE applied_at IS NULL AND change_id <= :last_change_id
+    """), {"applied_at": applied_at, "last_change_id": int(last_change_id)}).rowcount
+
+
+def summarize_changes(changes: pd.DataFrame) -> str:
+    """변경 기록 건수 요약 문자열 (예: '해제 3건, 정정 1건')"""
+    labels = {"cancelled": "해제", "restored": "해제 취소", "amended": "정정", "deleted": "삭제"}
+    counts = changes["change_type"].value_counts()
+    return ", ".join(f"{labels[change_type]} {int(counts[change_type])}건" for change_type in CHANGE_TYPES if change_type in counts)
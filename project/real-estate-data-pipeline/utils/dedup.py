@@ -0,0 +1,286 @@
+import hashlib
+
+import pandas as pd
+from sqlalchemy import inspect, text
+
+from utils.bulk_load import append_rows
+from utils.deal_changes import ensure_change_table, record_deal_changes
+from utils.normalize import TRADE_TYPE_BY_TABLE, normalize_raw
+from utils.raw_schema import DEAL_MONTH_COLUMN, RAW_TABLES, add_deal_month, ensure_raw_table, is_partitioned
+
+FINGERPRINT_COLUMN = "row_fingerprint"
+
+# 행 지문을 채울 때 한 번에 스테이징 테이블로 옮기는 최대 행 수 (파티션 단위로 끊음)
+BACKFILL_CHUNK_ROWS = 50_000
+
+# 거래 한 건을 식별하는 자연키 컬럼 (PublicDataReader 응답 컬럼 기준)
+# 해제여부(cdealType)나 등기일자(rgstDate)처럼 나중에 바뀔 수 있는 상태값은 포함하지 않습니다.
+NATURAL_KEYS = {
+    "매매": [
+        "sggCd", "umdNm", "jibun", "aptNm", "excluUseAr", "floor",
+        "dealYear", "dealMonth", "dealDay", "dealAmount",
+    ],
+    "전월세": [
+        "sggCd", "umdNm", "jibun", "aptNm", "excluUseAr", "floor",
+        "dealYear", "dealMonth", "dealDay", "deposit", "monthlyRent", "contractTerm",
+    ],
+}
+
+
+def _normalize_key_column(series: pd.Series) -> pd.Series:
+    """
+    API 응답(문자열)과 DB에서 읽은 값(숫자 등)이 같은 문자열이 되도록 정규화합니다.
+    쉼표와 앞뒤 공백을 제거하고, 숫자는 '84.97', '12000'처럼 불필요한 소수점 없이 표현합니다.
+    """
+    text_values = series.astype(str).str.strip().str.replace(",", "", regex=False)
+    text_values = text_values.where(series.notna(), "")
+    numbers = pd.to_numeric(text_values, errors="coerce")
+    numeric_mask = numbers.notna()
+    text_values[numeric_mask] = numbers[numeric_mask].map(lambda v: f"{v:.6f}".rstrip("0").rstrip("."))
+    return text_values
+
+
+def add_row_fingerprint(df: pd.DataFrame, key_columns: list) -> pd.DataFrame:
+    """
+    자연키 컬럼으로 만든 결정적(deterministic) 행 지문(MD5)을 row_fingerprint 컬럼에 추가합니다.
+
+    같은 응답 안에 자연키가 완전히 같은 거래가 여러 건 있으면(실제로 같은 날 같은 층에서 같은 금액의
+    거래가 있을 수 있음), 등장 순번을 지문에 섞어 서로 다른 행으로 유지합니다.
+    응답에 없는 키 컬럼은 빈 값으로 취급합니다.
+    """
+    df = df.copy()
+    if df.empty:
+        df[FINGERPRINT_COLUMN] = pd.Series(dtype=str)
+        return df
+
+    key = pd.Series("", index=df.index)
+    for column in key_columns:
+        value = _normalize_key_column(df[column]) if column in df.columns else pd.Series("", index=df.index)
+        key = key + "\x1f" + value
+
+    occurrence = key.groupby(key).cumcount().astype(str)
+    df[FINGERPRINT_COLUMN] = [
+        hashlib.md5(f"{k}\x1e{n}".encode("utf-8")).hexdigest()
+        for k, n in zip(key, occurrence)
+    ]
+    return df
+
+
+def ensure_fingerprint_index(connection, table_name: str, schema: str) -> list:
+    """
+    대상 테이블에 row_fingerprint 컬럼과 UNIQUE 인덱스가 없으면 만듭니다.
+    파티션 테이블의 UNIQUE 인덱스에는 파티션 키가 포함되어야 하므로 (row_fingerprint, deal_ym)으로 만듭니다.
+    (행 지문에 거래연월이 이미 포함되어 있어 중복 판정 결과는 같습니다.)
+    원시 테이블에 컬럼을 새로 추가했으면 이미 적재된 행의 지문도 채웁니다. (backfill_fingerprints)
+
+    Returns:
+        list: UNIQUE 인덱스 컬럼 목록 (ON CONFLICT 대상)
+    """
+    qualified_name = f'{schema}."{table_name}"'
+    columns = {column["name"] for column in inspect(connection).get_columns(table_name, schema=schema)}
+    if FINGERPRINT_COLUMN not in columns:
+        connection.execute(text(f'ALTER TABLE {qualified_name} ADD COLUMN "{FINGERPRINT_COLUMN}" VARCHAR(32)'))
+        if table_name in RAW_TABLES:
+            backfill_fingerprints(connection, table_name, schema)
+
+    if is_partitioned(connection, table_name, schema):
+        index_name, index_columns = f"{table_name}_{FINGERPRINT_COLUMN}_ym_uq", [FINGERPRINT_COLUMN, DEAL_MONTH_COLUMN]
+    else:
+        index_name, index_columns = f"{table_name}_{FINGERPRINT_COLUMN}_uq", [FINGERPRINT_COLUMN]
+    column_list = ", ".join(f'"{column}"' for column in index_columns)
+    connection.execute(text(f'CREATE UNIQUE INDEX IF NOT EXISTS "{index_name}" ON {qualified_name} ({column_list})'))
+    return index_columns
+
+
+def has_missing_fingerprints(connection, table_name: str, schema: str) -> bool:
+    """행 지문이 비어 있는 행(행 지문 도입 전에 적재된 행)이 남아 있는지 확인합니다."""
+    return connection.execute(text(
+        f'SELECT EXISTS (SELECT 1 FROM {schema}."{table_name}" WHERE "{FINGERPRINT_COLUMN}" IS NULL)'
+    )).scalar()
+
+
+def _apply_backfill(connection, qualified_name: str, fingerprints: pd.DataFrame) -> tuple:
+    """계산한 지문(table_oid, row_ctid, row_fingerprint)을 스테이징 테이블로 옮겨 원시 테이블에 반영합니다."""
+    stage_name = '"_stage_fingerprint_backfill"'
+    connection.execute(text(
+        f"CREATE TEMPORARY TABLE IF NOT EXISTS {stage_name} (table_oid OID, row_ctid TEXT, {FINGERPRINT_COLUMN} VARCHAR(32))"
+    ))
+    connection.execute(text(f"TRUNCATE {stage_name}"))
+    append_rows(connection, fingerprints, stage_name)
+    target = f"t.tableoid = s.table_oid AND t.ctid = CAST(s.row_ctid AS TID)"
+    # 지문 도입 후 같은 거래가 다시 추가되어 이미 같은 지문의 행이 있으면, 비어 있던 쪽은 중복이므로 지웁니다.
+    removed = connection.execute(text(
+        f"DELETE FROM {qualified_name} AS t USING {stage_name} AS s WHERE {target} "
+        f"AND EXISTS (SELECT 1 FROM {qualified_name} AS e WHERE e.\"{FINGERPRINT_COLUMN}\" = s.\"{FINGERPRINT_COLUMN}\" "
+        f"AND e.\"{DEAL_MONTH_COLUMN}\" = t.\"{DEAL_MONTH_COLUMN}\")"
+    )).rowcount
+    filled = connection.execute(text(
+        f'UPDATE {qualified_name} AS t SET "{FINGERPRINT_COLUMN}" = s."{FINGERPRINT_COLUMN}" '
+        f'FROM {stage_name} AS s WHERE {target}'
+    )).rowcount
+    return filled, removed
+
+
+def backfill_fingerprints(connection, table_name: str, schema: str) -> dict:
+    """
+    행 지문이 비어 있는 원시 테이블 행(행 지문 도입 전에 적재된 행)에 지문을 채웁니다.
+
+    (시군구코드, 거래연월) 파티션마다 자연키 컬럼을 읽어 add_row_fingerprint를 적용하므로,
+    같은 자연키 거래의 등장 순번이 그 파티션의 API 응답 하나를 처리했을 때와 같아집니다.
+    지문이 비어 있는 행이 남아 있으면 insert_new_rows/sync_partition이 기존 거래를 새 거래로 보고 다시 추가하므로,
+    적재 전에 반드시 채워야 합니다. (scripts/migrate_raw_tables.py)
+
+    Returns:
+        dict: {'filled': 지문을 채운 건수, 'removed': 이미 다시 적재되어 있어 지운 중복 건수}
+    """
+    qualified_name = f'{schema}."{table_name}"'
+    table_columns = {column["name"] for column in inspect(connection).get_columns(table_name, schema=schema)}
+    key_columns = [column for column in NATURAL_KEYS[TRADE_TYPE_BY_TABLE[table_name]] if column in table_columns]
+    key_list = ", ".join(f'"{column}"' for column in key_columns)
+
+    partitions = connection.execute(text(
+        f'SELECT "sggCd", "{DEAL_MONTH_COLUMN}", COUNT(*) AS n FROM {qualified_name} '
+        f'WHERE "{FINGERPRINT_COLUMN}" IS NULL GROUP BY 1, 2 ORDER BY 2, 1'
+    )).all()
+    totals, frames, pending = {"filled": 0, "removed": 0}, [], 0
+    for index, (sigungu_code, year_month, rows) in enumerate(partitions):
+        df = pd.read_sql(text(
+            f'SELECT tableoid AS table_oid, CAST(ctid AS TEXT) AS row_ctid, {key_list} FROM {qualified_name} '
+            f'WHERE "{FINGERPRINT_COLUMN}" IS NULL AND "sggCd" IS NOT DISTINCT FROM :sigungu_code '
+            f'AND "{DEAL_MONTH_COLUMN}" = :year_month ORDER BY ctid'
+        ), connection, params={"sigungu_code": sigungu_code, "year_month": year_month})
+        df = add_row_fingerprint(df, NATURAL_KEYS[TRADE_TYPE_BY_TABLE[table_name]])
+        frames.append(df[["table_oid", "row_ctid", FINGERPRINT_COLUMN]])
+        pending += rows
+        if pending >= BACKFILL_CHUNK_ROWS or index == len(partitions) - 1:
+            filled, removed = _apply_backfill(connection, qualified_name, pd.concat(frames, ignore_index=True))
+            totals["filled"] += filled
+            totals["removed"] += removed
+            frames, pending = [], 0
+    if partitions:
+        print(
+            f"   INFO: '{table_name}' 기존 {totals['filled']:,}건에 행 지문을 채웠습니다. "
+            f"(이미 다시 적재된 중복 {totals['removed']:,}건 삭제)"
+        )
+    return totals
+
+
+def _stage_rows(df: pd.DataFrame, table_name: str, connection, schema: str):
+    """
+    대상 테이블을 준비하고 DataFrame을 임시 스테이징 테이블에 COPY합니다.
+
+    Returns:
+        tuple: (대상 테이블 이름, 스테이징 테이블 이름, 저장할 컬럼 목록, UNIQUE 인덱스 컬럼 목록)
+    """
+    if FINGERPRINT_COLUMN not in df.columns:
+        raise ValueError(f"'{FINGERPRINT_COLUMN}' 컬럼이 없습니다. add_row_fingerprint()를 먼저 호출하세요.")
+
+    if table_name in RAW_TABLES:
+        df = add_deal_month(normalize_raw(df, TRADE_TYPE_BY_TABLE[table_name]))
+        ensure_raw_table(connection, table_name, schema, df)
+    elif not inspect(connection).has_table(table_name, schema=schema):
+        df.head(0).to_sql(table_name, connection, schema=schema, index=False)
+    conflict_columns = ensure_fingerprint_index(connection, table_name, schema)
+    if table_name in RAW_TABLES and has_missing_fingerprints(connection, table_name, schema):
+        raise ValueError(
+            f"'{table_name}'에 행 지문이 비어 있는 기존 행이 있어 적재하지 않습니다. (같은 거래가 중복 추가됨) "
+            "scripts/migrate_raw_tables.py로 행 지문을 먼저 채우세요."
+        )
+
+    table_columns = {column["name"] for column in inspect(connection).get_columns(table_name, schema=schema)}
+    columns = [column for column in df.columns if column in table_columns]
+    skipped = [column for column in df.columns if column not in table_columns]
+    if skipped:
+        print(f"   WARN: '{table_name}' 테이블에 없는 컬럼은 저장하지 않습니다: {skipped}")
+
+    qualified_name = f'{schema}."{table_name}"'
+    stage_name = f'"_stage_{table_name}"'
+    column_list = ", ".join(f'"{column}"' for column in columns)
+
+    connection.execute(text(f"DROP TABLE IF EXISTS {stage_name}"))
+    connection.execute(text(f"CREATE TEMPORARY TABLE {stage_name} AS SELECT {column_list} FROM {qualified_name} WHERE 1 = 0"))
+    append_rows(connection, df[columns], stage_name)
+    return qualified_name, stage_name, columns, conflict_columns
+
+
+def insert_new_rows(df: pd.DataFrame, table_name: str, connection, schema: str) -> int:
+    """
+    row_fingerprint가 붙은 DataFrame 중 테이블에 아직 없는 행만 추가합니다.
+
+    데이터를 임시 스테이징 테이블에 COPY한 뒤 `INSERT ... SELECT ... ON CONFLICT DO NOTHING`으로
+    옮기므로, 중복 판정은 DB의 UNIQUE 인덱스가 수행하고 파이썬 쪽에서는 기존 데이터를 읽지 않습니다.
+    원시 테이블(raw_apt_*)은 타입 컬럼(utils.normalize)과 거래연월(deal_ym) 컬럼을 붙이고, 없으면 월 파티션 테이블로 만들며
+    새 달의 파티션도 자동으로 만듭니다. 그 밖의 테이블은 없으면 DataFrame의 컬럼으로 새로 만듭니다.
+
+    Returns:
+        int: 실제로 추가된 행 수
+    """
+    if df.empty:
+        return 0
+    qualified_name, stage_name, columns, conflict_columns = _stage_rows(df, table_name, connection, schema)
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    conflict_list = ", ".join(f'"{column}"' for column in conflict_columns)
+
+    result = connection.execute(text(
+        f"INSERT INTO {qualified_name} ({column_list}) "
+        f"SELECT {column_list} FROM {stage_name} WHERE true "
+        f"ON CONFLICT ({conflict_list}) DO NOTHING"
+    ))
+    connection.execute(text(f"DROP TABLE {stage_name}"))
+    return result.rowcount
+
+
+def sync_partition(df: pd.DataFrame, table_name: str, connection, schema: str, sigungu_code: str, year_month: str) -> dict:
+    """
+    원시 테이블의 (시군구코드, 거래연월) 파티션을 새 API 응답과 같아지도록 맞춥니다.
+
+    - 응답에만 있는 거래(늦게 신고된 거래)는 추가합니다.
+    - 양쪽에 있지만 값이 바뀐 거래(해제여부/해제일자, 등기일자 등)는 갱신합니다.
+    - 저장되어 있지만 응답에서 사라진 거래는 삭제합니다.
+    자연키가 같은 거래는 행 지문이 같으므로, 행 지문으로 기존 행과 새 행을 짝지어 비교합니다.
+    갱신/삭제 전에 바뀐 거래의 변경 기록(해제, 해제 취소, 정정, 삭제)을 raw_deal_changes에 남깁니다.
+
+    Returns:
+        dict: {'inserted': 추가 건수, 'updated': 갱신 건수, 'deleted': 삭제 건수, 'changes': {변경 유형: 건수}}
+    """
+    if table_name not in RAW_TABLES:
+        raise ValueError(f"파티션 동기화는 원시 테이블에서만 지원합니다: {table_name}")
+    if df.empty:
+        raise ValueError("빈 응답으로는 파티션을 동기화하지 않습니다. (기존 데이터가 모두 삭제됩니다)")
+
+    qualified_name, stage_name, columns, conflict_columns = _stage_rows(df, table_name, connection, schema)
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    conflict_list = ", ".join(f'"{column}"' for column in conflict_columns)
+    value_columns = [column for column in columns if column not in (FINGERPRINT_COLUMN, DEAL_MONTH_COLUMN)]
+    join_condition = " AND ".join(f't."{column}" = s."{column}"' for column in conflict_columns)
+    partition_condition = f't."sggCd" = :sigungu_code AND t."{DEAL_MONTH_COLUMN}" = :year_month'
+    params = {"sigungu_code": sigungu_code, "year_month": int(year_month)}
+
+    ensure_change_table(connection, schema)
+    changes = record_deal_changes(
+        connection, schema, table_name, stage_name, columns, join_condition, partition_condition, params, value_columns,
+    )
+
+    deleted = connection.execute(text(
+        f"DELETE FROM {qualified_name} AS t WHERE {partition_condition} "
+        f"AND NOT EXISTS (SELECT 1 FROM {stage_name} AS s WHERE {join_condition})"
+    ), params).rowcount
+
+    updated = 0
+    if value_columns:
+        assignments = ", ".join(f'"{column}" = s."{column}"' for column in value_columns)
+        target_values = ", ".join(f't."{column}"' for column in value_columns)
+        stage_values = ", ".join(f's."{column}"' for column in value_columns)
+        updated = connection.execute(text(
+            f"UPDATE {qualified_name} AS t SET {assignments} FROM {stage_name} AS s "
+            f"WHERE {join_condition} AND {partition_condition} "
+            f"AND ROW({target_values}) IS DISTINCT FROM ROW({stage_values})"
+        ), params).rowcount
+
+    inserted = connection.execute(text(
+        f"INSERT INTO {qualified_name} ({column_list}) "
+        f"SELECT {column_list} FROM {stage_name} WHERE true "
+        f"ON CONFLICT ({conflict_list}) DO NOTHING"
+    )).rowcount
+    connection.execute(text(f"DROP TABLE {stage_name}"))
+    return {"inserted": inserted, "updated": updated, "deleted": deleted, "changes": changes}
@@ -0,0 +1,77 @@
+import io
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from utils.normalize import TYPED_COLUMN_SQL
+
+# 타입 컬럼(utils.normalize)의 SQL 타입 → Arrow 타입. 나머지 원시 컬럼은 모두 문자열입니다.
+ARROW_TYPES = {"TIMESTAMP": pa.timestamp("us"), "DOUBLE PRECISION": pa.float64(), "BIGINT": pa.int64()}
+
+# DuckDB 스레드 수 (기본값: CPU 코어 수)
+DUCKDB_THREADS = os.getenv("DUCKDB_THREADS")
+
+
+def connect():
+    """인메모리 DuckDB 연결을 만듭니다. 결과 행 순서가 입력 순서를 따르도록 preserve_insertion_order를 켜 둡니다."""
+    import duckdb  # --backend duckdb에서만 필요합니다.
+
+    connection = duckdb.connect()
+    connection.execute("SET preserve_insertion_order = true")
+    if DUCKDB_THREADS:
+        connection.execute(f"SET threads = {int(DUCKDB_THREADS)}")
+    return connection
+
+
+def raw_arrow_schema(columns: list) -> dict:
+    """원시 컬럼 목록의 Arrow 타입 {컬럼: 타입}"""
+    return {
+        column: ARROW_TYPES[TYPED_COLUMN_SQL[column][0]] if column in TYPED_COLUMN_SQL else pa.string()
+        for column in columns
+    }
+
+
+def read_arrow(engine, query: str, types: dict) -> pa.Table:
+    """
+    SELECT 문의 결과를 Arrow 테이블로 읽습니다. (types: {컬럼: Arrow 타입})
+
+    PostgreSQL이면 `COPY (SELECT ...) TO STDOUT`의 CSV를 pyarrow로 바로 파싱하므로,
+    pd.read_sql처럼 행마다 파이썬 객체를 만들지 않습니다. 그 외 DB는 pd.read_sql 결과를 Arrow로 바꿉니다.
+    행 순서는 pd.read_sql로 같은 SELECT를 실행했을 때와 같습니다.
+    """
+    if engine.dialect.name != "postgresql":
+        df = pd.read_sql(query, engine)
+        return pa.Table.from_pandas(df, schema=pa.schema(types.items()), preserve_index=False)
+
+    buffer = io.BytesIO()
+    with engine.connect() as connection:
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", buffer)
+    buffer.seek(0)
+    # CSV에서 NULL은 따옴표 없는 빈 값, 빈 문자열은 ""로 구분됩니다. 불리언은 t/f로 출력됩니다.
+    return pa_csv.read_csv(
+        buffer,
+        convert_options=pa_csv.ConvertOptions(
+            column_types=types, null_values=[""], strings_can_be_null=True, quoted_strings_can_be_null=False,
+            true_values=["t"], false_values=["f"],
+        ),
+    )
+
+
+def read_raw_arrow(engine, schema: str, table_name: str, columns: list) -> pa.Table:
+    """원시 테이블의 필요한 컬럼을 Arrow 테이블로 읽습니다. (read_arrow)"""
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    return read_arrow(engine, f'SELECT {column_list} FROM {schema}."{table_name}"', raw_arrow_schema(columns))
+
+
+def parquet_source(parquet_dir: str, table_name: str) -> str:
+    """내보낸 Parquet 디렉터리(<dir>/<테이블>/.../*.parquet, Hive 파티션)를 읽는 DuckDB 테이블 식"""
+    path = os.path.join(parquet_dir, table_name, "**", "*.parquet").replace("'", "''")
+    return f"read_parquet('{path}', hive_partitioning = true, union_by_name = true)"
+
+
+def query_df(connection, sql: str, params: list = None) -> pd.DataFrame:
+    """DuckDB 쿼리 결과를 Arrow를 거쳐 DataFrame으로 가져옵니다."""
+    return connection.execute(sql, params or []).fetch_arrow_table().to_pandas()
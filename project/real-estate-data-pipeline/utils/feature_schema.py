@@ -0,0 +1,124 @@
+import pandas as pd
+
+# 피처 DataFrame의 메모리용 컬럼 타입
+#   category : 반복되는 지역/단지 문자열 (시군구, 읍면동, 지번, 아파트명 등)
+#   int16/32 : 만원 단위 금액, 층, 연도, 건수, 단지/평형 ID (Int16/Int32는 결측값을 허용하는 nullable 정수)
+#   float32  : 전용면적 (API 값은 소수점 넷째 자리까지)
+#   datetime : 파이썬 date 객체 대신 datetime64[ns]
+# 평당가/평균처럼 계산으로 만들어지는 값은 정밀도를 유지하기 위해 float64로 둡니다.
+FEATURE_SCHEMAS = {
+    "feature_apt_trade": {
+        "시군구코드": "category", "읍면동코드": "category", "지번": "category", "아파트명": "category",
+        "전용면적(㎡)": "float32", "층": "int16", "건축년도": "Int16", "거래금액(만원)": "int32",
+        "거래일자": "datetime", "시군구명": "category", "읍면동명": "category",
+        "complex_id": "int32", "unit_type_id": "int32",
+    },
+    "feature_apt_jeonse": {
+        "시군구코드": "category", "읍면동명": "category", "지번": "category", "아파트명": "category",
+        "전용면적(㎡)": "float32", "층": "Int16", "건축년도": "Int16", "보증금(만원)": "int32",
+        "거래일자": "datetime", "시군구명": "category", "거래유형": "category",
+        "계약시작일": "datetime", "계약종료일": "datetime",
+        "complex_id": "int32", "unit_type_id": "int32",
+    },
+    "feature_apt_wolse": {
+        "시군구코드": "category", "읍면동명": "category", "지번": "category", "아파트명": "category",
+        "전용면적(㎡)": "float32", "층": "Int16", "건축년도": "Int16", "보증금(만원)": "int32", "월세(만원)": "int32",
+        "거래일자": "datetime", "시군구명": "category", "거래유형": "category",
+        "계약시작일": "datetime", "계약종료일": "datetime",
+        "complex_id": "int32", "unit_type_id": "int32",
+    },
+    "analytics_gap_investment": {
+        "거래년도": "int16", "시군구명": "category", "읍면동명": "category",
+        "총매매건수": "int32", "갭투자건수": "int32",
+    },
+    "analytics_price_index": {
+        "단위": "category", "시군구명": "category", "읍면동명": "category",
+        "거래연월": "int32", "거래건수": "int32", "지수표본수": "int32",
+    },
+    "analytics_jeonse_ratio": {
+        "complex_id": "int32", "시군구명": "category", "읍면동명": "category", "아파트명": "category",
+        "면적대": "category", "거래연월": "int32", "매매건수": "int32",
+    },
+}
+
+# float32로 줄인 값을 저장할 때 복원할 소수 자릿수 (API 전용면적의 최대 자릿수)
+FLOAT32_STORAGE_DECIMALS = 4
+
+
+def as_float64(series: pd.Series) -> pd.Series:
+    """float32로 줄인 값을 원래 값(소수점 넷째 자리까지)의 float64로 되돌립니다. 다른 타입은 float64로 바꿉니다."""
+    if series.dtype == "float32":
+        return series.astype("float64").round(FLOAT32_STORAGE_DECIMALS)
+    return series.astype("float64")
+
+
+def apply_schema(df: pd.DataFrame, table_name: str) -> pd.DataFrame:
+    """피처 DataFrame의 컬럼을 FEATURE_SCHEMAS에 선언된 메모리용 타입으로 바꿉니다."""
+    for column, dtype in FEATURE_SCHEMAS[table_name].items():
+        if column not in df.columns:
+            continue
+        if dtype == "datetime":
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+        elif dtype == "category":
+            df[column] = df[column].astype("category")
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def to_storage_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    메모리용 타입을 DB에 저장하던 기존 타입으로 되돌린 DataFrame을 반환합니다.
+    (문자열, 날짜는 date 객체, 정수는 int64 또는 결측값이 있으면 float64, 전용면적은 float64)
+    피처 테이블의 컬럼 타입과 값이 메모리 최적화 이전과 같게 유지됩니다.
+    """
+    df = df.copy()
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            df[column] = series.astype(object)
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            df[column] = series.dt.date
+        elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(series.dtype):
+            df[column] = series.astype("float64") if series.isna().any() else series.astype("int64")
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            df[column] = series.astype("int64")
+        elif series.dtype == "float32":
+            df[column] = as_float64(series)
+    return df
+
+
+def frame_memory_report(frames: dict) -> pd.DataFrame:
+    """
+    피처 DataFrame별로 기존 타입(저장용)과 메모리용 타입의 메모리 사용량을 비교합니다.
+
+    Args:
+        frames (dict): {테이블 이름: DataFrame}
+
+    Returns:
+        pd.DataFrame: table, rows, before_mb, after_mb, saved_pct 컬럼
+    """
+    rows = []
+    for table_name, df in frames.items():
+        before = to_storage_frame(df).memory_usage(deep=True).sum()
+        after = df.memory_usage(deep=True).sum()
+        rows.append({
+            "table": table_name,
+            "rows": len(df),
+            "before_mb": round(before / 1024 ** 2, 2),
+            "after_mb": round(after / 1024 ** 2, 2),
+            "saved_pct": round((1 - after / before) * 100, 1) if before else 0.0,
+        })
+    return pd.DataFrame(rows)
+
+
+def print_memory_report(frames: dict):
+    """frame_memory_report 결과를 출력합니다."""
+    report = frame_memory_report(frames)
+    print("--- 피처 DataFrame 메모리 사용량 (기존 타입 -> 메모리용 타입) ---")
+    for row in report.itertuples(index=False):
+        print(f"   {row.table:<26} {row.rows:>10,}건 | {row.before_mb:>10,.2f} MB -> {row.after_mb:>10,.2f} MB ({row.saved_pct:.1f}% 절감)")
+    total_before, total_after = report["before_mb"].sum(), report["after_mb"].sum()
+    saved = (1 - total_after / total_before) * 100 if total_before else 0.0
+    print(f">> 전체 {total_before:,.2f} MB -> {total_after:,.2f} MB ({saved:.1f}% 절감)")
+    return report
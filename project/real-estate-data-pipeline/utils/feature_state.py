@@ -0,0 +1,282 @@
+from datetime import date, datetime
+
+import pandas as pd
+from sqlalchemy import inspect, text
+
+from utils.bulk_load import append_rows
+from utils.feature_schema import as_float64
+from utils.group_stats import aggregate
+from utils.ingest_ledger import LEDGER_TABLE
+
+STATS_TABLE = "feature_dong_stats"
+BUILD_STATE_TABLE = "feature_build_state"
+
+# 피처 빌드가 반영한 원장 행의 updated_at을 기록하는 ingest_ledger 컬럼
+# built_at이 updated_at과 다른 행이 아직 반영하지 않은 파티션입니다. (늦게 커밋된 적재도 빠지지 않음)
+BUILT_AT_COLUMN = "built_at"
+
+# 평당가 환산에 사용하는 면적 계수 (build_features.py와 동일)
+PYEONG = 3.3058
+
+# 증분 빌드에서 사용하는 ingest_ledger의 거래 유형별 원시 테이블
+RAW_TABLE_BY_TRADE_TYPE = {
+    "매매": "raw_apt_trade",
+    "전월세": "raw_apt_jeonse",
+}
+
+
+def ensure_state_tables(engine, schema: str):
+    """
+    동별 누적 합계/건수 테이블과 빌드 기록 테이블을 생성하고, ingest_ledger에 built_at 컬럼을 추가합니다.
+    built_at을 새로 추가하면 지난 빌드 시각(last_ledger_at)까지 적재된 행은 반영된 것으로 채웁니다.
+    """
+    with engine.begin() as connection:
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {schema}."{STATS_TABLE}" (
+                stat_name   VARCHAR(32)      NOT NULL,
+                sggnm       VARCHAR(32)      NOT NULL,
+                umdnm       VARCHAR(64)      NOT NULL,
+                value_sum   DOUBLE PRECISION NOT NULL DEFAULT 0,
+                value_count BIGINT           NOT NULL DEFAULT 0,
+                updated_at  TIMESTAMP        NOT NULL,
+                PRIMARY KEY (stat_name, sggnm, umdnm)
+            )
+        """))
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {schema}."{BUILD_STATE_TABLE}" (
+                state_key      VARCHAR(32) PRIMARY KEY,
+                last_ledger_at TIMESTAMP,
+                updated_at     TIMESTAMP   NOT NULL
+            )
+        """))
+        inspector = inspect(connection)
+        ledger_columns = (
+            {column["name"] for column in inspector.get_columns(LEDGER_TABLE, schema=schema)}
+            if inspector.has_table(LEDGER_TABLE, schema=schema) else {BUILT_AT_COLUMN}
+        )
+        if BUILT_AT_COLUMN not in ledger_columns:
+            connection.execute(text(f'ALTER TABLE {schema}."{LEDGER_TABLE}" ADD COLUMN {BUILT_AT_COLUMN} TIMESTAMP'))
+            connection.execute(text(f"""
+                UPDATE {schema}."{LEDGER_TABLE}" SET {BUILT_AT_COLUMN} = updated_at
+                WHERE updated_at <= (SELECT last_ledger_at FROM {schema}."{BUILD_STATE_TABLE}" WHERE state_key = 'incremental')
+            """))
+
+
+def dong_contributions(df_trade=None, df_jeonse=None, df_wolse=None) -> pd.DataFrame:
+    """
+    피처 DataFrame에서 동별/구별 평균 계산에 쓰이는 동별 (합계, 건수)를 구합니다.
+    구별 평균은 동별 합계를 자치구로 합쳐 계산하므로 따로 저장하지 않습니다.
+    새로 만든 슬라이스에 적용하면 '더할 값'이, 기존 슬라이스에 적용하면 '뺄 값'이 됩니다.
+
+    Returns:
+        pd.DataFrame: stat_name, sggnm, umdnm, value_sum, value_count 컬럼
+    """
+    parts = []
+
+    def collect(frame, values):
+        """같은 DataFrame에서 나오는 통계({stat_name: 값})는 한 번의 groupby로 함께 구합니다."""
+        has_dong = frame["읍면동명"].notna()
+        if not has_dong.any():
+            return
+        keyed = pd.DataFrame({
+            "sggnm": frame["시군구명"].astype(str),
+            "umdnm": frame["읍면동명"].astype(str),
+            **{stat_name: value.astype(float) for stat_name, value in values.items()},
+        })[has_dong]
+        totals = aggregate(keyed, ["sggnm", "umdnm"], list(values), stats=("sum", "count"))
+        for stat_name in values:
+            part = totals[[f"{stat_name}_sum", f"{stat_name}_count"]].set_axis(["value_sum", "value_count"], axis=1)
+            part = part[part["value_count"] > 0].reset_index()
+            part.insert(0, "stat_name", stat_name)
+            parts.append(part)
+
+    if df_trade is not None and not df_trade.empty:
+        collect(df_trade, {"trade_pp": df_trade["평당가격(만원)"]})
+
+    if df_jeonse is not None and not df_jeonse.empty:
+        # '진짜 전세' (보증금 > 0, 면적 > 0)만 평균에 포함합니다.
+        # 전용면적은 float32로 보관될 수 있으므로 원래 값의 float64로 되돌려 계산합니다.
+        deposit, area = as_float64(df_jeonse["보증금(만원)"]), as_float64(df_jeonse["전용면적(㎡)"])
+        mask = (deposit > 0) & (area > 0)
+        collect(df_jeonse, {"jeonse_pp": (deposit / (area * PYEONG)).where(mask)})
+
+    if df_wolse is not None and not df_wolse.empty:
+        deposit, area = as_float64(df_wolse["보증금(만원)"]), as_float64(df_wolse["전용면적(㎡)"])
+        mask = area > 0
+        collect(df_wolse, {
+            "wolse_deposit_pp": (deposit / (area * PYEONG)).where(mask),
+            "wolse_rent": as_float64(df_wolse["월세(만원)"]).where(mask),
+        })
+
+    if not parts:
+        return pd.DataFrame(columns=["stat_name", "sggnm", "umdnm", "value_sum", "value_count"])
+    return pd.concat(parts, ignore_index=True)
+
+
+def apply_stat_delta(connection, schema: str, added: pd.DataFrame, removed: pd.DataFrame, updated_at: datetime):
+    """
+    누적 통계 테이블에 (added - removed) 만큼을 반영합니다.
+    반영된 행의 updated_at은 이번 실행 시각으로 바뀌므로, 이후 평균 갱신 대상 동을 찾는 데 사용합니다.
+    """
+    removed = removed.copy()
+    removed[["value_sum", "value_count"]] = -removed[["value_sum", "value_count"]]
+    delta = pd.concat([added, removed], ignore_index=True)
+    if delta.empty:
+        return 0
+    delta = delta.groupby(["stat_name", "sggnm", "umdnm"], as_index=False)[["value_sum", "value_count"]].sum()
+
+    query = text(f"""
+        INSERT INTO {schema}."{STATS_TABLE}" (stat_name, sggnm, umdnm, value_sum, value_count, updated_at)
+        VALUES (:stat_name, :sggnm, :umdnm, :value_sum, :value_count, :updated_at)
+        ON CONFLICT (stat_name, sggnm, umdnm) DO UPDATE SET
+            value_sum = {STATS_TABLE}.value_sum + EXCLUDED.value_sum,
+            value_count = {STATS_TABLE}.value_count + EXCLUDED.value_count,
+            updated_at = EXCLUDED.updated_at
+    """)
+    connection.execute(query, [
+        {
+            "stat_name": row.stat_name,
+            "sggnm": row.sggnm,
+            "umdnm": row.umdnm,
+            "value_sum": float(row.value_sum),
+            "value_count": int(row.value_count),
+            "updated_at": updated_at,
+        }
+        for row in delta.itertuples(index=False)
+    ])
+    return len(delta)
+
+
+def reset_stats(connection, schema: str, contributions: pd.DataFrame, updated_at: datetime):
+    """전체 빌드 결과로 누적 통계 테이블을 새로 채웁니다."""
+    connection.execute(text(f'DELETE FROM {schema}."{STATS_TABLE}"'))
+    apply_stat_delta(connection, schema, contributions, contributions.head(0), updated_at)
+
+
+def get_last_ledger_at(connection, schema: str, state_key: str = "incremental"):
+    """
+    마지막 빌드가 기록한 원장 시각을 반환합니다. 빌드 기록이 없으면(전체 빌드가 필요하면) None을 반환합니다.
+    반영할 파티션은 이 시각이 아니라 원장 행별 built_at으로 찾습니다. (get_changed_partitions)
+    """
+    row = connection.execute(
+        text(f'SELECT last_ledger_at FROM {schema}."{BUILD_STATE_TABLE}" WHERE state_key = :key'),
+        {"key": state_key},
+    ).first()
+    return row.last_ledger_at if row else None
+
+
+def set_last_ledger_at(connection, schema: str, last_ledger_at, state_key: str = "incremental"):
+    """이번 빌드가 반영한 원장 시각을 기록합니다. 원장이 비어 있으면 가장 이른 시각으로 기록합니다."""
+    last_ledger_at = last_ledger_at or datetime(1970, 1, 1)
+    connection.execute(text(f"""
+        INSERT INTO {schema}."{BUILD_STATE_TABLE}" (state_key, last_ledger_at, updated_at)
+        VALUES (:key, :last_ledger_at, :updated_at)
+        ON CONFLICT (state_key) DO UPDATE SET
+            last_ledger_at = EXCLUDED.last_ledger_at,
+            updated_at = EXCLUDED.updated_at
+    """), {"key": state_key, "last_ledger_at": last_ledger_at, "updated_at": datetime.now()})
+
+
+def clear_last_ledger_at(connection, schema: str, state_key: str = "incremental"):
+    """빌드 기록을 지웁니다. 다음 증분 빌드는 전체 빌드로 누적 통계를 다시 만듭니다."""
+    connection.execute(text(f'DELETE FROM {schema}."{BUILD_STATE_TABLE}" WHERE state_key = :key'), {"key": state_key})
+
+
+def get_max_ledger_at(connection, schema: str):
+    """원장에 기록된 가장 최근 적재 시각을 반환합니다."""
+    return connection.execute(text(f'SELECT MAX(updated_at) FROM {schema}."{LEDGER_TABLE}"')).scalar()
+
+
+def get_changed_partitions(connection, schema: str) -> pd.DataFrame:
+    """
+    적재 후 아직 피처 빌드에 반영하지 않은 (built_at이 updated_at과 다른) 원장 행을 반환합니다.
+    전역 시각과 비교하지 않으므로, 먼저 찍은 updated_at이 나중에 커밋된 적재도 다음 빌드에서 반영됩니다.
+    읽은 updated_at은 빌드가 끝나면 mark_partitions_built로 built_at에 기록합니다.
+
+    Returns:
+        pd.DataFrame: trade_type, sigungu_code, year_month, updated_at 컬럼
+    """
+    return pd.read_sql(text(f"""
+        SELECT trade_type, sigungu_code, year_month, updated_at FROM {schema}."{LEDGER_TABLE}"
+        WHERE status = 'success' AND {BUILT_AT_COLUMN} IS DISTINCT FROM updated_at
+        ORDER BY trade_type, year_month, sigungu_code
+    """), connection)
+
+
+def partitions_by_trade_type(changed: pd.DataFrame) -> dict:
+    """
+    원장 행 목록을 거래 유형별 (시군구코드, 연월) 목록으로 바꿉니다.
+
+    Returns:
+        dict: {'매매': [('11110', '202507'), ...], '전월세': [...]}
+    """
+    partitions = {trade_type: [] for trade_type in RAW_TABLE_BY_TRADE_TYPE}
+    for row in changed.itertuples(index=False):
+        partitions.setdefault(row.trade_type, []).append((row.sigungu_code, row.year_month))
+    return partitions
+
+
+def mark_partitions_built(connection, schema: str, changed: pd.DataFrame) -> int:
+    """
+    (빌드 결과를 저장하는 트랜잭션 안에서) get_changed_partitions로 읽은 원장 행의 built_at을 그때 읽은 updated_at으로 기록합니다.
+    빌드 도중 다시 적재된 행은 updated_at이 바뀌어 built_at과 달라지므로 다음 빌드가 다시 반영합니다.
+
+    Returns:
+        int: 반영 완료로 기록한 행 수
+    """
+    if changed.empty:
+        return 0
+    stage_name = '"_stage_ledger_built"'
+    connection.execute(text(
+        f"CREATE TEMPORARY TABLE IF NOT EXISTS {stage_name} "
+        f"(trade_type VARCHAR(16), sigungu_code VARCHAR(10), year_month VARCHAR(6), updated_at TIMESTAMP)"
+    ))
+    connection.execute(text(f"DELETE FROM {stage_name}"))
+    append_rows(connection, changed[["trade_type", "sigungu_code", "year_month", "updated_at"]], stage_name)
+    return connection.execute(text(f"""
+        UPDATE {schema}."{LEDGER_TABLE}" AS l SET {BUILT_AT_COLUMN} = s.updated_at
+        FROM {stage_name} AS s
+        WHERE l.trade_type = s.trade_type AND l.sigungu_code = s.sigungu_code
+          AND l.year_month = s.year_month AND l.updated_at = s.updated_at
+    """)).rowcount
+
+
+def partition_filter(partitions: list, code_column: str, year_month_sql: str):
+    """
+    (시군구코드, 'YYYYMM') 파티션 목록을 WHERE 절 조건과 바인딩 파라미터로 만듭니다.
+
+    Args:
+        partitions (list): [('11110', '202507'), ...]
+        code_column (str): 시군구코드 컬럼 이름
+        year_month_sql (str): 행의 연월을 YYYYMM 정수로 계산하는 SQL 식
+    """
+    clauses, params = [], {}
+    for i, (code, year_month) in enumerate(partitions):
+        clauses.append(f'("{code_column}" = :code_{i} AND {year_month_sql} = :ym_{i})')
+        params[f"code_{i}"] = code
+        params[f"ym_{i}"] = int(year_month)
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def month_range(year_month) -> tuple:
+    """'YYYYMM' 연월의 [첫날, 다음 달 첫날) 날짜 범위를 반환합니다."""
+    year, month = divmod(int(year_month), 100)
+    return date(year, month, 1), date(year + month // 12, month % 12 + 1, 1)
+
+
+def partition_date_filter(partitions: list, code_column: str, date_column: str):
+    """
+    (시군구코드, 'YYYYMM') 파티션 목록을 날짜 컬럼의 반열린 범위 조건(date_column >= 월초 AND date_column < 다음 달 초)으로 만듭니다.
+    날짜 컬럼을 함수로 감싸지 않으므로 (시군구코드, 날짜) 인덱스를 그대로 사용하고, SQLite에서도 실행됩니다.
+
+    Args:
+        partitions (list): [('11110', '202507'), ...]
+        code_column (str): 시군구코드 컬럼 이름
+        date_column (str): 날짜 컬럼 이름
+    """
+    clauses, params = [], {}
+    for i, (code, year_month) in enumerate(partitions):
+        clauses.append(f'("{code_column}" = :code_{i} AND "{date_column}" >= :start_{i} AND "{date_column}" < :end_{i})')
+        params[f"code_{i}"] = code
+        params[f"start_{i}"], params[f"end_{i}"] = month_range(year_month)
+    return "(" + " OR ".join(clauses) + ")", params
@@ -1,3 +1,8 @@
+import os
+
+import pandas as pd
+
+
 def get_seoul_sigungu_codes():
     """
     사전에 정의된 서울특별시 시군구 목록을 기반으로 법정동 코드를 반환합니다.
@@ -43,6 +48,66 @@ def get_seoul_sigungu_codes():
         
     return sigungu_codes
 
+def load_bdong_table(path: str = None) -> pd.DataFrame:
+    """
+    전국 법정동 코드 전체 목록을 읽습니다.
+
+    Args:
+        path (str): 행정표준코드관리시스템의 '법정동코드 전체자료' 파일 경로 (탭 구분, cp949).
+            없으면 BDONG_CODE_PATH 환경 변수, 그것도 없으면 PublicDataReader.code_bdong()을 사용합니다.
+
+    Returns:
+        pd.DataFrame: 법정동코드(10자리 문자열), 법정동명(전체 이름), 폐지여부(bool) 컬럼
+    """
+    path = path or os.getenv("BDONG_CODE_PATH")
+    if path:
+        df = pd.read_csv(path, sep="\t", encoding="cp949", dtype=str)
+        return pd.DataFrame({
+            "법정동코드": df["법정동코드"].str.strip(),
+            "법정동명": df["법정동명"].str.strip(),
+            "폐지여부": df["폐지여부"].str.strip() == "폐지",
+        })
+
+    from PublicDataReader import code_bdong
+    df = code_bdong().astype(str).replace({"nan": "", "None": ""})
+    name_columns = [col for col in ["시도명", "시군구명", "읍면동명", "동리명"] if col in df.columns]
+    return pd.DataFrame({
+        "법정동코드": df["법정동코드"].str.strip(),
+        "법정동명": df[name_columns].apply(lambda row: " ".join(v for v in row if v), axis=1),
+        "폐지여부": df["말소일자"].str.strip() != "",
+    })
+
+
+def get_sigungu_codes(sido_names: list = None, path: str = None) -> dict:
+    """
+    전국 법정동 코드 표에서 실거래가 API에 사용할 시군구 코드(5자리) 목록을 만듭니다.
+
+    - 폐지된 코드는 제외합니다.
+    - 하위 구가 있는 시(예: 수원시)는 API가 구 단위로만 조회되므로, 법정동을 직접 가진 시군구만 남깁니다.
+    - 세종특별자치시는 시군구 단위 행(3611000000)을 그대로 사용합니다.
+
+    Args:
+        sido_names (list): ['서울특별시', '경기도'] 처럼 포함할 시도 이름. 없으면 전국
+        path (str): load_bdong_table에 전달할 법정동 코드 파일 경로
+
+    Returns:
+        dict: {'서울특별시 종로구': '11110', '경기도 수원시 장안구': '41111', ...} (코드 순)
+    """
+    df = load_bdong_table(path)
+    df = df[~df["폐지여부"]]
+    code = df["법정동코드"]
+
+    # 읍면동/리 단위 행이 있는 시군구 코드
+    has_dongs = set(code[code.str[5:] != "00000"].str[:5])
+    sigungu = df[(code.str[5:] == "00000") & (code.str[2:5] != "000")]
+    sigungu = sigungu[sigungu["법정동코드"].str[:5].isin(has_dongs)]
+    if sido_names:
+        sigungu = sigungu[sigungu["법정동명"].str.split(" ").str[0].isin(sido_names)]
+
+    sigungu = sigungu.sort_values("법정동코드")
+    return {row.법정동명: row.법정동코드[:5] for row in sigungu.itertuples(index=False)}
+
+
 if __name__ == "__main__":
     seoul_codes = get_seoul_sigungu_codes()
     
@@ -0,0 +1,59 @@
+import pandas as pd
+
+# 평균/중위값 등을 계산하는 지역 단위 (피처 DataFrame의 컬럼 기준)
+LEVEL_KEYS = {
+    "gu": ["시군구명"],
+    "dong": ["시군구명", "읍면동명"],
+}
+
+
+def aggregate(frame: pd.DataFrame, keys: list, values: list, stats=("mean", "median", "count"), percentiles=()) -> pd.DataFrame:
+    """
+    keys로 묶은 그룹마다 values 컬럼의 통계를 한 번의 groupby로 계산합니다.
+    그룹 키는 한 번만 계산(factorize)되고, 모든 값 컬럼과 통계가 같은 그룹 결과를 사용합니다.
+
+    Args:
+        keys (list): 그룹 키 컬럼
+        values (list): 통계를 계산할 값 컬럼 (결측은 제외하고 계산)
+        stats (tuple): pandas groupby 집계 이름 ('mean', 'median', 'count', 'sum', 'min', 'max' 등)
+        percentiles (tuple): 추가로 계산할 분위수 (예: (0.25, 0.75) → '<값>_p25', '<값>_p75')
+
+    Returns:
+        pd.DataFrame: keys를 인덱스로 하고 '<값>_<통계>' 컬럼을 갖는 DataFrame
+    """
+    grouped = frame.groupby(keys, observed=True, sort=False)[list(values)]
+    result = grouped.agg(list(stats))
+    result.columns = [f"{value}_{stat}" for value, stat in result.columns]
+    if percentiles:
+        quantiles = grouped.quantile(list(percentiles)).unstack(-1)
+        quantiles.columns = [f"{value}_p{round(q * 100)}" for value, q in quantiles.columns]
+        result = result.join(quantiles)
+    return result
+
+
+def means_from_sums(totals: pd.DataFrame, keys: list, sum_column: str = "value_sum", count_column: str = "value_count") -> pd.Series:
+    """
+    (합계, 건수)를 keys 단위로 더한 뒤 평균을 계산합니다.
+    청크/파티션별 부분 합계나 동별 합계를 더 큰 단위(자치구)로 합쳐도 전체 행의 평균과 같습니다.
+    """
+    summed = totals.groupby(keys, observed=True, sort=False)[[sum_column, count_column]].sum()
+    return summed[sum_column] / summed[count_column].where(summed[count_column] > 0)
+
+
+def broadcast(df: pd.DataFrame, key_columns: list, stats: pd.DataFrame, columns: dict) -> pd.DataFrame:
+    """
+    그룹 통계를 행마다 채웁니다. 행의 그룹 키로 인덱스를 한 번 만들어 모든 통계 컬럼을 함께 맞춥니다.
+
+    Args:
+        key_columns (list): df의 그룹 키 컬럼 (stats 인덱스와 같은 순서)
+        stats (pd.DataFrame): 그룹 키를 인덱스로 하는 통계
+        columns (dict): {stats 컬럼: df에 채울 컬럼}
+    """
+    if df.empty:
+        return df
+    keys = [df[column].astype(str) for column in key_columns]
+    index = pd.Index(keys[0]) if len(keys) == 1 else pd.MultiIndex.from_arrays(keys)
+    aligned = stats.reindex(index)
+    for source, target in columns.items():
+        df[target] = aligned[source].to_numpy() if source in aligned.columns else float("nan")
+    return df
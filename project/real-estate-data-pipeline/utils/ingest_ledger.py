@@ -0,0 +1,182 @@
+import hashlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import inspect, text
+
+LEDGER_TABLE = "ingest_ledger"
+
+# 다시 수집할 필요가 없는 상태값 ('empty'는 API 응답이 0건이었던 파티션)
+COMPLETED_STATUSES = ("success", "empty")
+
+
+def ensure_ledger_table(engine, schema: str):
+    """
+    (거래유형, 시군구코드, 연월) 파티션별 적재 이력을 기록하는 원장 테이블을 생성합니다.
+    이미 존재하면 아무 작업도 하지 않습니다.
+    """
+    ddl = f"""
+        CREATE TABLE IF NOT EXISTS {schema}."{LEDGER_TABLE}" (
+            trade_type       VARCHAR(16)  NOT NULL,
+            sigungu_code     VARCHAR(10)  NOT NULL,
+            year_month       VARCHAR(6)   NOT NULL,
+            status           VARCHAR(16)  NOT NULL,
+            row_count        INTEGER      NOT NULL DEFAULT 0,
+            checksum         VARCHAR(64),
+            duration_seconds DOUBLE PRECISION,
+            last_error       TEXT,
+            attempts         INTEGER      NOT NULL DEFAULT 0,
+            updated_at       TIMESTAMP    NOT NULL,
+            checked_at       TIMESTAMP,
+            PRIMARY KEY (trade_type, sigungu_code, year_month)
+        )
+    """
+    with engine.begin() as connection:
+        # 동시에 실행되는 수집 태스크들이 DDL을 함께 실행하지 않도록 트랜잭션 잠금을 잡습니다. (PostgreSQL)
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": LEDGER_TABLE})
+        connection.execute(text(ddl))
+        # checked_at: 응답이 바뀌지 않아 적재 없이 확인만 한 마지막 시각 (기존 원장 테이블에는 컬럼을 추가)
+        # ADD COLUMN IF NOT EXISTS는 PostgreSQL 전용이므로 인스펙터로 컬럼을 확인합니다.
+        columns = {column["name"] for column in inspect(connection).get_columns(LEDGER_TABLE, schema=schema)}
+        if "checked_at" not in columns:
+            connection.execute(text(f'ALTER TABLE {schema}."{LEDGER_TABLE}" ADD COLUMN checked_at TIMESTAMP'))
+
+
+def dataframe_checksum(df: pd.DataFrame) -> str:
+    """
+    DataFrame 내용의 SHA-256 체크섬을 계산합니다.
+    컬럼 순서와 행 순서에 영향을 받지 않도록 컬럼을 정렬하고, 행 해시를 정렬한 뒤 계산합니다.
+    """
+    if df.empty:
+        return hashlib.sha256(b"").hexdigest()
+    ordered = df[sorted(df.columns)].astype(str)
+    row_hashes = np.sort(pd.util.hash_pandas_object(ordered, index=False).to_numpy())
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+
+def record_partition(
+    connection,
+    schema: str,
+    trade_type: str,
+    sigungu_code: str,
+    year_month: str,
+    status: str,
+    row_count: int = 0,
+    checksum: str = None,
+    duration_seconds: float = None,
+    last_error: str = None,
+):
+    """
+    파티션 하나의 적재 결과를 원장에 기록(upsert)합니다. (실패는 record_partition_failure로 기록)
+    row_count와 checksum은 해당 파티션의 API 응답 기준입니다.
+    updated_at이 바뀐 파티션은 증분 피처 빌드의 재계산 대상이 됩니다.
+    데이터 저장과 같은 트랜잭션의 connection을 넘기면, 저장과 기록이 함께 커밋되거나 함께 롤백됩니다.
+    """
+    query = text(f"""
+        INSERT INTO {schema}."{LEDGER_TABLE}"
+            (trade_type, sigungu_code, year_month, status, row_count, checksum,
+             duration_seconds, last_error, attempts, updated_at, checked_at)
+        VALUES
+            (:trade_type, :sigungu_code, :year_month, :status, :row_count, :checksum,
+             :duration_seconds, :last_error, 1, :updated_at, :updated_at)
+        ON CONFLICT (trade_type, sigungu_code, year_month) DO UPDATE SET
+            status = EXCLUDED.status,
+            row_count = EXCLUDED.row_count,
+            checksum = EXCLUDED.checksum,
+            duration_seconds = EXCLUDED.duration_seconds,
+            last_error = EXCLUDED.last_error,
+            attempts = {LEDGER_TABLE}.attempts + 1,
+            updated_at = EXCLUDED.updated_at,
+            checked_at = EXCLUDED.checked_at
+    """)
+    connection.execute(query, {
+        "trade_type": trade_type,
+        "sigungu_code": sigungu_code,
+        "year_month": year_month,
+        "status": status,
+        "row_count": int(row_count),
+        "checksum": checksum,
+        "duration_seconds": duration_seconds,
+        "last_error": str(last_error)[:2000] if last_error is not None else None,
+        "updated_at": datetime.now(),
+    })
+
+
+def record_partition_failure(
+    connection,
+    schema: str,
+    trade_type: str,
+    sigungu_code: str,
+    year_month: str,
+    last_error: str,
+    duration_seconds: float = None,
+):
+    """
+    파티션 하나의 수집 실패를 원장에 기록합니다.
+    이미 기록이 있으면 status/last_error/attempts(와 소요 시간)만 바꾸고, 마지막으로 성공한 적재의 row_count/checksum과
+    updated_at은 그대로 둡니다. (다음 실행이 저장된 행이 있는 파티션으로 보고 sync_partition으로 차이를 반영하도록)
+    """
+    connection.execute(text(f"""
+        INSERT INTO {schema}."{LEDGER_TABLE}"
+            (trade_type, sigungu_code, year_month, status, duration_seconds, last_error, attempts, updated_at)
+        VALUES
+            (:trade_type, :sigungu_code, :year_month, 'failed', :duration_seconds, :last_error, 1, :updated_at)
+        ON CONFLICT (trade_type, sigungu_code, year_month) DO UPDATE SET
+            status = EXCLUDED.status,
+            duration_seconds = EXCLUDED.duration_seconds,
+            last_error = EXCLUDED.last_error,
+            attempts = {LEDGER_TABLE}.attempts + 1
+    """), {
+        "trade_type": trade_type,
+        "sigungu_code": sigungu_code,
+        "year_month": year_month,
+        "duration_seconds": duration_seconds,
+        "last_error": str(last_error)[:2000] if last_error is not None else None,
+        "updated_at": datetime.now(),
+    })
+
+
+def get_completed_partitions(engine, schema: str, trade_type: str) -> set:
+    """이미 적재가 끝난 (시군구코드, 연월) 파티션 집합을 반환합니다."""
+    statuses = ", ".join(f"'{status}'" for status in COMPLETED_STATUSES)
+    query = text(f"""
+        SELECT sigungu_code, year_month FROM {schema}."{LEDGER_TABLE}"
+        WHERE trade_type = :trade_type AND status IN ({statuses})
+    """)
+    with engine.connect() as connection:
+        result = connection.execute(query, {"trade_type": trade_type})
+        return {(row.sigungu_code, row.year_month) for row in result}
+
+
+def get_partition_state(connection, schema: str, trade_type: str, sigungu_code: str, year_month: str):
+    """
+    파티션 하나의 마지막 적재 상태를 반환합니다. 기록이 없으면 None을 반환합니다.
+
+    Returns:
+        Row: status, row_count, checksum 속성
+    """
+    return connection.execute(text(f"""
+        SELECT status, row_count, checksum FROM {schema}."{LEDGER_TABLE}"
+        WHERE trade_type = :trade_type AND sigungu_code = :sigungu_code AND year_month = :year_month
+    """), {"trade_type": trade_type, "sigungu_code": sigungu_code, "year_month": year_month}).first()
+
+
+def mark_checked(connection, schema: str, trade_type: str, partitions: list):
+    """
+    응답 체크섬이 바뀌지 않은 파티션의 확인 시각(checked_at)만 갱신합니다.
+    updated_at은 그대로 두므로 증분 피처 빌드의 재계산 대상이 되지 않습니다.
+
+    Args:
+        partitions (list): [('11110', '202507'), ...]
+    """
+    if not partitions:
+        return
+    connection.execute(text(f"""
+        UPDATE {schema}."{LEDGER_TABLE}" SET checked_at = :checked_at
+        WHERE trade_type = :trade_type AND sigungu_code = :sigungu_code AND year_month = :year_month
+    """), [
+        {"trade_type": trade_type, "sigungu_code": code, "year_month": year_month, "checked_at": datetime.now()}
+        for code, year_month in partitions
+    ])
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+
+def _combined_codes(left: pd.Series, right: pd.Series) -> np.ndarray:
+    """
+    두 Series를 이어 붙인 값의 정수 코드를 반환합니다. 결측값은 모두 -1(같은 값)로 봅니다.
+    카테고리 컬럼은 두 카테고리의 합집합 기준 코드로 맞춥니다.
+    """
+    if isinstance(left.dtype, pd.CategoricalDtype) or isinstance(right.dtype, pd.CategoricalDtype):
+        left, right = left.astype("category"), right.astype("category")
+        categories = left.cat.categories.union(right.cat.categories)
+        return np.concatenate([
+            pd.Categorical(left, categories=categories).codes,
+            pd.Categorical(right, categories=categories).codes,
+        ]).astype(np.int64)
+    codes, _ = pd.factorize(pd.concat([left, right], ignore_index=True))
+    return codes.astype(np.int64)
+
+
+def has_covering_interval(points_df, intervals_df, key, point_col, start_col, end_col):
+    """
+    points_df의 각 행에 대해, 같은 key를 가진 intervals_df 행 중
+    [start_col, end_col] 구간이 point_col 시점을 포함하는 행이 하나라도 있는지 반환합니다.
+
+    key로 inner merge한 뒤 구간 조건으로 거르는 방식과 결과는 같지만, 중간 결과(key가 같은 모든 쌍)를
+    만들지 않습니다. 구간을 (key, 시작일) 순으로 정렬하고 key별 '종료일 누적 최댓값'을 구해 두면,
+    시점 d에 대해 '시작일 <= d 인 마지막 구간'을 이진 탐색으로 찾고 그 위치의 누적 최댓값이 d 이상인지만
+    확인하면 됩니다. 메모리는 O(n + m), 시간은 O((n + m) log m) 입니다.
+
+    Args:
+        points_df (pd.DataFrame): 시점 데이터 (예: 매매)
+        intervals_df (pd.DataFrame): 구간 데이터 (예: 전세 계약)
+        key (list): 두 데이터를 연결하는 컬럼 목록. pandas merge와 같이 결측값끼리도 같은 키로 봅니다.
+        point_col (str): points_df의 시점 컬럼 (datetime)
+        start_col (str): intervals_df의 구간 시작 컬럼 (datetime)
+        end_col (str): intervals_df의 구간 종료 컬럼 (datetime)
+
+    Returns:
+        np.ndarray: points_df 행 순서와 같은 bool 배열
+    """
+    result = np.zeros(len(points_df), dtype=bool)
+    # 시점이나 구간 경계가 비어 있는 행은 매칭될 수 없습니다.
+    point_mask = points_df[point_col].notna().to_numpy()
+    intervals_df = intervals_df[intervals_df[start_col].notna() & intervals_df[end_col].notna()]
+    points_df = points_df[point_mask]
+    if points_df.empty or intervals_df.empty:
+        return result
+
+    # 두 데이터의 key를 같은 정수 코드 체계로 바꿉니다.
+    # 컬럼별로 먼저 정수 코드로 바꾸므로 카테고리 컬럼도 문자열(object)로 풀지 않고 처리합니다.
+    combined_keys = pd.DataFrame({
+        column: _combined_codes(points_df[column], intervals_df[column]) for column in key
+    })
+    key_codes = combined_keys.groupby(key, sort=False).ngroup().to_numpy(dtype=np.int64)
+    point_codes = key_codes[:len(points_df)]
+    interval_codes = key_codes[len(points_df):]
+
+    # 날짜를 일(day) 단위 정수로 바꿔 (key, 날짜)를 하나의 정렬 키로 합칩니다.
+    def to_days(series):
+        return pd.to_datetime(series).to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+    starts = to_days(intervals_df[start_col])
+    ends = to_days(intervals_df[end_col])
+    points = to_days(points_df[point_col])
+    base = min(starts.min(), points.min())
+    offset = int(max(starts.max(), points.max()) - base) + 1
+
+    order = np.lexsort((starts, interval_codes))
+    sorted_codes = interval_codes[order]
+    sorted_keys = sorted_codes * offset + (starts[order] - base)
+    # key가 같은 구간끼리 종료일의 누적 최댓값
+    running_max_end = pd.Series(ends[order]).groupby(sorted_codes).cummax().to_numpy()
+
+    point_keys = point_codes * offset + (points - base)
+    pos = np.searchsorted(sorted_keys, point_keys, side="right") - 1
+    found = pos >= 0
+    pos = np.where(found, pos, 0)
+    result[point_mask] = found & (sorted_codes[pos] == point_codes) & (running_max_end[pos] >= points)
+    return result
+
+
+def recent_window_sum(points_df, events_df, key, point_col, event_col, value_col, window_days):
+    """
+    points_df의 각 행에 대해, 같은 key를 가진 events_df 행 중 시점이 [point_col - window_days일, point_col] 안에 있는
+    행들의 value_col 합계와 건수를 반환합니다. (시점 기준 최근 window_days일의 as-of 집계)
+
+    key로 병합한 뒤 기간으로 거르는 방식과 결과는 같지만, 중간 결과를 만들지 않습니다.
+    이벤트를 (key, 시점) 순으로 정렬해 값의 누적 합계를 구해 두면, 기간의 시작/끝 위치를 이진 탐색으로 찾아
+    두 누적 합계의 차이로 기간 합계를 구할 수 있습니다. 메모리는 O(n + m), 시간은 O((n + m) log m) 입니다.
+
+    Args:
+        points_df (pd.DataFrame): 기준 시점 데이터 (예: 매매)
+        events_df (pd.DataFrame): 집계할 이벤트 데이터 (예: 전세 계약)
+        key (list): 두 데이터를 연결하는 컬럼 목록
+        point_col (str): points_df의 시점 컬럼 (datetime)
+        event_col (str): events_df의 시점 컬럼 (datetime)
+        value_col (str): events_df에서 합계를 구할 값 컬럼 (결측인 행은 제외)
+        window_days (int): 기준 시점 이전 며칠까지 포함할지
+
+    Returns:
+        tuple: (합계 float64 배열, 건수 int64 배열) - points_df 행 순서와 같음
+    """
+    totals = np.zeros(len(points_df), dtype=np.float64)
+    counts = np.zeros(len(points_df), dtype=np.int64)
+    point_mask = points_df[point_col].notna().to_numpy()
+    events_df = events_df[events_df[event_col].notna() & events_df[value_col].notna()]
+    points_df = points_df[point_mask]
+    if points_df.empty or events_df.empty:
+        return totals, counts
+
+    combined_keys = pd.DataFrame({
+        column: _combined_codes(points_df[column], events_df[column]) for column in key
+    })
+    key_codes = combined_keys.groupby(key, sort=False).ngroup().to_numpy(dtype=np.int64)
+    point_codes = key_codes[:len(points_df)]
+    event_codes = key_codes[len(points_df):]
+
+    def to_days(series):
+        return pd.to_datetime(series).to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+    events = to_days(events_df[event_col])
+    points = to_days(points_df[point_col])
+    # 기간 시작일(시점 - window_days)도 0 이상이 되도록 기준을 잡아, (key, 날짜) 정렬 키가 key 경계를 넘지 않게 합니다.
+    base = min(events.min(), points.min() - window_days)
+    offset = int(max(events.max(), points.max()) - base) + 1
+
+    order = np.lexsort((events, event_codes))
+    sorted_keys = event_codes[order] * offset + (events[order] - base)
+    cumulative = np.concatenate([[0.0], np.cumsum(events_df[value_col].to_numpy(dtype=np.float64)[order])])
+
+    end = np.searchsorted(sorted_keys, point_codes * offset + (points - base), side="right")
+    start = np.searchsorted(sorted_keys, point_codes * offset + (points - window_days - base), side="left")
+    totals[point_mask] = cumulative[end] - cumulative[start]
+    counts[point_mask] = end - start
+    return totals, counts
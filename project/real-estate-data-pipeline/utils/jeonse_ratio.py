@@ -0,0 +1,90 @@
+import pandas as pd
+
+from utils.feature_schema import apply_schema, as_float64
+from utils.group_stats import aggregate
+from utils.interval_join import recent_window_sum
+from utils.price_index import AREA_BAND_LABELS, AREA_BANDS
+
+JEONSE_RATIO_TABLE = "analytics_jeonse_ratio"
+
+# 매매일 이전 몇 일 안의 전세 계약을 매매와 짝지을지 (매매일 포함)
+JEONSE_RATIO_WINDOW_DAYS = 180
+
+JEONSE_RATIO_COLUMNS = [
+    "complex_id", "시군구명", "읍면동명", "아파트명", "면적대", "거래연월",
+    "매매건수", "평균매매가(만원)", "평균전세가(만원)", "전세가율(%)",
+]
+
+
+def match_recent_jeonse(df_trade: pd.DataFrame, df_jeonse: pd.DataFrame, window_days: int = JEONSE_RATIO_WINDOW_DAYS) -> pd.DataFrame:
+    """
+    매매마다 같은 평형(unit_type_id)의 최근 window_days일 전세 계약 평균 보증금을 붙입니다.
+    전세 계약이 없는 매매는 제외합니다.
+    """
+    totals, counts = recent_window_sum(df_trade, df_jeonse, ["unit_type_id"], "거래일자", "거래일자", "보증금(만원)", window_days)
+    deal_date = pd.to_datetime(df_trade["거래일자"])
+    sales = pd.DataFrame({
+        "complex_id": df_trade["complex_id"].to_numpy(),
+        "시군구명": df_trade["시군구명"].astype(str).to_numpy(),
+        "읍면동명": df_trade["읍면동명"].astype(str).to_numpy(),
+        "아파트명": df_trade["아파트명"].astype(str).to_numpy(),
+        "면적대": pd.cut(as_float64(df_trade["전용면적(㎡)"]), AREA_BANDS, labels=AREA_BAND_LABELS, right=False).astype(str).to_numpy(),
+        "거래연월": (deal_date.dt.year * 100 + deal_date.dt.month).to_numpy(),
+        "price": as_float64(df_trade["거래금액(만원)"]).to_numpy(),
+        "jeonse": totals / counts.clip(min=1),
+    })
+    sales = sales[(counts > 0) & (sales["price"] > 0)]
+    sales["ratio"] = sales["jeonse"] / sales["price"] * 100
+    return sales
+
+
+def compute_jeonse_ratio(df_trade: pd.DataFrame, df_jeonse: pd.DataFrame, window_days: int = JEONSE_RATIO_WINDOW_DAYS) -> pd.DataFrame:
+    """
+    단지 x 면적대 x 매매 거래연월별 전세가율 테이블을 만듭니다.
+
+    매매마다 같은 평형의 최근 전세 계약과 짝지어(정렬된 as-of 집계, 교차 병합 없음) 매매가 대비 전세가 비율을 구하고,
+    월별 중위값을 전세가율(%)로 둡니다. 평균매매가/평균전세가는 짝지어진 매매 기준입니다.
+    단지는 자치구 안에 있으므로 자치구별로 나눠 계산해도 결과가 같습니다.
+    """
+    sales = match_recent_jeonse(df_trade, df_jeonse, window_days)
+    if sales.empty:
+        return apply_schema(pd.DataFrame(columns=JEONSE_RATIO_COLUMNS), JEONSE_RATIO_TABLE)
+
+    keys = ["complex_id", "면적대", "거래연월"]
+    stats = aggregate(sales, keys, ["price", "jeonse"], stats=("mean", "count")).join(
+        aggregate(sales, keys, ["ratio"], stats=("median",))
+    )
+    # 같은 단지의 표기가 여럿이면 그 달 거래 중 사전순으로 첫 번째 이름을 씁니다. (전체/증분, 직렬/병렬 빌드에서 같은 값)
+    # 시군구명/읍면동명은 단지 자연키에 포함되므로 단지 안에서 같습니다.
+    names = sales.sort_values("아파트명", kind="stable").drop_duplicates(keys).set_index(keys)[["시군구명", "읍면동명", "아파트명"]]
+    stats = stats.join(names).reset_index()
+    ratio_df = pd.DataFrame({
+        **{column: stats[column] for column in ["complex_id", "시군구명", "읍면동명", "아파트명", "면적대", "거래연월"]},
+        "매매건수": stats["price_count"],
+        "평균매매가(만원)": stats["price_mean"].round(1),
+        "평균전세가(만원)": stats["jeonse_mean"].round(1),
+        "전세가율(%)": stats["ratio_median"].round(2),
+    })
+    return apply_schema(sort_jeonse_ratio(ratio_df), JEONSE_RATIO_TABLE)
+
+
+def sort_jeonse_ratio(ratio_df: pd.DataFrame) -> pd.DataFrame:
+    """단지, 면적대, 거래연월 순으로 정렬합니다. (직렬/병렬 빌드 결과의 행 순서를 맞춤)"""
+    return ratio_df.sort_values(["complex_id", "면적대", "거래연월"], ignore_index=True)
+
+
+def affected_months(year_month, window_days: int = JEONSE_RATIO_WINDOW_DAYS) -> list:
+    """
+    YYYYMM 달의 전세 계약이 바뀌었을 때 전세가율이 달라질 수 있는 매매 거래연월 목록입니다.
+    (그 달부터, 그 달 말일 + window_days일이 속한 달까지)
+    """
+    month = pd.Period(year=int(year_month) // 100, month=int(year_month) % 100, freq="M")
+    last = (month.end_time + pd.Timedelta(days=window_days)).to_period("M")
+    return [int(period.strftime("%Y%m")) for period in pd.period_range(month, last, freq="M")]
+
+
+def lookback_months(year_month, window_days: int = JEONSE_RATIO_WINDOW_DAYS) -> list:
+    """YYYYMM 달 매매의 전세가율을 계산하는 데 필요한 전세 계약 거래연월 목록입니다. (그 달 1일 - window_days일부터 그 달까지)"""
+    month = pd.Period(year=int(year_month) // 100, month=int(year_month) % 100, freq="M")
+    first = (month.start_time - pd.Timedelta(days=window_days)).to_period("M")
+    return [int(period.strftime("%Y%m")) for period in pd.period_range(first, month, freq="M")]
@@ -0,0 +1,164 @@
+import pandas as pd
+
+# 원시 테이블별 거래 유형
+TRADE_TYPE_BY_TABLE = {"raw_apt_trade": "매매", "raw_apt_jeonse": "전월세"}
+
+# 예전 PublicDataReader(한글 컬럼)로 받은 응답 컬럼 → 원시 테이블(국토부 API 영문 필드) 컬럼
+# 국토부API/sample.py처럼 한글 컬럼으로 받은 데이터도 같은 원시 테이블에 저장할 수 있도록 이름을 맞춥니다.
+KOREAN_COLUMN_MAP = {
+    "법정동시군구코드": "sggCd", "법정동읍면동코드": "umdCd", "법정동지번코드": "landCd",
+    "법정동본번코드": "bonbun", "법정동부번코드": "bubun", "도로명": "roadNm",
+    "도로명시군구코드": "roadNmSggCd", "도로명코드": "roadNmCd", "도로명일련번호코드": "roadNmSeq",
+    "도로명지상지하코드": "roadNmbCd", "도로명건물본번호코드": "roadNmBonbun", "도로명건물부번호코드": "roadNmBubun",
+    "법정동": "umdNm", "단지명": "aptNm", "지번": "jibun", "전용면적": "excluUseAr",
+    "계약년도": "dealYear", "계약월": "dealMonth", "계약일": "dealDay", "층": "floor", "건축년도": "buildYear",
+    "단지일련번호": "aptSeq", "아파트동명": "aptDong",
+    # 매매
+    "거래금액": "dealAmount", "해제여부": "cdealType", "해제사유발생일": "cdealDay", "거래유형": "dealingGbn",
+    "중개사소재지": "estateAgentSggNm", "등기일자": "rgstDate", "매도자": "slerGbn", "매수자": "buyerGbn",
+    "토지임대부아파트여부": "landLeaseholdGbn",
+    # 전월세
+    "보증금액": "deposit", "월세금액": "monthlyRent", "계약기간": "contractTerm", "계약구분": "contractType",
+    "갱신요구권사용": "useRRRight", "종전계약보증금": "preDeposit", "종전계약월세": "preMonthlyRent",
+}
+
+# 적재할 때 원시 문자열 컬럼에서 계산해 함께 저장하는 타입 컬럼
+# 원본 문자열 컬럼은 행 지문(자연키)과 응답 비교를 위해 그대로 둡니다.
+#   deal_date      : 계약일 (dealYear/dealMonth/dealDay)
+#   area_m2        : 전용면적(㎡) (excluUseAr)
+#   floor_no       : 층 (floor, 지하층은 음수)
+#   build_year     : 건축년도 (buildYear)
+#   deal_amount    : 매매 거래금액(만원) (dealAmount, '120,000' → 120000)
+#   deposit_amount : 전월세 보증금(만원) (deposit)
+#   rent_amount    : 월세(만원) (monthlyRent, 전세는 0)
+#   contract_start : 계약기간 시작월 1일 (contractTerm '24.03~26.03' → 2024-03-01)
+#   contract_end   : 계약기간 종료월 1일 (→ 2026-03-01)
+TYPED_COLUMNS = {
+    "매매": ["deal_date", "area_m2", "floor_no", "build_year", "deal_amount"],
+    "전월세": ["deal_date", "area_m2", "floor_no", "build_year", "deposit_amount", "rent_amount", "contract_start", "contract_end"],
+}
+
+# 계약기간 형식: 'YY.MM~YY.MM'
+CONTRACT_TERM_PATTERN = r"^\s*(\d{2})\.(\d{1,2})\s*~\s*(\d{2})\.(\d{1,2})\s*$"
+
+
+def _clean_text(series: pd.Series) -> pd.Series:
+    """쉼표와 앞뒤 공백을 제거한 문자열 (결측은 빈 문자열)"""
+    return series.astype(str).str.replace(",", "", regex=False).str.strip().where(series.notna(), "")
+
+
+def to_float(series: pd.Series) -> pd.Series:
+    """숫자 문자열을 float64로 바꿉니다. 숫자가 아니면 NaN입니다."""
+    return pd.to_numeric(_clean_text(series), errors="coerce").astype("float64")
+
+
+def to_int(series: pd.Series) -> pd.Series:
+    """'120,000' 같은 정수 문자열을 nullable 정수(Int64)로 바꿉니다. 숫자가 아니거나 소수이면 결측입니다."""
+    numbers = to_float(series)
+    return numbers.where(numbers % 1 == 0).astype("Int64")
+
+
+def to_date(year, month, day) -> pd.Series:
+    """연/월/일 컬럼으로 날짜(datetime64)를 만듭니다. 존재하지 않는 날짜(2월 30일 등)는 NaT입니다."""
+    parts = pd.DataFrame({"year": year, "month": month, "day": day}).astype("float64")
+    return pd.to_datetime(parts, errors="coerce")
+
+
+def parse_contract_term(series: pd.Series) -> tuple:
+    """
+    계약기간('24.03~26.03')을 (시작일, 종료일) 날짜 컬럼으로 나눕니다. 날짜는 해당 월 1일입니다.
+    2021년 6월 임대차 신고제 이전 계약처럼 값이 비어 있거나 형식이 다르면 NaT입니다.
+    """
+    parts = series.astype(str).str.extract(CONTRACT_TERM_PATTERN).astype("float64")
+    return to_date(2000 + parts[0], parts[1], 1), to_date(2000 + parts[2], parts[3], 1)
+
+
+def rename_korean_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """한글 응답 컬럼을 원시 테이블의 영문 컬럼 이름으로 바꿉니다. 영문 응답은 그대로 반환합니다."""
+    columns = {column: KOREAN_COLUMN_MAP[column] for column in df.columns if column in KOREAN_COLUMN_MAP}
+    return df.rename(columns=columns) if columns else df
+
+
+def normalize_raw(df: pd.DataFrame, trade_type: str) -> pd.DataFrame:
+    """
+    API 응답을 원시 테이블 형태로 정규화합니다.
+    한글 컬럼 이름을 영문으로 바꾸고, 문자열 필드를 한 번만 파싱해 타입 컬럼(TYPED_COLUMNS)을 추가합니다.
+    피처 빌드는 매번 전체 이력의 문자열을 다시 파싱하지 않고 이 컬럼을 그대로 읽습니다.
+    응답에 없는 원본 필드로 계산하는 타입 컬럼은 결측으로 채웁니다.
+    """
+    if trade_type not in TYPED_COLUMNS:
+        raise ValueError(f"지원하지 않는 거래 유형입니다: {trade_type}")
+    df = rename_korean_columns(df).copy()
+    empty = pd.Series(None, index=df.index, dtype=object)
+
+    def field(column):
+        return df[column] if column in df.columns else empty
+
+    df["deal_date"] = to_date(to_int(field("dealYear")), to_int(field("dealMonth")), to_int(field("dealDay")))
+    df["area_m2"] = to_float(field("excluUseAr"))
+    df["floor_no"] = to_int(field("floor"))
+    df["build_year"] = to_int(field("buildYear"))
+    if trade_type == "매매":
+        df["deal_amount"] = to_int(field("dealAmount"))
+    else:
+        df["deposit_amount"] = to_int(field("deposit"))
+        df["rent_amount"] = to_int(field("monthlyRent"))
+        df["contract_start"], df["contract_end"] = parse_contract_term(field("contractTerm"))
+    return df
+
+
+# --- 타입 컬럼이 없던 기존 원시 테이블을 채우는 SQL 식 (normalize_raw와 같은 규칙) ---
+# CASE를 중첩해 형식을 확인한 뒤에만 CAST/make_date를 실행합니다. (WHERE/AND 안의 평가 순서는 보장되지 않음)
+
+def _clean_sql(column: str) -> str:
+    return f"""btrim(replace(CAST("{column}" AS TEXT), ',', ''))"""
+
+
+def _float_sql(column: str) -> str:
+    return (
+        f"CASE WHEN {_clean_sql(column)} ~ '^[-+]?([0-9]+\\.?[0-9]*|\\.[0-9]+)$' "
+        f"THEN CAST({_clean_sql(column)} AS DOUBLE PRECISION) END"
+    )
+
+
+def _int_sql(column: str) -> str:
+    return (
+        f"CASE WHEN {_clean_sql(column)} ~ '^[-+]?([0-9]+\\.?[0-9]*|\\.[0-9]+)$' "
+        f"THEN CASE WHEN CAST({_clean_sql(column)} AS NUMERIC) % 1 = 0 "
+        f"THEN CAST(CAST({_clean_sql(column)} AS NUMERIC) AS BIGINT) END END"
+    )
+
+
+def _date_sql(year: str, month: str, day: str) -> str:
+    """정수 SQL 식(연/월/일)으로 날짜를 만듭니다. 존재하지 않는 날짜는 NULL입니다."""
+    first_day = f"make_date(CAST({year} AS INTEGER), CAST({month} AS INTEGER), 1)"
+    return (
+        f"CASE WHEN {year} BETWEEN 1 AND 9999 AND {month} BETWEEN 1 AND 12 THEN "
+        f"CASE WHEN {day} BETWEEN 1 AND EXTRACT(DAY FROM {first_day} + INTERVAL '1 month - 1 day') "
+        f"THEN make_date(CAST({year} AS INTEGER), CAST({month} AS INTEGER), CAST({day} AS INTEGER)) END END"
+    )
+
+
+def _contract_sql(side: int) -> str:
+    """계약기간의 시작(side=0)/종료(side=1) 월 1일"""
+    # 형식이 맞지 않으면 regexp_match가 NULL이므로 연/월도 NULL이 됩니다.
+    match = f"""regexp_match(CAST("contractTerm" AS TEXT), '{CONTRACT_TERM_PATTERN}')"""
+    year, month = f"(2000 + CAST(({match})[{2 * side + 1}] AS INTEGER))", f"CAST(({match})[{2 * side + 2}] AS INTEGER)"
+    return _date_sql(year, month, "1")
+
+
+# {타입 컬럼: (SQL 타입, 원본 컬럼 목록, 기존 행을 채우는 식)}
+TYPED_COLUMN_SQL = {
+    "deal_date": (
+        "TIMESTAMP", ["dealYear", "dealMonth", "dealDay"],
+        _date_sql(*(f"({_int_sql(column)})" for column in ("dealYear", "dealMonth", "dealDay"))),
+    ),
+    "area_m2": ("DOUBLE PRECISION", ["excluUseAr"], _float_sql("excluUseAr")),
+    "floor_no": ("BIGINT", ["floor"], _int_sql("floor")),
+    "build_year": ("BIGINT", ["buildYear"], _int_sql("buildYear")),
+    "deal_amount": ("BIGINT", ["dealAmount"], _int_sql("dealAmount")),
+    "deposit_amount": ("BIGINT", ["deposit"], _int_sql("deposit")),
+    "rent_amount": ("BIGINT", ["monthlyRent"], _int_sql("monthlyRent")),
+    "contract_start": ("TIMESTAMP", ["contractTerm"], _contract_sql(0)),
+    "contract_end": ("TIMESTAMP", ["contractTerm"], _contract_sql(1)),
+}
@@ -0,0 +1,387 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import inspect, text, types as sqltypes
+
+from utils.bulk_load import append_rows
+from utils.duckdb_backend import read_arrow
+from utils.ingest_ledger import LEDGER_TABLE
+from utils.normalize import TRADE_TYPE_BY_TABLE
+
+# 파티션별 내보내기 기록 (테이블, 연도, 월, 시군구코드) — 지문이 바뀐 파티션만 다시 내보냅니다.
+EXPORT_STATE_TABLE = "lake_export_state"
+
+# 내보내기 후보를 고르는 기록. 매번 테이블 전체의 지문을 구하지 않고 후보 파티션의 지문만 구합니다.
+#   원시 테이블: ingest_ledger 행의 lake_exported_at이 updated_at과 다르면 후보입니다. (해제/정정 반영도 원장을 갱신함)
+#   피처 테이블: 피처 빌드가 바꾼 자치구를 lake_export_queue에 남깁니다. (동/구별 평균 컬럼이 자치구 전체 행에서 바뀜)
+#                시군구코드가 ALL_PARTITIONS('*')인 행은 전체 빌드로 모든 파티션이 후보라는 뜻입니다.
+EXPORT_QUEUE_TABLE = "lake_export_queue"
+LEDGER_EXPORTED_COLUMN = "lake_exported_at"
+ALL_PARTITIONS = "*"
+# 후보가 이보다 많으면(처음 후보를 기록하기 시작한 날 등) 조건을 나열하지 않고 모든 파티션의 지문을 구합니다.
+MAX_CANDIDATES = int(os.getenv("LAKE_MAX_CANDIDATES", "500"))
+
+# 기본 내보내기 디렉터리 (<디렉터리>/<테이블>/year=YYYY/month=MM/sgg=CODE/part-0.parquet)
+DEFAULT_LAKE_DIR = os.getenv("LAKE_DIR", os.path.join(os.path.dirname(__file__), '..', 'data', 'lake'))
+
+# Hive 파티션 키 (원시/피처 테이블의 컬럼 이름과 겹치지 않는 이름)
+PARTITION_KEYS = ("year", "month", "sgg")
+
+# 행 그룹 크기: 파티션 하나(시군구 x 월)는 대부분 행 그룹 하나에 들어가고,
+# 큰 파티션은 정렬 컬럼 기준으로 나뉘어 행 그룹별 min/max 통계로 건너뛸 수 있습니다.
+ROW_GROUP_ROWS = int(os.getenv("LAKE_ROW_GROUP_ROWS", "65536"))
+PARQUET_COMPRESSION = "zstd"
+PARTITION_FILE = "part-0.parquet"
+
+# 기간 컬럼 종류
+#   ym  : YYYYMM 정수 (deal_ym, 거래연월)
+#   date: 날짜 (거래일자) — 범위 조건으로 읽어 인덱스를 사용할 수 있습니다.
+#   year: 연도 정수 (거래년도) — 월 파티션 없이 year=/sgg=로 나눕니다.
+PERIOD_KINDS = ("ym", "date", "year")
+
+# 한 번에 읽는 시군구 수 (같은 달의 바뀐 파티션을 묶어 한 쿼리로 읽습니다)
+SGG_BATCH = 50
+
+
+def ensure_export_state_table(engine, schema: str):
+    """
+    파티션별 내보내기 기록 테이블과 후보 기록(lake_export_queue, ingest_ledger.lake_exported_at)을 만듭니다.
+    이미 존재하면 아무 작업도 하지 않습니다.
+    """
+    with engine.begin() as connection:
+        ensure_export_queue_table(connection, schema)
+        inspector = inspect(connection)
+        if inspector.has_table(LEDGER_TABLE, schema=schema):
+            columns = {column["name"] for column in inspector.get_columns(LEDGER_TABLE, schema=schema)}
+            if LEDGER_EXPORTED_COLUMN not in columns:
+                connection.execute(text(f'ALTER TABLE {schema}."{LEDGER_TABLE}" ADD COLUMN {LEDGER_EXPORTED_COLUMN} TIMESTAMP'))
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {schema}."{EXPORT_STATE_TABLE}" (
+                table_name  VARCHAR(64) NOT NULL,
+                year        INTEGER     NOT NULL,
+                month       INTEGER     NOT NULL,
+                sgg         VARCHAR(10) NOT NULL,
+                row_count   BIGINT      NOT NULL,
+                fingerprint VARCHAR(32),
+                exported_at TIMESTAMP   NOT NULL,
+                PRIMARY KEY (table_name, year, month, sgg)
+            )
+        """))
+
+
+def ensure_export_queue_table(connection, schema: str):
+    """피처 테이블의 내보내기 후보(테이블, 시군구코드) 기록 테이블을 생성합니다."""
+    connection.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {schema}."{EXPORT_QUEUE_TABLE}" (
+            table_name VARCHAR(64) NOT NULL,
+            sgg        VARCHAR(10) NOT NULL,
+            queued_at  TIMESTAMP   NOT NULL,
+            PRIMARY KEY (table_name, sgg)
+        )
+    """))
+
+
+def queue_export(connection, schema: str, table_names: list, sigungu_codes: list, queued_at: datetime):
+    """
+    (피처 빌드 트랜잭션 안에서) 바뀐 자치구를 다음 내보내기의 후보로 남깁니다.
+    sigungu_codes가 None이면(전체 빌드) 테이블의 모든 파티션이 후보입니다.
+    """
+    ensure_export_queue_table(connection, schema)
+    codes = [ALL_PARTITIONS] if sigungu_codes is None else sorted(set(sigungu_codes))
+    if not codes or not table_names:
+        return
+    connection.execute(text(f"""
+        INSERT INTO {schema}."{EXPORT_QUEUE_TABLE}" (table_name, sgg, queued_at)
+        VALUES (:table_name, :sgg, :queued_at)
+        ON CONFLICT (table_name, sgg) DO UPDATE SET queued_at = EXCLUDED.queued_at
+    """), [{"table_name": table_name, "sgg": code, "queued_at": queued_at} for table_name in table_names for code in codes])
+
+
+def pending_exports(connection, schema: str, table_name: str) -> pd.DataFrame:
+    """
+    테이블의 내보내기 후보를 반환합니다. 읽은 시각(seen)은 내보내기가 끝난 뒤 consume_exports로 기록합니다.
+
+    Returns:
+        pd.DataFrame: sgg, year_month(원시 테이블의 'YYYYMM', 피처 테이블은 None = 자치구 전체), seen 컬럼
+    """
+    if table_name in TRADE_TYPE_BY_TABLE:
+        if not inspect(connection).has_table(LEDGER_TABLE, schema=schema):
+            return pd.DataFrame(columns=["sgg", "year_month", "seen"])
+        return pd.read_sql(text(f"""
+            SELECT sigungu_code AS sgg, year_month, updated_at AS seen FROM {schema}."{LEDGER_TABLE}"
+            WHERE trade_type = :trade_type AND status = 'success' AND {LEDGER_EXPORTED_COLUMN} IS DISTINCT FROM updated_at
+        """), connection, params={"trade_type": TRADE_TYPE_BY_TABLE[table_name]})
+    return pd.read_sql(text(f"""
+        SELECT sgg, CAST(NULL AS VARCHAR) AS year_month, queued_at AS seen FROM {schema}."{EXPORT_QUEUE_TABLE}"
+        WHERE table_name = :table_name
+    """), connection, params={"table_name": table_name})
+
+
+def consume_exports(connection, schema: str, table_name: str, pending: pd.DataFrame):
+    """
+    내보낸 후보를 완료로 기록합니다. 내보내는 동안 다시 바뀐 후보(seen과 시각이 다름)는 다음 실행의 후보로 남습니다.
+    """
+    if pending.empty:
+        return
+    if table_name in TRADE_TYPE_BY_TABLE:
+        stage_name = '"_stage_lake_exported"'
+        connection.execute(text(
+            f"CREATE TEMPORARY TABLE IF NOT EXISTS {stage_name} (sgg VARCHAR(10), year_month VARCHAR(6), seen TIMESTAMP)"
+        ))
+        connection.execute(text(f"DELETE FROM {stage_name}"))
+        append_rows(connection, pending[["sgg", "year_month", "seen"]], stage_name)
+        connection.execute(text(f"""
+            UPDATE {schema}."{LEDGER_TABLE}" AS l SET {LEDGER_EXPORTED_COLUMN} = s.seen
+            FROM {stage_name} AS s
+            WHERE l.trade_type = :trade_type AND l.sigungu_code = s.sgg AND l.year_month = s.year_month AND l.updated_at = s.seen
+        """), {"trade_type": TRADE_TYPE_BY_TABLE[table_name]})
+        return
+    connection.execute(text(f"""
+        DELETE FROM {schema}."{EXPORT_QUEUE_TABLE}" WHERE table_name = :table_name AND sgg = :sgg AND queued_at = :seen
+    """), [{"table_name": table_name, "sgg": row.sgg, "seen": row.seen} for row in pending.itertuples(index=False)])
+
+
+def period_sql(kind: str, column: str) -> tuple:
+    """기간 컬럼으로 (연도, 월) SQL 식을 만듭니다. 월이 없는 테이블의 월은 0입니다."""
+    if kind == "ym":
+        return f"CAST({column} AS INTEGER) / 100", f"CAST({column} AS INTEGER) % 100"
+    if kind == "date":
+        return f"CAST(EXTRACT(YEAR FROM {column}) AS INTEGER)", f"CAST(EXTRACT(MONTH FROM {column}) AS INTEGER)"
+    if kind == "year":
+        return f"CAST({column} AS INTEGER)", "0"
+    raise ValueError(f"지원하지 않는 기간 종류입니다: {kind} (가능: {PERIOD_KINDS})")
+
+
+def period_filter(kind: str, column: str, year: int, month: int) -> str:
+    """(연도, 월) 파티션 하나의 행을 고르는 WHERE 조건. 기간 컬럼에 인덱스가 있으면 사용할 수 있는 형태로 만듭니다."""
+    year, month = int(year), int(month)
+    if kind == "ym":
+        return f"{column} = {year * 100 + month}"
+    if kind == "date":
+        start = pd.Timestamp(year=year, month=month, day=1)
+        end = start + pd.offsets.MonthBegin(1)
+        return f"{column} >= DATE '{start:%Y-%m-%d}' AND {column} < DATE '{end:%Y-%m-%d}'"
+    return f"{column} = {year}"
+
+
+def partition_dir(lake_dir: str, table_name: str, year: int, month: int, sgg: str) -> str:
+    """파티션 디렉터리 경로 (월이 없는 테이블은 year=/sgg=)"""
+    parts = [lake_dir, table_name, f"year={int(year)}"]
+    if int(month):
+        parts.append(f"month={int(month):02d}")
+    parts.append(f"sgg={sgg}")
+    return os.path.join(*parts)
+
+
+def _fingerprint_sql(dialect: str) -> str:
+    """
+    파티션 내용 지문 SQL 식. PostgreSQL은 행 텍스트 해시의 합(행 순서와 무관)으로 계산하고,
+    그 외 DB는 지문 없이(NULL) 매번 다시 내보냅니다.
+    """
+    if dialect == "postgresql":
+        return "CAST(SUM(hashtextextended(CAST(t AS TEXT), 0)) AS VARCHAR)"
+    return "CAST(NULL AS VARCHAR)"
+
+
+def candidate_filter(candidates: list, period: tuple, sgg_sql: str) -> tuple:
+    """
+    후보 [(시군구코드, 'YYYYMM' 또는 None)]를 원본 테이블(t)의 WHERE 조건과 바인딩 파라미터로 만듭니다.
+    연월이 None이면 자치구 전체가 후보입니다. 원시 테이블은 기간 조건(period_filter)으로 월 파티션만 읽습니다.
+    """
+    clauses, params = [], {}
+    for i, (code, year_month) in enumerate(candidates):
+        clause = f"{sgg_sql} = :lake_sgg_{i}"
+        if year_month is not None:
+            clause += f" AND {period_filter(*period, int(year_month) // 100, int(year_month) % 100)}"
+        clauses.append(f"({clause})")
+        params[f"lake_sgg_{i}"] = code
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def partition_fingerprints(connection, schema: str, table_name: str, period: tuple, sgg_sql: str, candidates: list = None) -> pd.DataFrame:
+    """
+    테이블의 (연도, 월, 시군구코드) 파티션별 행 수와 내용 지문을 구합니다.
+    집계만 DB에서 실행하므로 행 데이터는 옮기지 않습니다. 파티션 키가 없는 행은 내보내지 않습니다.
+    candidates가 주어지면 후보 파티션의 행만 읽습니다. (candidate_filter)
+
+    Returns:
+        pd.DataFrame: year, month, sgg, row_count, fingerprint 컬럼
+    """
+    year_sql, month_sql = period_sql(*period)
+    where, params = candidate_filter(candidates, period, sgg_sql) if candidates is not None else ("true", {})
+    return pd.read_sql(text(f"""
+        SELECT year, month, sgg, COUNT(*) AS row_count, {_fingerprint_sql(connection.dialect.name)} AS fingerprint
+        FROM (
+            SELECT {year_sql} AS year, {month_sql} AS month, {sgg_sql} AS sgg, t FROM {schema}."{table_name}" AS t WHERE {where}
+        ) AS keyed
+        WHERE year IS NOT NULL AND sgg IS NOT NULL
+        GROUP BY year, month, sgg
+    """), connection, params=params)
+
+
+def exported_partitions(connection, schema: str, table_name: str) -> pd.DataFrame:
+    """이전에 내보낸 파티션과 지문을 반환합니다."""
+    return pd.read_sql(text(f"""
+        SELECT year, month, sgg, fingerprint FROM {schema}."{EXPORT_STATE_TABLE}" WHERE table_name = :table_name
+    """), connection, params={"table_name": table_name})
+
+
+def arrow_types(connection, schema: str, table_name: str) -> dict:
+    """DB 테이블 컬럼 타입을 Arrow 타입으로 바꿉니다. {컬럼: Arrow 타입}"""
+    def to_arrow(sql_type):
+        if isinstance(sql_type, sqltypes.Boolean):
+            return pa.bool_()
+        if isinstance(sql_type, sqltypes.SmallInteger):
+            return pa.int16()
+        if isinstance(sql_type, sqltypes.BigInteger):
+            return pa.int64()
+        if isinstance(sql_type, sqltypes.Integer):
+            return pa.int32()
+        if isinstance(sql_type, sqltypes.REAL):
+            return pa.float32()
+        if isinstance(sql_type, (sqltypes.Float, sqltypes.Numeric)):
+            return pa.float64()
+        if isinstance(sql_type, sqltypes.DateTime):
+            return pa.timestamp("us")
+        if isinstance(sql_type, sqltypes.Date):
+            return pa.date32()
+        return pa.string()
+
+    return {column["name"]: to_arrow(column["type"]) for column in inspect(connection).get_columns(table_name, schema=schema)}
+
+
+def write_partition(table: pa.Table, path: str, sort_columns: list):
+    """
+    파티션 하나를 Parquet 파일로 씁니다.
+    정렬 컬럼 순으로 정렬해 행 그룹/페이지의 min/max 통계 범위를 좁히고, 임시 파일에 쓴 뒤 이름을 바꿔 교체합니다.
+    """
+    if sort_columns:
+        table = table.sort_by([(column, "ascending") for column in sort_columns])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    pq.write_table(
+        table, temp_path,
+        row_group_size=ROW_GROUP_ROWS, compression=PARQUET_COMPRESSION,
+        write_statistics=True, use_dictionary=True,
+    )
+    os.replace(temp_path, path)
+
+
+def remove_partition(path: str, lake_table_dir: str):
+    """파티션 파일을 지우고, 비게 된 상위 파티션 디렉터리도 정리합니다."""
+    if os.path.exists(path):
+        os.remove(path)
+    directory = os.path.dirname(path)
+    while os.path.abspath(directory) != os.path.abspath(lake_table_dir) and os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+
+def export_table(engine, schema: str, table_name: str, period: tuple, sgg_sql: str, sort_columns: list, lake_dir: str = DEFAULT_LAKE_DIR,
+                 full: bool = False) -> dict:
+    """
+    테이블 하나를 Hive 파티션 Parquet(<lake_dir>/<테이블>/year=/month=/sgg=)으로 내보냅니다.
+
+    후보 파티션(pending_exports)의 지문만 지난 내보내기 기록과 비교해, 새로 생기거나 바뀐 파티션만 읽어 다시 쓰고
+    DB에서 사라진 파티션의 파일은 지웁니다. 처음 내보내는 테이블이나 전체 빌드 뒤에는 모든 파티션의 지문을 구하고,
+    full이면 모든 파티션을 다시 씁니다.
+
+    Args:
+        period (tuple): (기간 종류, 기간 컬럼 SQL) — PERIOD_KINDS 참고
+        sgg_sql (str): 행의 시군구코드 SQL 식
+        sort_columns (list): 파일 안에서 정렬할 컬럼 (자주 거르는 컬럼 순)
+
+    Returns:
+        dict: written, removed, skipped 파티션 수와 written_rows
+    """
+    table_dir = os.path.join(lake_dir, table_name)
+    keys = list(PARTITION_KEYS)
+    with engine.connect() as connection:
+        pending = pending_exports(connection, schema, table_name)
+        recorded = exported_partitions(connection, schema, table_name)
+        candidates = None
+        if not full and not recorded.empty and len(pending) <= MAX_CANDIDATES and not (pending["sgg"] == ALL_PARTITIONS).any():
+            candidates = list(pending[["sgg", "year_month"]].itertuples(index=False, name=None))
+        if candidates == []:
+            current = recorded.head(0).drop(columns="fingerprint").assign(row_count=0, fingerprint=None)
+        else:
+            current = partition_fingerprints(connection, schema, table_name, period, sgg_sql, candidates)
+        types = arrow_types(connection, schema, table_name)
+
+    if candidates is not None:
+        # 후보가 아닌 파티션은 비교하지 않습니다. (사라진 파티션 판정도 후보 안에서만)
+        year_months = recorded["year"] * 100 + recorded["month"]
+        whole = {code for code, year_month in candidates if year_month is None}
+        parts = {(code, int(year_month)) for code, year_month in candidates if year_month is not None}
+        in_candidates = [
+            code in whole or (code, int(year_month)) in parts
+            for code, year_month in zip(recorded["sgg"], year_months)
+        ]
+        recorded = recorded[in_candidates]
+
+    merged = current.merge(recorded, on=keys, how="outer", suffixes=("", "_exported"), indicator=True)
+    merged["path"] = [
+        os.path.join(partition_dir(lake_dir, table_name, row.year, row.month, row.sgg), PARTITION_FILE)
+        for row in merged[keys].itertuples(index=False)
+    ]
+    removed = merged[merged["_merge"] == "right_only"]
+    present = merged[merged["_merge"] != "right_only"]
+    unchanged = (
+        (present["_merge"] == "both")
+        & present["fingerprint"].notna()
+        & (present["fingerprint"] == present["fingerprint_exported"])
+        & present["path"].map(os.path.exists)
+    )
+    changed = present if full else present[~unchanged]
+
+    period_kind, period_column = period
+    written_rows, exported_at = 0, datetime.now()
+    for (year, month), group in changed.groupby(["year", "month"], sort=True):
+        codes = sorted(group["sgg"])
+        for start in range(0, len(codes), SGG_BATCH):
+            batch = codes[start:start + SGG_BATCH]
+            code_list = ", ".join("'" + str(code).replace("'", "''") + "'" for code in batch)
+            query = (
+                f'SELECT {sgg_sql} AS "__lake_sgg", t.* FROM {schema}."{table_name}" AS t '
+                f"WHERE {period_filter(period_kind, period_column, year, month)} AND {sgg_sql} IN ({code_list})"
+            )
+            rows = read_arrow(engine, query, {"__lake_sgg": pa.string(), **types})
+            for code in batch:
+                partition = rows.filter(pc.equal(rows["__lake_sgg"], code)).select(list(types))
+                write_partition(partition, os.path.join(partition_dir(lake_dir, table_name, year, month, code), PARTITION_FILE), sort_columns)
+                written_rows += partition.num_rows
+
+    for path in removed["path"]:
+        remove_partition(path, table_dir)
+
+    # 파일을 모두 쓴 뒤에 기록하므로, 중간에 실패하면 다음 실행에서 같은 파티션을 다시 씁니다.
+    with engine.begin() as connection:
+        consume_exports(connection, schema, table_name, pending)
+        if not removed.empty:
+            connection.execute(text(f"""
+                DELETE FROM {schema}."{EXPORT_STATE_TABLE}"
+                WHERE table_name = :table_name AND year = :year AND month = :month AND sgg = :sgg
+            """), [{"table_name": table_name, "year": int(row.year), "month": int(row.month), "sgg": row.sgg}
+                   for row in removed.itertuples(index=False)])
+        if not changed.empty:
+            connection.execute(text(f"""
+                INSERT INTO {schema}."{EXPORT_STATE_TABLE}" (table_name, year, month, sgg, row_count, fingerprint, exported_at)
+                VALUES (:table_name, :year, :month, :sgg, :row_count, :fingerprint, :exported_at)
+                ON CONFLICT (table_name, year, month, sgg) DO UPDATE SET
+                    row_count = EXCLUDED.row_count,
+                    fingerprint = EXCLUDED.fingerprint,
+                    exported_at = EXCLUDED.exported_at
+            """), [
+                {"table_name": table_name, "year": int(row.year), "month": int(row.month), "sgg": row.sgg,
+                 "row_count": int(row.row_count), "fingerprint": row.fingerprint, "exported_at": exported_at}
+                for row in changed.itertuples(index=False)
+            ])
+
+    return {
+        "written": len(changed), "removed": len(removed), "skipped": len(present) - len(changed), "written_rows": written_rows,
+        "candidates": None if candidates is None else len(candidates),
+    }
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from utils.feature_schema import apply_schema, as_float64
+from utils.group_stats import LEVEL_KEYS, aggregate, broadcast
+
+PRICE_INDEX_TABLE = "analytics_price_index"
+
+# 면적 보정 지수의 기준 연도 (기준 연도 평균 = 100 근처)
+PRICE_INDEX_BASE_YEAR = 2022
+
+# 전용면적 구간 (㎡): 소형(~60), 중소형(60~85), 중대형(85~135), 대형(135~)
+AREA_BANDS = [0, 60, 85, 135, np.inf]
+AREA_BAND_LABELS = ["소형", "중소형", "중대형", "대형"]
+
+# 지역 단위 이름 (테이블의 '단위' 컬럼 값)
+LEVEL_NAMES = {"gu": "구", "dong": "동"}
+
+PRICE_INDEX_COLUMNS = ["단위", "시군구명", "읍면동명", "거래연월", "거래건수", "중위평당가(만원)", "면적보정지수", "지수표본수"]
+
+
+def trade_deals(df_trade: pd.DataFrame) -> pd.DataFrame:
+    """매매 피처 DataFrame에서 지수 계산에 필요한 값(지역, 거래연월, 면적 구간, 평당가)만 뽑습니다."""
+    deal_date = pd.to_datetime(df_trade["거래일자"])
+    deals = pd.DataFrame({
+        "시군구명": df_trade["시군구명"].astype(str),
+        "읍면동명": df_trade["읍면동명"].astype(str),
+        "거래연월": deal_date.dt.year * 100 + deal_date.dt.month,
+        "면적대": pd.cut(as_float64(df_trade["전용면적(㎡)"]), AREA_BANDS, labels=AREA_BAND_LABELS, right=False).astype(str),
+        "pp": as_float64(df_trade["평당가격(만원)"]),
+    })
+    return deals[deals["거래연월"].notna() & deals["pp"].notna()].astype({"거래연월": "int64"})
+
+
+def compute_price_index(df_trade: pd.DataFrame, base_year: int = PRICE_INDEX_BASE_YEAR) -> pd.DataFrame:
+    """
+    매매 피처로 자치구/동별 월간 가격 지수를 계산합니다. (단위 x 지역 x 거래연월 한 행)
+
+    - 거래건수, 중위평당가(만원): 그 달의 거래 수와 평당가 중위값
+    - 면적보정지수: 거래마다 평당가를 '같은 지역, 같은 면적 구간의 기준 연도 중위 평당가'로 나눈 값의 중위값 x 100
+      달마다 거래되는 면적 구성이 달라져도 지수가 흔들리지 않습니다. 기준 연도 거래가 없는 구간은 제외합니다.
+    - 지수표본수: 면적보정지수 계산에 쓰인 거래 수
+
+    단위마다 전체 이력을 한 번의 groupby로 계산합니다. 자치구 안에서 끝나는 계산이므로 자치구별로 나눠 계산해도 결과가 같습니다.
+    """
+    deals = trade_deals(df_trade)
+    if deals.empty:
+        return apply_schema(pd.DataFrame(columns=PRICE_INDEX_COLUMNS), PRICE_INDEX_TABLE)
+    base = deals[deals["거래연월"] // 100 == base_year]
+
+    frames = []
+    for level, level_name in LEVEL_NAMES.items():
+        keys = LEVEL_KEYS[level]
+        # 기준 연도의 (지역, 면적 구간)별 중위 평당가를 거래마다 붙여 상대 가격을 구합니다.
+        reference = aggregate(base, keys + ["면적대"], ["pp"], stats=("median",))
+        level_deals = broadcast(deals[keys + ["거래연월", "면적대", "pp"]].copy(), keys + ["면적대"], reference, {"pp_median": "reference"})
+        level_deals["relative"] = level_deals["pp"] / level_deals["reference"]
+
+        stats = aggregate(level_deals, keys + ["거래연월"], ["pp", "relative"], stats=("median", "count")).reset_index()
+        frames.append(pd.DataFrame({
+            "단위": level_name,
+            "시군구명": stats["시군구명"],
+            "읍면동명": stats["읍면동명"] if "읍면동명" in stats.columns else None,
+            "거래연월": stats["거래연월"],
+            "거래건수": stats["pp_count"],
+            "중위평당가(만원)": stats["pp_median"],
+            "면적보정지수": (stats["relative_median"] * 100).round(2),
+            "지수표본수": stats["relative_count"],
+        }))
+
+    return apply_schema(sort_price_index(pd.concat(frames, ignore_index=True)), PRICE_INDEX_TABLE)
+
+
+def sort_price_index(index_df: pd.DataFrame) -> pd.DataFrame:
+    """단위, 지역, 거래연월 순으로 정렬합니다. (직렬/병렬 빌드 결과의 행 순서를 맞춤)"""
+    return index_df.sort_values(["단위", "시군구명", "읍면동명", "거래연월"], ignore_index=True, na_position="first")
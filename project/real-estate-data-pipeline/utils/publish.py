@@ -0,0 +1,209 @@
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import inspect, text
+
+from utils.bulk_load import bulk_load
+
+# 게시한 테이블 버전 기록 (테이블별로 is_live인 버전이 현재 서비스 중인 테이블)
+VERSIONS_TABLE = "feature_table_versions"
+
+# 게시 전에 스테이징 테이블에 만들어 둘 인덱스 (접미사, 컬럼)
+# 증분 빌드의 슬라이스 교체(시군구코드 + 거래일자), 동별 평균 갱신(시군구명 + 읍면동명), 단지별 거래 조회(complex_id)에서 사용합니다.
+FEATURE_INDEXES = {
+    "feature_apt_trade": [("sgg_date", ["시군구코드", "거래일자"]), ("dong", ["시군구명", "읍면동명"]), ("complex", ["complex_id"])],
+    "feature_apt_jeonse": [("sgg_date", ["시군구코드", "거래일자"]), ("dong", ["시군구명", "읍면동명"]), ("complex", ["complex_id"])],
+    "feature_apt_wolse": [("sgg_date", ["시군구코드", "거래일자"]), ("dong", ["시군구명", "읍면동명"]), ("complex", ["complex_id"])],
+    "analytics_gap_investment": [("dong", ["시군구명", "읍면동명", "거래년도"])],
+    "analytics_price_index": [("region_month", ["시군구명", "읍면동명", "거래연월"])],
+    "analytics_jeonse_ratio": [("complex_month", ["complex_id", "거래연월"]), ("region_month", ["시군구명", "거래연월"])],
+}
+
+# 게시(이름 교체) 트랜잭션이 오래 실행 중인 조회를 기다리느라 다른 조회까지 막지 않도록 잠금 대기 시간을 제한합니다.
+SWAP_LOCK_TIMEOUT = "10s"
+
+
+def version_table_name(table_name: str, version: str) -> str:
+    """버전 테이블 이름 (예: feature_apt_trade__v20250801030000123456)"""
+    return f"{table_name}__v{version}"
+
+
+def ensure_versions_table(engine, schema: str):
+    """게시 버전 기록 테이블을 생성합니다. 이미 존재하면 아무 작업도 하지 않습니다."""
+    with engine.begin() as connection:
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {schema}."{VERSIONS_TABLE}" (
+                table_name   VARCHAR(64) NOT NULL,
+                version      VARCHAR(32) NOT NULL,
+                row_count    BIGINT,
+                created_at   TIMESTAMP   NOT NULL,
+                published_at TIMESTAMP,
+                is_live      BOOLEAN     NOT NULL DEFAULT FALSE,
+                PRIMARY KEY (table_name, version)
+            )
+        """))
+
+
+def get_live_version(connection, schema: str, table_name: str):
+    """현재 서비스 중인 버전을 반환합니다. 기록이 없으면 None을 반환합니다."""
+    return connection.execute(text(f"""
+        SELECT version FROM {schema}."{VERSIONS_TABLE}" WHERE table_name = :table_name AND is_live
+    """), {"table_name": table_name}).scalar()
+
+
+def list_versions(engine, schema: str, table_name: str) -> pd.DataFrame:
+    """테이블의 게시 버전 목록을 최신순으로 반환합니다."""
+    ensure_versions_table(engine, schema)
+    with engine.connect() as connection:
+        return pd.read_sql(text(f"""
+            SELECT version, row_count, created_at, published_at, is_live FROM {schema}."{VERSIONS_TABLE}"
+            WHERE table_name = :table_name ORDER BY version DESC
+        """), connection, params={"table_name": table_name})
+
+
+def stage_table(df: pd.DataFrame, table_name: str, engine, schema: str, version: str) -> str:
+    """
+    DataFrame을 버전 테이블에 적재하고 인덱스와 통계(ANALYZE)를 만듭니다.
+    서비스 중인 테이블은 건드리지 않으므로, 적재/인덱스 생성 중에도 조회에 영향이 없습니다.
+
+    Returns:
+        str: 만든 버전 테이블 이름
+    """
+    staged_name = version_table_name(table_name, version)
+    bulk_load(df, staged_name, engine, schema, if_exists="fail")
+    with engine.begin() as connection:
+        for suffix, columns in FEATURE_INDEXES.get(table_name, []):
+            column_list = ", ".join(f'"{column}"' for column in columns)
+            # 인덱스 이름도 버전별로 달라야 이름 교체 후에 충돌하지 않습니다.
+            connection.execute(text(f'CREATE INDEX "{table_name}_v{version}_{suffix}_idx" ON {schema}."{staged_name}" ({column_list})'))
+        connection.execute(text(f'ANALYZE {schema}."{staged_name}"'))
+        connection.execute(text(f"""
+            INSERT INTO {schema}."{VERSIONS_TABLE}" (table_name, version, row_count, created_at, is_live)
+            VALUES (:table_name, :version, :row_count, :created_at, FALSE)
+        """), {"table_name": table_name, "version": version, "row_count": len(df), "created_at": datetime.now()})
+    return staged_name
+
+
+def _swap_in(connection, schema: str, table_name: str, version: str, now: datetime):
+    """
+    (게시 트랜잭션 안에서) 서비스 중인 테이블을 버전 이름으로 되돌리고, 지정한 버전을 서비스 이름으로 바꿉니다.
+    버전 기록이 없는 기존 테이블(이전 방식으로 만든 테이블)은 'legacy' 버전으로 남깁니다.
+    """
+    live_version = get_live_version(connection, schema, table_name)
+    if inspect(connection).has_table(table_name, schema=schema):
+        if live_version is None:
+            live_version = f"{now:%Y%m%d%H%M%S}legacy"
+            connection.execute(text(f"""
+                INSERT INTO {schema}."{VERSIONS_TABLE}" (table_name, version, created_at, is_live)
+                VALUES (:table_name, :version, :created_at, FALSE)
+            """), {"table_name": table_name, "version": live_version, "created_at": now})
+        connection.execute(text(f'ALTER TABLE {schema}."{table_name}" RENAME TO "{version_table_name(table_name, live_version)}"'))
+
+    connection.execute(text(f'ALTER TABLE {schema}."{version_table_name(table_name, version)}" RENAME TO "{table_name}"'))
+    connection.execute(text(f"""
+        UPDATE {schema}."{VERSIONS_TABLE}"
+        SET is_live = (version = :version),
+            published_at = CASE WHEN version = :version THEN :now ELSE published_at END
+        WHERE table_name = :table_name
+    """), {"table_name": table_name, "version": version, "now": now})
+
+
+def prune_versions(engine, schema: str, table_name: str, keep_versions: int):
+    """서비스 중이 아닌 버전 테이블 중 최신 keep_versions개만 남기고 삭제합니다."""
+    with engine.begin() as connection:
+        old_versions = connection.execute(text(f"""
+            SELECT version FROM {schema}."{VERSIONS_TABLE}"
+            WHERE table_name = :table_name AND NOT is_live
+            ORDER BY version DESC OFFSET :keep
+        """), {"table_name": table_name, "keep": keep_versions}).scalars().all()
+        for version in old_versions:
+            connection.execute(text(f'DROP TABLE IF EXISTS {schema}."{version_table_name(table_name, version)}"'))
+            connection.execute(text(f"""
+                DELETE FROM {schema}."{VERSIONS_TABLE}" WHERE table_name = :table_name AND version = :version
+            """), {"table_name": table_name, "version": version})
+    if old_versions:
+        print(f"   INFO: '{table_name}'의 오래된 버전 {len(old_versions)}개를 삭제했습니다.")
+
+
+def publish_tables(frames: dict, engine, schema: str, keep_versions: int = 2) -> str:
+    """
+    여러 피처 테이블을 무중단으로 한꺼번에 게시합니다.
+
+    1. 테이블마다 버전 테이블(<테이블>__v<버전>)에 COPY로 적재하고 인덱스/통계를 만듭니다.
+    2. 하나의 트랜잭션에서 기존 테이블을 버전 이름으로, 새 버전 테이블을 서비스 이름으로 바꿉니다.
+       조회하는 쪽은 교체 전 테이블이나 교체 후 테이블 중 하나만 보며, 빈 테이블이나 일부만 적재된 테이블은 보지 않습니다.
+    3. 이전 버전은 keep_versions개까지 남겨 rollback_tables()로 즉시 되돌릴 수 있습니다.
+
+    이름 교체는 테이블 객체를 그대로 옮기므로, 피처 테이블을 참조하는 뷰나 테이블 단위 권한은 새 버전으로 따라오지 않습니다.
+
+    Args:
+        frames (dict): {테이블 이름: 저장할 DataFrame}
+        keep_versions (int): 남겨 둘 이전 버전 수
+
+    Returns:
+        str: 게시한 버전
+    """
+    ensure_versions_table(engine, schema)
+    # 마이크로초까지 넣어, 같은 초에 시작한 다른 빌드의 실패 정리가 이 빌드의 버전 테이블을 지우지 않게 합니다.
+    version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    staged = []
+    try:
+        for table_name, df in frames.items():
+            print(f">> '{table_name}' 버전 {version} 적재 중... ({len(df)}건)")
+            stage_table(df, table_name, engine, schema, version)
+            staged.append(table_name)
+    except Exception:
+        # 게시 전에 실패하면 서비스 중인 테이블은 그대로이므로, 만들던 버전 테이블만 정리합니다.
+        with engine.begin() as connection:
+            for table_name in frames:
+                connection.execute(text(f'DROP TABLE IF EXISTS {schema}."{version_table_name(table_name, version)}"'))
+            connection.execute(text(f'DELETE FROM {schema}."{VERSIONS_TABLE}" WHERE version = :version'), {"version": version})
+        raise
+
+    now = datetime.now()
+    with engine.begin() as connection:
+        connection.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+        for table_name in staged:
+            _swap_in(connection, schema, table_name, version, now)
+    print(f"✅ 피처 테이블 {len(staged)}개를 버전 {version}으로 게시했습니다.")
+
+    for table_name in staged:
+        prune_versions(engine, schema, table_name, keep_versions)
+    return version
+
+
+def rollback_tables(engine, schema: str, table_names: list, version: str = None) -> dict:
+    """
+    피처 테이블을 이전에 게시한 버전으로 되돌립니다. (하나의 트랜잭션에서 이름만 교체)
+    version을 지정하지 않으면 마지막 게시(서비스 중인 버전 중 가장 최신 버전)에 포함된 테이블만
+    테이블마다 바로 이전 버전으로 되돌립니다. 마지막 게시에 포함되지 않았거나 되돌릴 버전이 없는 테이블은 경고만 출력하고 건너뜁니다.
+
+    Returns:
+        dict: {테이블 이름: 되돌린 버전}
+    """
+    ensure_versions_table(engine, schema)
+    now = datetime.now()
+    restored = {}
+    with engine.begin() as connection:
+        connection.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+        live = {table_name: get_live_version(connection, schema, table_name) for table_name in table_names}
+        last_published = max((live_version for live_version in live.values() if live_version is not None), default=None)
+        for table_name in table_names:
+            if version is None and (live[table_name] is None or live[table_name] != last_published):
+                print(f"   WARN: '{table_name}'은 마지막 게시(버전 {last_published})에 포함되지 않아 건너뜁니다. (현재 버전 {live[table_name]})")
+                continue
+            target = version or connection.execute(text(f"""
+                SELECT version FROM {schema}."{VERSIONS_TABLE}"
+                WHERE table_name = :table_name AND NOT is_live AND version < :live_version
+                ORDER BY version DESC LIMIT 1
+            """), {"table_name": table_name, "live_version": live[table_name]}).scalar()
+            if target is None or target == live[table_name] or not inspect(connection).has_table(version_table_name(table_name, target), schema=schema):
+                print(f"   WARN: '{table_name}'에 되돌릴 버전이 없어 건너뜁니다: {target}")
+                continue
+            _swap_in(connection, schema, table_name, target, now)
+            restored[table_name] = target
+        if not restored:
+            raise ValueError(f"되돌릴 수 있는 피처 테이블이 없습니다: {', '.join(table_names)}")
+    for table_name, target in restored.items():
+        print(f"✅ '{table_name}'을 버전 {target}으로 되돌렸습니다.")
+    return restored
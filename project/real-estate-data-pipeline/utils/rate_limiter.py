@@ -0,0 +1,39 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    여러 스레드가 함께 사용하는 '초당 요청 수' 제한기입니다.
+    토큰 버킷 방식으로, 초당 rate개의 토큰이 채워지고 요청마다 1개씩 소비합니다.
+
+    Args:
+        rate (float): 초당 허용 요청 수. 0 이하이면 제한하지 않습니다.
+        burst (int): 한 번에 몰아서 보낼 수 있는 최대 요청 수 (기본값: 1)
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰을 하나 얻을 때까지 대기합니다."""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait_seconds = (1 - self._tokens) / self.rate
+
+            time.sleep(wait_seconds)
@@ -0,0 +1,183 @@
+import pandas as pd
+from sqlalchemy import inspect, text
+
+from utils.normalize import TRADE_TYPE_BY_TABLE, TYPED_COLUMN_SQL, TYPED_COLUMNS
+
+# 원시 테이블의 파티션 키: 거래연월(YYYYMM 정수). dealYear/dealMonth로 계산해 적재 시점에 채웁니다.
+DEAL_MONTH_COLUMN = "deal_ym"
+
+# 파이프라인이 스키마를 관리하는 원시 테이블
+RAW_TABLES = ("raw_apt_trade", "raw_apt_jeonse")
+
+# build_features.py가 사용하는 조회 키에 맞춘 보조 인덱스 (인덱스 이름 접미사, 컬럼 목록)
+# 파티션 테이블(부모)에 만든 인덱스는 기존/신규 파티션에 자동으로 생성됩니다.
+RAW_INDEXES = [
+    ("sgg_ym_idx", ["sggCd", DEAL_MONTH_COLUMN]),
+    ("sgg_umd_idx", ["sggCd", "umdNm"]),
+    ("complex_idx", ["sggCd", "umdNm", "jibun", "aptNm"]),
+]
+
+# dealYear/dealMonth 문자열로 거래연월을 계산하는 SQL 식 (기존 데이터 보정용)
+DEAL_MONTH_SQL = 'CAST("dealYear" AS INTEGER) * 100 + CAST("dealMonth" AS INTEGER)'
+
+
+def add_deal_month(df: pd.DataFrame) -> pd.DataFrame:
+    """dealYear/dealMonth로 거래연월(YYYYMM 정수) 컬럼 deal_ym을 추가합니다."""
+    df = df.copy()
+    if df.empty:
+        df[DEAL_MONTH_COLUMN] = pd.Series(dtype="int64")
+        return df
+    year = pd.to_numeric(df["dealYear"], errors="coerce")
+    month = pd.to_numeric(df["dealMonth"], errors="coerce")
+    deal_month = year * 100 + month
+    if deal_month.isna().any():
+        raise ValueError(f"거래연월(dealYear/dealMonth)을 알 수 없는 행이 {int(deal_month.isna().sum())}건 있습니다.")
+    df[DEAL_MONTH_COLUMN] = deal_month.astype("int64")
+    return df
+
+
+def next_month(year_month: int) -> int:
+    """YYYYMM 정수의 다음 달을 반환합니다."""
+    year, month = divmod(int(year_month), 100)
+    return (year + 1) * 100 + 1 if month == 12 else year_month + 1
+
+
+def partition_name(table_name: str, year_month: int) -> str:
+    """월 파티션 테이블 이름 (예: raw_apt_trade_p202507)"""
+    return f"{table_name}_p{int(year_month)}"
+
+
+def _sql_type(dtype) -> str:
+    """pandas dtype을 PostgreSQL 컬럼 타입으로 바꿉니다. (to_sql의 기본 매핑과 같은 규칙)"""
+    if pd.api.types.is_bool_dtype(dtype):
+        return "BOOLEAN"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "BIGINT"
+    if pd.api.types.is_float_dtype(dtype):
+        return "DOUBLE PRECISION"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "TIMESTAMP"
+    return "TEXT"
+
+
+def is_partitioned(connection, table_name: str, schema: str) -> bool:
+    """테이블이 선언적 파티션 테이블(부모)인지 확인합니다."""
+    return connection.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table p
+            JOIN pg_class c ON c.oid = p.partrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = :schema AND c.relname = :table
+        )
+    """), {"schema": schema, "table": table_name}).scalar()
+
+
+def existing_month_partitions(connection, table_name: str, schema: str) -> set:
+    """이미 만들어진 월 파티션의 테이블 이름 집합을 반환합니다."""
+    result = connection.execute(text("""
+        SELECT child.relname FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        JOIN pg_namespace n ON n.oid = parent.relnamespace
+        WHERE n.nspname = :schema AND parent.relname = :table
+    """), {"schema": schema, "table": table_name})
+    return {row.relname for row in result}
+
+
+def ensure_month_partitions(connection, table_name: str, schema: str, year_months) -> list:
+    """
+    주어진 거래연월의 파티션이 없으면 만듭니다. (새 달의 데이터가 들어올 때 자동 생성)
+
+    Returns:
+        list: 새로 만든 파티션 이름 목록
+    """
+    existing = existing_month_partitions(connection, table_name, schema)
+    created = []
+    for year_month in sorted({int(ym) for ym in year_months}):
+        name = partition_name(table_name, year_month)
+        if name in existing:
+            continue
+        connection.execute(text(
+            f'CREATE TABLE IF NOT EXISTS {schema}."{name}" PARTITION OF {schema}."{table_name}" '
+            f"FOR VALUES FROM ({year_month}) TO ({next_month(year_month)})"
+        ))
+        created.append(name)
+    return created
+
+
+def ensure_raw_indexes(connection, table_name: str, schema: str):
+    """지역/동/단지 조회용 보조 인덱스를 만듭니다."""
+    for suffix, columns in RAW_INDEXES:
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        connection.execute(text(
+            f'CREATE INDEX IF NOT EXISTS "{table_name}_{suffix}" ON {schema}."{table_name}" ({column_list})'
+        ))
+
+
+def ensure_typed_columns(connection, table_name: str, schema: str) -> list:
+    """
+    타입 컬럼(utils.normalize.TYPED_COLUMNS)이 없는 기존 원시 테이블에 컬럼을 추가하고,
+    이미 적재된 행의 값을 원본 문자열 컬럼으로 채웁니다. (추가한 컬럼을 한 번의 UPDATE로 채움)
+
+    Returns:
+        list: 새로 추가한 컬럼 목록
+    """
+    table_columns = {column["name"] for column in inspect(connection).get_columns(table_name, schema=schema)}
+    missing = [column for column in TYPED_COLUMNS[TRADE_TYPE_BY_TABLE[table_name]] if column not in table_columns]
+    if not missing:
+        return []
+
+    qualified_name = f'{schema}."{table_name}"'
+    assignments = []
+    for column in missing:
+        sql_type, sources, expression = TYPED_COLUMN_SQL[column]
+        connection.execute(text(f'ALTER TABLE {qualified_name} ADD COLUMN "{column}" {sql_type}'))
+        # 원본 컬럼이 없는 테이블(응답에 없던 필드)은 NULL로 둡니다.
+        if all(source in table_columns for source in sources):
+            assignments.append(f'"{column}" = {expression}')
+    if assignments:
+        updated = connection.execute(text(f"UPDATE {qualified_name} SET {', '.join(assignments)}")).rowcount
+        print(f"   INFO: '{table_name}'에 타입 컬럼 {missing}을 추가하고 기존 {updated:,}건을 채웠습니다.")
+    return missing
+
+
+def ensure_raw_table(connection, table_name: str, schema: str, df: pd.DataFrame):
+    """
+    원시 테이블을 적재할 준비를 합니다.
+
+    - 테이블이 없으면 DataFrame의 컬럼으로 deal_ym 기준 월 단위 RANGE 파티션 테이블을 만듭니다.
+    - DataFrame에만 있는 컬럼(API 응답에 새로 생긴 필드 등)은 테이블에 추가합니다.
+    - 파티션 테이블이면 DataFrame에 포함된 거래연월의 파티션을 만듭니다.
+
+    - 타입 컬럼이 없던 기존 테이블은 컬럼을 추가하고 이미 적재된 행도 채웁니다. (ensure_typed_columns)
+
+    파티션으로 전환하지 않은 기존 테이블은 그대로 두고 컬럼만 맞춥니다.
+    (전환은 scripts/migrate_raw_tables.py로 수행합니다.)
+    """
+    if not inspect(connection).has_table(table_name, schema=schema):
+        column_defs = [
+            f'"{column}" {"INTEGER NOT NULL" if column == DEAL_MONTH_COLUMN else _sql_type(dtype)}'
+            for column, dtype in df.dtypes.items()
+        ]
+        connection.execute(text(
+            f'CREATE TABLE {schema}."{table_name}" ({", ".join(column_defs)}) '
+            f'PARTITION BY RANGE ("{DEAL_MONTH_COLUMN}")'
+        ))
+        ensure_raw_indexes(connection, table_name, schema)
+        print(f"   INFO: '{table_name}' 테이블을 거래연월 기준 파티션 테이블로 생성했습니다.")
+    else:
+        ensure_typed_columns(connection, table_name, schema)
+        table_columns = {column["name"] for column in inspect(connection).get_columns(table_name, schema=schema)}
+        for column, dtype in df.dtypes.items():
+            if column in table_columns:
+                continue
+            if column == DEAL_MONTH_COLUMN:
+                # 파티션 전환 전의 기존 테이블: 이미 적재된 행의 거래연월도 채워 둡니다.
+                connection.execute(text(f'ALTER TABLE {schema}."{table_name}" ADD COLUMN "{column}" INTEGER'))
+                connection.execute(text(f'UPDATE {schema}."{table_name}" SET "{DEAL_MONTH_COLUMN}" = {DEAL_MONTH_SQL}'))
+            else:
+                connection.execute(text(f'ALTER TABLE {schema}."{table_name}" ADD COLUMN "{column}" {_sql_type(dtype)}'))
+
+    if is_partitioned(connection, table_name, schema):
+        for name in ensure_month_partitions(connection, table_name, schema, df[DEAL_MONTH_COLUMN].unique()):
+            print(f"   INFO: 새 파티션 '{name}'을 만들었습니다.")
@@ -0,0 +1,271 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+DEFAULT_METRICS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'metrics')
+
+# API 호출 지연 시간 히스토그램의 버킷 상한(초)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def reset_peak_rss() -> bool:
+    """프로세스의 최대 RSS(VmHWM) 기록을 현재 값으로 초기화합니다. 지원하지 않는 환경이면 False를 반환합니다."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def read_peak_rss_mb():
+    """초기화 이후의 최대 RSS(MB)를 읽습니다. 지원하지 않는 환경이면 None을 반환합니다."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _max(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items() if value is not None) + "}"
+
+
+class RunMetrics:
+    """
+    파이프라인 실행 한 번의 단계별 지표와 API 호출 지연 시간을 모읍니다.
+    - 단계: 실행 시간(초), 입력/출력 행 수, 최대 RSS(MB)
+    - API 호출: (API, 시군구)별 지연 시간 히스토그램과 오류 수
+    write()로 실행별 JSON 리포트와 Prometheus 텍스트 형식 파일을 저장합니다.
+
+    Args:
+        pipeline (str): 파이프라인 이름 (예: 'build_features', 'backfill', 'fetch_real_estate_data')
+        run_id (str): 실행 ID (기본값: 시작 시각)
+        labels (dict): 리포트에 함께 남길 실행 설정
+    """
+
+    def __init__(self, pipeline: str, run_id: str = None, labels: dict = None):
+        self.pipeline = pipeline
+        self.started_at = datetime.now()
+        self.run_id = run_id or self.started_at.strftime("%Y%m%dT%H%M%S")
+        self.labels = labels or {}
+        self.stages = []
+        self.status = "running"
+        self.error = None
+        self._api_calls = {}
+        self._stack = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows_in: int = None):
+        """
+        단계 하나의 실행 시간과 최대 RSS를 측정합니다. 행 수는 yield된 dict에 채웁니다.
+
+            with metrics.stage("process_trade_data") as stage:
+                ...
+                stage["rows_in"], stage["rows_out"] = loaded, len(df)
+
+        단계 안에 다른 단계가 있어도 바깥 단계의 최대 RSS에는 안쪽 단계의 최대값이 포함됩니다.
+        """
+        record = {"stage": name, "seconds": None, "rows_in": rows_in, "rows_out": None, "peak_rss_mb": None}
+        if self._stack:
+            # 최대 RSS 기록을 초기화하기 전에, 지금까지의 값을 바깥 단계에 반영합니다.
+            self._stack[-1]["_peak"] = _max(self._stack[-1].get("_peak"), read_peak_rss_mb())
+        reset_peak_rss()
+        self._stack.append(record)
+        started_at = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = round(time.perf_counter() - started_at, 3)
+            self._stack.pop()
+            record["peak_rss_mb"] = _max(record.pop("_peak", None), read_peak_rss_mb())
+            if self._stack:
+                self._stack[-1]["_peak"] = _max(self._stack[-1].get("_peak"), record["peak_rss_mb"])
+            self.stages.append(record)
+
+    def record_stage(self, name: str, seconds: float, rows_in: int = None, rows_out: int = None):
+        """다른 스레드에서 따로 측정한 단계를 기록합니다. (최대 RSS는 기록하지 않음)"""
+        with self._lock:
+            self.stages.append({"stage": name, "seconds": round(seconds, 3), "rows_in": rows_in, "rows_out": rows_out, "peak_rss_mb": None})
+
+    def observe_api_call(self, api_name: str, sigungu_code: str, seconds: float, success: bool = True):
+        """API 호출 한 건의 지연 시간을 기록합니다. 여러 스레드에서 호출해도 됩니다."""
+        with self._lock:
+            self._api_calls.setdefault((api_name, sigungu_code), []).append((seconds, success))
+
+    def api_call_samples(self) -> list:
+        """기록된 API 호출을 [(API, 시군구, 초, 성공 여부), ...] 목록으로 반환합니다. (다른 프로세스로 넘길 때 사용)"""
+        return [(*key, seconds, success) for key, calls in self._api_calls.items() for seconds, success in calls]
+
+    def _iter_api_calls(self):
+        """(API, 시군구) 순으로 (API, 시군구, 지연 시간 배열, 오류 수)를 반환합니다."""
+        for (api_name, sigungu_code), calls in sorted(self._api_calls.items(), key=lambda item: tuple(map(str, item[0]))):
+            values = np.asarray([seconds for seconds, _ in calls])
+            yield api_name, sigungu_code, values, sum(not success for _, success in calls)
+
+    def api_summary(self) -> list:
+        """(API, 시군구)별 호출 수, 오류 수, 지연 시간 p50/p95/최대값(초)을 반환합니다."""
+        summary = []
+        for api_name, sigungu_code, values, errors in self._iter_api_calls():
+            summary.append({
+                "api": api_name,
+                "sigungu_code": sigungu_code,
+                "calls": len(values),
+                "errors": errors,
+                "p50_seconds": round(float(np.percentile(values, 50)), 3),
+                "p95_seconds": round(float(np.percentile(values, 95)), 3),
+                "max_seconds": round(float(values.max()), 3),
+            })
+        return summary
+
+    def to_report(self) -> dict:
+        """실행 한 번의 JSON 리포트를 만듭니다."""
+        return {
+            "pipeline": self.pipeline,
+            "run_id": self.run_id,
+            "status": self.status,
+            "error": self.error,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "labels": self.labels,
+            "stages": self.stages,
+            "total_seconds": round((datetime.now() - self.started_at).total_seconds(), 3),
+            "api_calls": self.api_summary(),
+        }
+
+    def to_prometheus(self) -> str:
+        """지표를 Prometheus 텍스트 형식(node_exporter textfile collector 등)으로 만듭니다."""
+        pipeline = self.pipeline
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+
+        metric("pipeline_run_timestamp_seconds", "gauge", "파이프라인 실행 시작 시각 (unix time)",
+               [(_labels(pipeline=pipeline), int(self.started_at.timestamp()))])
+        metric("pipeline_run_success", "gauge", "마지막 실행 성공 여부 (1=성공)",
+               [(_labels(pipeline=pipeline), int(self.status == "success"))])
+        metric("pipeline_run_duration_seconds", "gauge", "파이프라인 전체 실행 시간",
+               [(_labels(pipeline=pipeline), round((datetime.now() - self.started_at).total_seconds(), 3))])
+
+        # 같은 이름의 단계가 여러 번 실행되면 시간과 행 수는 합치고, 최대 RSS는 최대값을 사용합니다.
+        stages = {}
+        for record in self.stages:
+            total = stages.setdefault(record["stage"], {"seconds": 0.0, "rows_in": None, "rows_out": None, "peak_rss_mb": None})
+            total["seconds"] += record["seconds"] or 0.0
+            for key in ("rows_in", "rows_out"):
+                if record[key] is not None:
+                    total[key] = (total[key] or 0) + record[key]
+            total["peak_rss_mb"] = _max(total["peak_rss_mb"], record["peak_rss_mb"])
+
+        def stage_samples(key, scale=None):
+            return [
+                (_labels(pipeline=pipeline, stage=name), int(total[key] * scale) if scale else round(total[key], 3))
+                for name, total in stages.items() if total[key] is not None
+            ]
+
+        metric("pipeline_stage_duration_seconds", "gauge", "단계별 실행 시간", stage_samples("seconds"))
+        metric("pipeline_stage_rows_in", "gauge", "단계별 입력 행 수", stage_samples("rows_in"))
+        metric("pipeline_stage_rows_out", "gauge", "단계별 출력 행 수", stage_samples("rows_out"))
+        metric("pipeline_stage_peak_rss_bytes", "gauge", "단계별 최대 RSS", stage_samples("peak_rss_mb", 1024 ** 2))
+
+        errors = []
+        lines.append("# HELP api_call_duration_seconds 공공데이터 API 호출 지연 시간")
+        lines.append("# TYPE api_call_duration_seconds histogram")
+        for api_name, sigungu_code, values, error_count in self._iter_api_calls():
+            base = dict(pipeline=pipeline, api=api_name, sigungu_code=sigungu_code)
+            errors.append((_labels(**base), error_count))
+            for bucket in LATENCY_BUCKETS:
+                lines.append(f"api_call_duration_seconds_bucket{_labels(**base, le=bucket)} {int((values <= bucket).sum())}")
+            lines.append(f"api_call_duration_seconds_bucket{_labels(**base, le='+Inf')} {len(values)}")
+            lines.append(f"api_call_duration_seconds_sum{_labels(**base)} {round(float(values.sum()), 6)}")
+            lines.append(f"api_call_duration_seconds_count{_labels(**base)} {len(values)}")
+        metric("api_call_errors_total", "counter", "공공데이터 API 호출 오류 수", errors)
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_dir: str = None) -> tuple:
+        """
+        실행별 JSON 리포트({output_dir}/{pipeline}/{run_id}.json)와
+        마지막 실행의 Prometheus 지표({output_dir}/{pipeline}.prom)를 저장합니다.
+
+        Returns:
+            tuple: (JSON 리포트 경로, Prometheus 파일 경로)
+        """
+        output_dir = os.path.abspath(output_dir or os.getenv("METRICS_DIR", DEFAULT_METRICS_DIR))
+        run_file = "".join(c if c.isalnum() or c in "-_." else "_" for c in self.run_id)
+        report_path = os.path.join(output_dir, self.pipeline, f"{run_file}.json")
+        prom_path = os.path.join(output_dir, f"{self.pipeline}.prom")
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_report(), f, ensure_ascii=False, indent=2)
+        # 수집기가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체합니다.
+        with open(f"{prom_path}.tmp", "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(f"{prom_path}.tmp", prom_path)
+        return report_path, prom_path
+
+
+# 현재 프로세스에서 진행 중인 실행. start_run()으로 시작하고 finish_run()으로 저장합니다.
+# 진행 중인 실행이 없으면 track_stage/observe_api_call은 아무것도 기록하지 않습니다.
+_current_run = None
+
+
+def start_run(pipeline: str, run_id: str = None, **labels) -> RunMetrics:
+    """실행 지표 수집을 시작합니다."""
+    global _current_run
+    _current_run = RunMetrics(pipeline, run_id, labels)
+    return _current_run
+
+
+def current_run():
+    """진행 중인 실행(RunMetrics)을 반환합니다. 없으면 None을 반환합니다."""
+    return _current_run
+
+
+def finish_run(status: str = "success", error: Exception = None, output_dir: str = None):
+    """진행 중인 실행을 마치고 JSON 리포트와 Prometheus 지표를 저장합니다."""
+    global _current_run
+    run, _current_run = _current_run, None
+    if run is None:
+        return None
+    run.status = status
+    run.error = str(error) if error is not None else None
+    report_path, prom_path = run.write(output_dir)
+    print(f"📊 실행 리포트 저장 완료: {report_path} (Prometheus: {prom_path})")
+    return run
+
+
+@contextlib.contextmanager
+def track_stage(name: str, rows_in: int = None):
+    """진행 중인 실행에 단계를 기록합니다. 실행이 없으면 측정하지 않고 빈 dict를 돌려줍니다."""
+    if _current_run is None:
+        yield {"stage": name, "rows_in": rows_in, "rows_out": None}
+        return
+    with _current_run.stage(name, rows_in) as record:
+        yield record
+
+
+def observe_api_call(api_name: str, sigungu_code: str, seconds: float, success: bool = True):
+    """진행 중인 실행에 API 호출 지연 시간을 기록합니다."""
+    if _current_run is not None:
+        _current_run.observe_api_call(api_name, sigungu_code, seconds, success)
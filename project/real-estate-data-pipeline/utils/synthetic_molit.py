@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from utils.get_region_codes import get_seoul_sigungu_codes
+
+# 자치구별 상대적인 평당가 수준 (만원/평). 목록에 없는 자치구는 DEFAULT_PRICE_LEVEL을 사용합니다.
+DISTRICT_PRICE_LEVEL = {
+    "강남구": 7500, "서초구": 7200, "송파구": 5800, "용산구": 5600, "성동구": 4600,
+    "마포구": 4400, "양천구": 4000, "광진구": 4000, "영등포구": 3900, "동작구": 3800,
+    "강동구": 3700, "종로구": 3600, "중구": 3600, "서대문구": 3200, "동대문구": 3000,
+}
+DEFAULT_PRICE_LEVEL = 2800
+
+# 자주 거래되는 전용면적(㎡)과 그 비중
+UNIT_AREAS = np.array([39.6, 49.94, 59.97, 74.98, 84.97, 101.9, 114.86, 134.7])
+UNIT_AREA_WEIGHTS = np.array([0.05, 0.08, 0.27, 0.12, 0.32, 0.07, 0.06, 0.03])
+
+# 2021년 6월 임대차 신고제 시행 이전 계약은 contractTerm이 비어 있습니다.
+CONTRACT_TERM_START = 202106
+
+
+def _skewed_weights(n: int, offset: float) -> np.ndarray:
+    """순위의 역수에 비례하는 가중치 (소수의 대상에 거래가 몰리는 분포)"""
+    weights = 1.0 / (np.arange(n) + offset)
+    return weights / weights.sum()
+
+
+def _with_commas(values: np.ndarray) -> pd.Series:
+    """정수를 API 응답처럼 '123,000' 형태의 문자열로 바꿉니다."""
+    return pd.Series(values).map("{:,}".format)
+
+
+def generate_complexes(n_complexes: int = 3000, seed: int = 42) -> pd.DataFrame:
+    """
+    서울 자치구/법정동/아파트 단지 목록을 만듭니다.
+    거래가 많은 자치구와 대단지에 몰리도록 자치구 비중과 단지 인기도를 치우치게 만듭니다.
+
+    Returns:
+        pd.DataFrame: sggCd, sggNm, umdCd, umdNm, jibun, aptNm, buildYear, maxFloor, pricePerPyeong, popularity
+    """
+    rng = np.random.default_rng(seed)
+    districts = list(get_seoul_sigungu_codes().items())
+    district_idx = rng.choice(len(districts), size=n_complexes, p=_skewed_weights(len(districts), 8))
+    dong_idx = rng.integers(1, 16, size=n_complexes)
+
+    names = np.array([name for name, _ in districts])[district_idx]
+    codes = np.array([code for _, code in districts])[district_idx]
+    price_level = np.array([DISTRICT_PRICE_LEVEL.get(name, DEFAULT_PRICE_LEVEL) for name in names])
+    # 지번: 본번만 있거나(60%) '본번-부번' 형태(40%)
+    main_numbers = rng.integers(1, 1500, size=n_complexes)
+    sub_numbers = rng.integers(1, 30, size=n_complexes) * (rng.random(n_complexes) < 0.4)
+
+    complexes = pd.DataFrame({
+        "sggCd": codes,
+        "sggNm": names,
+        "umdCd": [f"{10000 + 100 * i}" for i in dong_idx],
+        "umdNm": [f"{name[:-1]}{i}동" for name, i in zip(names, dong_idx)],
+        "jibun": [f"{main}-{sub}" if sub else str(main) for main, sub in zip(main_numbers, sub_numbers)],
+        "aptNm": [f"합성아파트{i}" for i in range(n_complexes)],
+        "buildYear": rng.integers(1978, 2024, size=n_complexes),
+        "maxFloor": rng.choice([5, 12, 15, 20, 25, 35, 49], size=n_complexes, p=[0.1, 0.2, 0.25, 0.2, 0.15, 0.07, 0.03]),
+        "pricePerPyeong": price_level * rng.lognormal(0.0, 0.25, size=n_complexes),
+    })
+    complexes["popularity"] = _skewed_weights(n_complexes, 10)[rng.permutation(n_complexes)]
+    return complexes
+
+
+def _pick_deals(complexes: pd.DataFrame, n_rows: int, start_ym: int, end_ym: int, rng) -> tuple:
+    """
+    단지 인기도에 따라 거래를 배정하고, 공통 컬럼(위치/면적/층/거래일)을 만듭니다.
+
+    Returns:
+        tuple: (공통 컬럼 DataFrame, 거래별 기준 가격(만원) 배열, 거래연월(YYYYMM) 배열)
+    """
+    weights = complexes["popularity"].to_numpy()
+    picked = complexes.iloc[rng.choice(len(complexes), size=n_rows, p=weights / weights.sum())].reset_index(drop=True)
+
+    start_index = (start_ym // 100) * 12 + start_ym % 100 - 1
+    end_index = (end_ym // 100) * 12 + end_ym % 100 - 1
+    month_index = rng.integers(start_index, end_index + 1, size=n_rows)
+    years, months = month_index // 12, month_index % 12 + 1
+
+    areas = rng.choice(UNIT_AREAS, size=n_rows, p=UNIT_AREA_WEIGHTS)
+    floors = np.minimum(rng.integers(1, 50, size=n_rows), picked["maxFloor"].to_numpy())
+    # 시간에 따른 완만한 가격 상승과 거래별 편차
+    trend = 1.0 + 0.004 * (month_index - start_index)
+    base_price = picked["pricePerPyeong"].to_numpy() * areas / 3.3058 * trend * rng.lognormal(0.0, 0.08, size=n_rows)
+
+    deals = pd.DataFrame({
+        "sggCd": picked["sggCd"],
+        "umdCd": picked["umdCd"],
+        "umdNm": picked["umdNm"],
+        "jibun": picked["jibun"],
+        "aptNm": picked["aptNm"],
+        "excluUseAr": pd.Series(areas).map("{:.2f}".format),
+        "floor": floors.astype(str),
+        "buildYear": picked["buildYear"].astype(str),
+        "dealYear": years.astype(str),
+        "dealMonth": months.astype(str),
+        "dealDay": rng.integers(1, 29, size=n_rows).astype(str),
+    })
+    return deals, base_price, years * 100 + months
+
+
+def generate_trade_rows(complexes: pd.DataFrame, n_rows: int, start_ym: int = 202001, end_ym: int = 202506, seed: int = 0) -> pd.DataFrame:
+    """
+    MOLIT 아파트 매매 API 응답과 같은 컬럼/형식의 행을 만듭니다.
+    dealAmount는 '123,000' 처럼 쉼표가 들어간 문자열이고, 일부 거래는 해제(cdealType='O')로 표시됩니다.
+    """
+    rng = np.random.default_rng(seed)
+    deals, base_price, deal_months = _pick_deals(complexes, n_rows, start_ym, end_ym, rng)
+    deals["dealAmount"] = _with_commas(np.maximum(base_price, 1000).round(-1).astype(np.int64))
+
+    cancelled = rng.random(n_rows) < 0.02
+    deals["cdealType"] = np.where(cancelled, "O", "")
+    deals["cdealDay"] = np.where(cancelled, [f"{str(ym)[2:4]}.{ym % 100:02d}.15" for ym in deal_months], "")
+    deals["dealingGbn"] = rng.choice(["중개거래", "직거래"], size=n_rows, p=[0.9, 0.1])
+    return deals
+
+
+def generate_rent_rows(complexes: pd.DataFrame, n_rows: int, start_ym: int = 202001, end_ym: int = 202506, seed: int = 1) -> pd.DataFrame:
+    """
+    MOLIT 아파트 전월세 API 응답과 같은 컬럼/형식의 행을 만듭니다.
+    약 60%는 전세(monthlyRent=0), 나머지는 월세이며, deposit/monthlyRent는 쉼표가 들어간 문자열입니다.
+    2021년 6월 이후 계약은 contractTerm이 '24.03~26.03' 형태로 채워집니다.
+    """
+    rng = np.random.default_rng(seed)
+    deals, base_price, deal_months = _pick_deals(complexes, n_rows, start_ym, end_ym, rng)
+
+    is_jeonse = rng.random(n_rows) < 0.6
+    jeonse_deposit = base_price * rng.uniform(0.45, 0.7, size=n_rows)
+    wolse_deposit = base_price * rng.uniform(0.02, 0.3, size=n_rows)
+    monthly_rent = np.where(is_jeonse, 0, (base_price * rng.uniform(0.0015, 0.003, size=n_rows)).round())
+    deals["deposit"] = _with_commas(np.where(is_jeonse, jeonse_deposit, wolse_deposit).round(-1).astype(np.int64))
+    deals["monthlyRent"] = _with_commas(monthly_rent.astype(np.int64))
+
+    start_year, start_month = deal_months // 100 % 100, deal_months % 100
+    has_term = deal_months >= CONTRACT_TERM_START
+    deals["contractTerm"] = np.where(
+        has_term,
+        [f"{y:02d}.{m:02d}~{y + 2:02d}.{m:02d}" for y, m in zip(start_year, start_month)],
+        "",
+    )
+    deals["contractType"] = np.where(has_term, rng.choice(["신규", "갱신"], size=n_rows, p=[0.7, 0.3]), "")
+    return deals
+
+
+def iter_synthetic_rows(kind: str, n_rows: int, chunk_rows: int = 1_000_000, n_complexes: int = None, seed: int = 42, **kwargs):
+    """
+    매매('매매') 또는 전월세('전월세') 합성 데이터를 chunk_rows 건씩 만들어 반환합니다.
+    1,000만 건처럼 큰 규모도 청크 단위로 만들어 메모리 사용량을 제한합니다.
+    같은 seed와 n_complexes로 만든 매매/전월세 데이터는 같은 단지 목록을 공유합니다. (갭투자 분석 대상)
+
+    Yields:
+        pd.DataFrame: 합성 데이터 청크
+    """
+    generators = {"매매": generate_trade_rows, "전월세": generate_rent_rows}
+    if kind not in generators:
+        raise ValueError(f"지원하지 않는 거래 유형입니다: {kind}")
+    # 단지 수는 데이터 규모에 맞춰 늘립니다. (단지당 평균 약 300건)
+    complexes = generate_complexes(n_complexes or max(n_rows // 300, 200), seed=seed)
+    for chunk_index, start in enumerate(range(0, n_rows, chunk_rows)):
+        size = min(chunk_rows, n_rows - start)
+        yield generators[kind](complexes, size, seed=seed * 1000 + chunk_index * 2 + (kind == "전월세"), **kwargs)